@@ -1,4 +1,5 @@
 import os
+import logging
 from pydantic_settings import BaseSettings
 from typing import List, Optional
 
@@ -24,7 +25,145 @@ class Settings(BaseSettings):
     # OCR Settings
     OCR_PAGE_THRESHOLD: int = 1
     OCR_MAX_RETRIES: int = 3
-    OCR_RETRY_DELAYS: str = "2,4,8"
+    # Deprecated and ignored: retry delays now come from RETRY_BASE_DELAY /
+    # RETRY_MAX_DELAY. Still accepted so older .env files keep loading.
+    OCR_RETRY_DELAYS: Optional[str] = None
+
+    # Retries of upstream API calls: only 429/5xx/timeouts are retried, with
+    # decorrelated-jitter backoff between RETRY_BASE_DELAY and RETRY_MAX_DELAY
+    # (a server Retry-After is honoured up to RETRY_MAX_RETRY_AFTER)
+    TRANSLATE_MAX_RETRIES: int = 3
+    EMBEDDING_MAX_RETRIES: int = 3
+    RETRY_BASE_DELAY: float = 2.0
+    RETRY_MAX_DELAY: float = 30.0
+    RETRY_MAX_RETRY_AFTER: float = 120.0
+    # Retries a whole OCR/translation job may spend: max(MIN, RATIO x items)
+    RETRY_JOB_BUDGET_MIN: int = 10
+    RETRY_JOB_BUDGET_RATIO: float = 0.2
+
+    # Circuit breaker per (API base, model): opens after N consecutive provider
+    # failures; jobs wait (park) up to CIRCUIT_MAX_PARK_SECONDS for recovery
+    CIRCUIT_FAILURE_THRESHOLD: int = 5
+    CIRCUIT_OPEN_SECONDS: float = 30.0
+    CIRCUIT_MAX_OPEN_SECONDS: float = 300.0
+    CIRCUIT_HALF_OPEN_PROBES: int = 1
+    CIRCUIT_MAX_PARK_SECONDS: float = 1800.0
+
+    # Hedged OCR requests: a page slower than the given latency percentile
+    # gets a duplicate request; at most BUDGET_RATIO extra requests per page
+    OCR_HEDGE_ENABLED: bool = False
+    OCR_HEDGE_PERCENTILE: float = 0.95
+    OCR_HEDGE_MIN_DELAY: float = 5.0
+    OCR_HEDGE_BUDGET_RATIO: float = 0.05
+    OCR_HEDGE_MIN_SAMPLES: int = 20
+
+    # Request timeouts sized to the payload: BASE + PER_UNIT x size, capped at
+    # MAX and at the time left before the page/sentence/job deadline
+    OCR_TIMEOUT_BASE: float = 30.0
+    OCR_TIMEOUT_PER_MB: float = 60.0
+    OCR_TIMEOUT_MAX: float = 180.0
+    TRANSLATE_TIMEOUT_BASE: float = 10.0
+    TRANSLATE_TIMEOUT_PER_1K_TOKENS: float = 20.0
+    TRANSLATE_TIMEOUT_MAX: float = 60.0
+    EMBEDDING_TIMEOUT_BASE: float = 10.0
+    EMBEDDING_TIMEOUT_PER_1K_TOKENS: float = 2.0
+    EMBEDDING_TIMEOUT_MAX: float = 60.0
+
+    # Deadlines: each page/sentence (retries and limiter waits included) must
+    # finish in time; a job gets BASE + PER_ITEM x pages/sentences (0 = none)
+    OCR_PAGE_DEADLINE_SECONDS: float = 300.0
+    TRANSLATE_SENTENCE_DEADLINE_SECONDS: float = 120.0
+    JOB_DEADLINE_BASE_SECONDS: float = 600.0
+    OCR_JOB_DEADLINE_PER_PAGE: float = 120.0
+    TRANSLATE_JOB_DEADLINE_PER_SENTENCE: float = 30.0
+
+    # Adaptive API rate limits (AIMD): start at INITIAL_*, grow on success up
+    # to MAX_*, halve on 429/503. SiliconFlow L0 allows 1,000 RPM / 80k TPM.
+    OCR_INITIAL_RPM: int = 60
+    OCR_MAX_RPM: int = 1000
+    OCR_INITIAL_CONCURRENCY: int = 5
+    OCR_MAX_CONCURRENCY: int = 20
+    TRANSLATE_INITIAL_RPM: int = 60
+    TRANSLATE_MAX_RPM: int = 1000
+    TRANSLATE_INITIAL_CONCURRENCY: int = 5
+    TRANSLATE_MAX_CONCURRENCY: int = 20
+    EMBEDDING_INITIAL_RPM: int = 100
+    EMBEDDING_MAX_RPM: int = 1000
+    EMBEDDING_INITIAL_CONCURRENCY: int = 10
+    EMBEDDING_MAX_CONCURRENCY: int = 20
+    # Tokens per minute (input + output); requests reserve an estimate and
+    # are reconciled with the response `usage`. 0 disables the TPM limit.
+    OCR_TPM: int = 80000
+    TRANSLATE_TPM: int = 80000
+    EMBEDDING_TPM: int = 500000
+
+    # Limiters are kept per (API base, API key); these caps apply across all
+    # keys per limiter kind, and idle per-key limiters are dropped
+    LIMITER_GLOBAL_RPM: int = 3000
+    LIMITER_GLOBAL_CONCURRENCY: int = 50
+    LIMITER_IDLE_SECONDS: int = 900
+    LIMITER_LEASE_TTL_SECONDS: int = 300
+
+    # Cross-process coordination of limiter state and job control (pause/stop):
+    # "local" (single process), "sqlite" (all workers on one host) or
+    # "redis" (several hosts; requires `pip install redis`)
+    COORDINATION_BACKEND: str = "local"
+    COORDINATION_SQLITE_PATH: str = "./coordination.db"
+    COORDINATION_REDIS_URL: str = "redis://localhost:6379/0"
+    JOB_CONTROL_TTL_SECONDS: int = 300
+    # How often jobs re-read signals sent from other processes with the
+    # sqlite backend (reads only; local and redis deliver them at once)
+    JOB_CONTROL_POLL_SECONDS: float = 1.0
+
+    # Durable job queue: web processes enqueue, `python worker.py` runs jobs.
+    # A lease not renewed by a heartbeat within the visibility timeout makes
+    # the job available to other workers again
+    WORKER_CONCURRENCY: int = 2
+    WORKER_POLL_SECONDS: float = 1.0
+    WORKER_SHUTDOWN_GRACE_SECONDS: float = 30.0
+    WORKER_EMBEDDED: bool = False  # also run a worker inside the web process
+    # Workers publish their circuit, limiter and retry state for /health and
+    # /metrics (through the same backend as the job pause/stop signals)
+    WORKER_METRICS_PUBLISH_SECONDS: float = 10.0
+    JOB_VISIBILITY_TIMEOUT_SECONDS: int = 120
+    JOB_HEARTBEAT_SECONDS: int = 30
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_DELAY_SECONDS: float = 30.0
+
+    # Fair-share scheduling of queued jobs across users: jobs of at most
+    # INTERACTIVE_MAX_ITEMS pages/sentences go first; beyond
+    # MAX_RUNNING_PER_USER running jobs a user only gets idle workers.
+    # SECONDS_PER_* are the work estimates used for fair queuing (and for
+    # ETAs until real timings exist)
+    SCHEDULER_MAX_RUNNING_PER_USER: int = 2
+    SCHEDULER_INTERACTIVE_MAX_ITEMS: int = 20
+    SCHEDULER_DEFAULT_WEIGHT: float = 1.0
+    SCHEDULER_OCR_SECONDS_PER_PAGE: float = 15.0
+    SCHEDULER_TRANSLATE_SECONDS_PER_SENTENCE: float = 2.0
+
+    # Progress of running jobs is written to the database every FLUSH_ITEMS
+    # pages/sentences or FLUSH_SECONDS, and on pause/stop/completion;
+    # status endpoints read the live view (updated every LIVE_SECONDS)
+    PROGRESS_FLUSH_ITEMS: int = 10
+    PROGRESS_FLUSH_SECONDS: float = 5.0
+    PROGRESS_LIVE_SECONDS: float = 1.0
+
+    # PDFs longer than this are split into page-range jobs that workers on
+    # any node lease independently (0 = one job per document)
+    OCR_PAGE_RANGE_SIZE: int = 50
+
+    # Admission control on /ocr/upload and /translate/start (0 = unlimited):
+    # over a limit the request gets 429 + Retry-After (clamped to MIN..MAX
+    # seconds). With DEFER_WHEN_BUSY, global overload queues the job to start
+    # after Retry-After instead; per-user quotas always refuse
+    ADMISSION_MAX_QUEUED_JOBS: int = 200
+    ADMISSION_MAX_PENDING_TOKENS: int = 20_000_000
+    ADMISSION_MAX_JOBS_PER_USER: int = 20
+    ADMISSION_MAX_TOKENS_PER_USER: int = 5_000_000
+    ADMISSION_DEFER_WHEN_BUSY: bool = False
+    ADMISSION_TOKENS_PER_PAGE: int = 2000
+    ADMISSION_RETRY_AFTER_MIN: float = 10.0
+    ADMISSION_RETRY_AFTER_MAX: float = 900.0
 
     # Poppler path (for PDF processing on Windows)
     # If not set, pdf2image will try to find poppler in PATH
@@ -38,13 +177,33 @@ class Settings(BaseSettings):
     # Common dimensions: 768 (Gemini/OpenAI text-embedding-3-small),
     # 1536 (OpenAI text-embedding-ada-002), 3072 (OpenAI text-embedding-3-large)
 
+    # Correction indexes (glossary matcher), kept in memory per user language pair
+    GLOSSARY_MAX_TERM_CHARS: int = 100
+    CORRECTION_INDEX_MAX_LOADED: int = 256
+    CORRECTION_INDEX_REFRESH_SECONDS: int = 30
+
+    # Lexical prefilter for similarity search (BM25 shortlist size, and the
+    # token-overlap threshold used when no embedding API is configured)
+    CORRECTION_SHORTLIST_SIZE: int = 50
+    LEXICAL_SIMILARITY_THRESHOLD: float = 0.8
+
+    # Correction embedding storage format: "int8" (scalar quantized) or "float16"
+    EMBEDDING_STORAGE_FORMAT: str = "int8"
+
+    # Embedding cache (rows kept in DB / vectors kept in process memory)
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 100000
+    EMBEDDING_CACHE_MEMORY_ENTRIES: int = 2000
+
+    # Batch embedding (chunk size is also capped by the provider limit)
+    EMBEDDING_BATCH_SIZE: int = 100
+    EMBEDDING_BATCH_CONCURRENCY: int = 4
+
+    # Correction import (rows per embedding batch / INSERT transaction)
+    IMPORT_INSERT_BATCH_SIZE: int = 1000
+
     # CORS
     ALLOWED_ORIGINS: str = "http://localhost:5173,http://localhost:3000"
 
-    @property
-    def retry_delays(self) -> List[int]:
-        return [int(x) for x in self.OCR_RETRY_DELAYS.split(",")]
-
     @property
     def allowed_origins_list(self) -> List[str]:
         return [origin.strip() for origin in self.ALLOWED_ORIGINS.split(",")]
@@ -56,5 +215,10 @@ class Settings(BaseSettings):
 
 settings = Settings()
 
+if settings.OCR_RETRY_DELAYS is not None:
+    logging.getLogger(__name__).warning(
+        "OCR_RETRY_DELAYS is deprecated and ignored; use RETRY_BASE_DELAY / RETRY_MAX_DELAY"
+    )
+
 # Ensure upload directory exists
 os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
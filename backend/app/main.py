@@ -2,12 +2,16 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from pathlib import Path
+import asyncio
 import logging
 import time
 
 from .config import settings
 from .database import init_db
 from .routers import auth, ocr, translate, correction, history
+from .utils.coordination import coordination_backend
+from .services.job_queue import job_queue
+from .services.worker_metrics import combined_circuit_states, process_metrics, worker_metrics
 
 # 配置日志
 logger = logging.getLogger(__name__)
@@ -55,7 +59,7 @@ app.include_router(history.router)
 
 # Initialize database on startup
 @app.on_event("startup")
-def on_startup():
+async def on_startup():
     logger.info("=" * 60)
     logger.info("应用启动中...")
     logger.info(f"应用名称: {settings.APP_NAME}")
@@ -65,15 +69,44 @@ def on_startup():
     init_db()
     logger.info("数据库初始化完成")
 
+    if settings.WORKER_EMBEDDED:
+        from .worker import JobWorker
+        app.state.worker = JobWorker()
+        app.state.worker_task = asyncio.create_task(app.state.worker.run())
+        logger.info("已在 Web 进程内启动任务 Worker")
+
     logger.info("✅ 应用启动完成")
     logger.info("=" * 60)
 
 
+@app.on_event("shutdown")
+async def on_shutdown():
+    worker = getattr(app.state, "worker", None)
+    if worker is not None:
+        worker.stop()
+        await app.state.worker_task
+
+
 @app.get("/")
 def root():
     return {"message": "OCR and Translate API", "version": "1.0.0"}
 
 
 @app.get("/health")
-def health():
-    return {"status": "healthy"}
+async def health():
+    """Circuit states of this process and every live worker (worst state per circuit)"""
+    workers = await worker_metrics()
+    circuits = combined_circuit_states(workers.values())
+    status = "degraded" if any(state != "closed" for state in circuits.values()) else "healthy"
+    return {"status": status, "circuits": circuits, "workers": len(workers)}
+
+
+@app.get("/metrics")
+async def metrics():
+    """This process's counters, plus the latest snapshot published by each worker"""
+    return {
+        **process_metrics(),
+        "workers": await worker_metrics(),
+        "job_queue": job_queue.stats(),
+        "coordination_backend": coordination_backend.name,
+    }
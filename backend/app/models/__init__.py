@@ -1,5 +1,8 @@
 from .user import User
 from .history import History, TaskStatus, TaskType
 from .correction import Correction
+from .embedding_cache import EmbeddingCacheEntry
+from .job import Job, JobStatus
+from .ocr_page import OCRPage
 
-__all__ = ["User", "History", "TaskStatus", "TaskType", "Correction"]
+__all__ = ["User", "History", "TaskStatus", "TaskType", "Correction", "EmbeddingCacheEntry", "Job", "JobStatus", "OCRPage"]
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Float
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Float, LargeBinary
 from sqlalchemy.sql import func
 from ..database import Base
 
@@ -17,7 +17,13 @@ class Correction(Base):
     source_language = Column(String, nullable=False)
     target_language = Column(String, nullable=False)
 
-    # Vector embedding for similarity search (stored as JSON array)
+    # Vector embedding for similarity search, quantized to float16 or int8
+    # (see app.utils.vector_quantization); int8 vectors carry a per-vector scale
+    embedding_vector = Column(LargeBinary, nullable=True)
+    embedding_dtype = Column(String, nullable=True)
+    embedding_scale = Column(Float, nullable=True)
+
+    # Legacy JSON array embedding, converted by migrate_embeddings.py
     embedding = Column(Text, nullable=True)
 
     # Metadata
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, LargeBinary, DateTime
+from sqlalchemy.sql import func
+from ..database import Base
+
+
+class EmbeddingCacheEntry(Base):
+    __tablename__ = "embedding_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    # sha256 over (model, dimension, normalized text)
+    cache_key = Column(String(64), unique=True, index=True, nullable=False)
+    model = Column(String, nullable=False)
+    dimension = Column(Integer, nullable=False)
+
+    # Embedding vector stored as little-endian float32 bytes
+    embedding = Column(LargeBinary, nullable=False)
+
+    # LRU bookkeeping
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_used_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    hit_count = Column(Integer, default=0)
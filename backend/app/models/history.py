@@ -9,6 +9,8 @@ class TaskStatus(str, enum.Enum):
     PROCESSING = "processing"
     COMPLETED = "completed"
     FAILED = "failed"
+    PAUSED = "paused"
+    STOPPED = "stopped"
 
 
 class TaskType(str, enum.Enum):
@@ -41,6 +43,10 @@ class History(Base):
     # Translation results (JSON string with sentence pairs)
     translation_result = Column(Text, nullable=True)
 
+    # Source sentences as split for translation (JSON: source language and
+    # sentences with their page numbers); reused by resume, retranslation and export
+    segmentation = Column(Text, nullable=True)
+
     # Language info
     source_language = Column(String, nullable=True)
     target_language = Column(String, nullable=True)
@@ -0,0 +1,64 @@
+from sqlalchemy import Column, Integer, Float, String, Text, DateTime, ForeignKey, Enum as SQLEnum
+from sqlalchemy.sql import func
+import enum
+from ..database import Base
+
+
+class JobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class Job(Base):
+    """
+    One unit of background work in the durable job queue
+
+    Web processes insert rows; workers lease them. A running job's lease is
+    extended by heartbeats; if the worker dies the lease expires and another
+    worker picks the job up again (up to max_attempts).
+    """
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False, index=True)  # "ocr", "translate"
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    history_id = Column(Integer, ForeignKey("history.id"), nullable=True, index=True)
+
+    # Handler arguments (JSON)
+    payload = Column(Text, nullable=True)
+
+    status = Column(SQLEnum(JobStatus), default=JobStatus.QUEUED, nullable=False, index=True)
+
+    # Scheduling (see services/scheduler.py): pages/sentences, priority class
+    # and start-time fair queuing tags
+    cost = Column(Integer, default=1, nullable=True)
+    priority = Column(Integer, default=1, nullable=True, index=True)
+    virtual_start = Column(Float, default=0.0, nullable=True, index=True)
+    virtual_finish = Column(Float, default=0.0, nullable=True)
+
+    # Estimated API tokens, for admission control (services/admission.py)
+    tokens = Column(Integer, default=0, nullable=True)
+
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=3, nullable=False)
+
+    # Not leased before this time (retry backoff); naive UTC like the lease times
+    available_at = Column(DateTime, nullable=False, index=True)
+
+    # Lease held by the worker running the job
+    lease_owner = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True, index=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+
+    last_error = Column(Text, nullable=True)
+
+    # Progress or result reported by handlers without a history entry (JSON)
+    progress = Column(Text, nullable=True)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
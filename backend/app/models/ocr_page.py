@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, Float, Text, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.sql import func
+from ..database import Base
+
+
+class OCRPage(Base):
+    """
+    OCR result of one page of a document
+
+    Pages are written one at a time by whichever worker processed them; the
+    (history_id, page_number) key makes rewrites of a retried page idempotent.
+    History.ocr_result is assembled from these rows once every page is done.
+    """
+    __tablename__ = "ocr_pages"
+    __table_args__ = (UniqueConstraint("history_id", "page_number", name="uq_ocr_pages_history_page"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    history_id = Column(Integer, ForeignKey("history.id"), nullable=False, index=True)
+    page_number = Column(Integer, nullable=False)
+
+    text = Column(Text, nullable=False, default="")
+    confidence = Column(Float, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
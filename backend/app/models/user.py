@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean
+from sqlalchemy import Column, Integer, Float, String, DateTime, Boolean, Text
 from sqlalchemy.sql import func
 from ..database import Base
 
@@ -25,3 +25,10 @@ class User(Base):
     embedding_api_key = Column(String, nullable=True)  # Encrypted
     embedding_model = Column(String, nullable=True)
     embedding_dimension = Column(Integer, nullable=True, default=768)  # Vector dimension
+
+    # Per-user rate limit overrides for the user's own API keys (JSON):
+    # {"ocr": {"rpm": 500, "tpm": 40000, "concurrency": 8}, "translate": {...}, "embedding": {...}}
+    rate_limits = Column(Text, nullable=True)
+
+    # Share of worker time relative to other users (None = SCHEDULER_DEFAULT_WEIGHT)
+    scheduler_weight = Column(Float, nullable=True)
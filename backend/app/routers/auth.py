@@ -4,6 +4,7 @@ from jose import JWTError, jwt
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
+import json
 import logging
 
 from ..config import settings
@@ -159,6 +160,11 @@ async def save_api_config(
     current_user.embedding_api_base = config.embedding_api_base
     current_user.embedding_model = config.embedding_model
     current_user.embedding_dimension = config.embedding_dimension
+    if config.rate_limits is not None:
+        current_user.rate_limits = json.dumps({
+            kind: limits.model_dump(exclude_none=True)
+            for kind, limits in config.rate_limits.items()
+        })
 
     db.commit()
 
@@ -173,6 +179,7 @@ async def save_api_config(
         embedding_model=current_user.embedding_model,
         embedding_dimension=current_user.embedding_dimension,
         embedding_api_key_set=bool(current_user.embedding_api_key),
+        rate_limits=json.loads(current_user.rate_limits or "{}"),
     )
 
 
@@ -192,4 +199,5 @@ async def get_api_config(
         embedding_model=current_user.embedding_model,
         embedding_dimension=current_user.embedding_dimension,
         embedding_api_key_set=bool(current_user.embedding_api_key),
+        rate_limits=json.loads(current_user.rate_limits or "{}"),
     )
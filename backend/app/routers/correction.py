@@ -1,10 +1,15 @@
+import csv
+import io
+import json
+import logging
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Dict, Any, Iterator, Optional
 from datetime import datetime
 
 from ..database import get_db
-from ..models import User
+from ..models import Job, JobStatus, User
 from ..schemas import (
     CorrectionCreate,
     CorrectionResponse,
@@ -13,10 +18,65 @@ from ..schemas import (
     CorrectionExportResponse,
 )
 from ..services import CorrectionService
+from ..services.job_queue import job_handler, job_queue
 from .auth import get_current_user
 
+logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/corrections", tags=["corrections"])
 
+# Durable job kind for bulk imports; progress and counts live on the Job row
+IMPORT_JOB = "correction_import"
+
+# Job status -> status reported by GET /corrections/import/{job_id}
+IMPORT_STATUS = {
+    JobStatus.QUEUED: "pending",
+    JobStatus.RUNNING: "processing",
+    JobStatus.SUCCEEDED: "completed",
+    JobStatus.FAILED: "failed",
+    JobStatus.CANCELLED: "failed",
+}
+
+
+def _save_import_progress(job_id: int, stats: Dict[str, Any]):
+    """Store an import's running counts on its job row"""
+    from ..database import SessionLocal
+
+    # Own session: the import commits its inserts on the service's session
+    db = SessionLocal()
+    try:
+        db.query(Job).filter(Job.id == job_id).update(
+            {Job.progress: json.dumps(stats)}, synchronize_session=False
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+@job_handler(IMPORT_JOB)
+async def run_import_job(job: Job):
+    """Worker entry point for a queued bulk correction import"""
+    from ..database import SessionLocal
+
+    payload = json.loads(job.payload)
+    corrections = [CorrectionCreate(**item) for item in payload.get("corrections", [])]
+
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.id == job.user_id).first()
+        if not user:
+            raise ValueError(f"User {job.user_id} not found")
+
+        correction_service = CorrectionService(db, user)
+        result = await correction_service.import_corrections(
+            corrections, on_progress=lambda stats: _save_import_progress(job.id, stats)
+        )
+        logger.info(f"导入任务 {job.id} 完成: {result}")
+    except Exception as e:
+        logger.error(f"导入任务 {job.id} 失败: {str(e)}")
+        raise
+    finally:
+        db.close()
+
 
 @router.post("", response_model=CorrectionResponse)
 async def create_correction(
@@ -77,24 +137,133 @@ async def import_corrections(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Import corrections from backup"""
-    correction_service = CorrectionService(db, current_user)
-    count = await correction_service.import_corrections(import_data.corrections)
+    """Import corrections from backup (runs as a queued job)"""
+    total = len(import_data.corrections)
+    job = job_queue.enqueue(
+        db,
+        IMPORT_JOB,
+        current_user.id,
+        payload={"corrections": [item.model_dump() for item in import_data.corrections]},
+        cost=max(1, total),
+    )
 
     return {
-        "message": f"Successfully imported {count} corrections",
-        "imported_count": count
+        "message": f"Import of {total} corrections started",
+        "job_id": job.id,
+        "total": total
     }
 
 
-@router.get("/export", response_model=CorrectionExportResponse)
+@router.get("/import/{job_id}")
+def get_import_progress(
+    job_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get progress of a correction import job"""
+    job = db.query(Job).filter(
+        Job.id == job_id, Job.kind == IMPORT_JOB, Job.user_id == current_user.id
+    ).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+
+    state = {"stage": "queued", "total": job.cost, "processed": 0, "imported": 0, "skipped": 0, "failed": 0}
+    if job.progress:
+        state.update(json.loads(job.progress))
+    state["status"] = IMPORT_STATUS[job.status]
+    if job.status in (JobStatus.FAILED, JobStatus.CANCELLED):
+        state["error"] = job.last_error
+    elif job.status == JobStatus.QUEUED and job.last_error:
+        state["stage"] = "retrying"
+    if job.finished_at:
+        state["finished_at"] = job.finished_at
+
+    return {"job_id": job.id, **state}
+
+
+EXPORT_FIELDS = [
+    "id",
+    "source_text",
+    "corrected_translation",
+    "source_language",
+    "target_language",
+    "created_at",
+    "usage_count",
+    "last_used_at",
+]
+EMBEDDING_EXPORT_FIELDS = ["embedding", "embedding_dtype", "embedding_scale", "embedding_dim"]
+
+
+def stream_corrections_export(
+    user_id: int,
+    format: str,
+    source_language: Optional[str],
+    target_language: Optional[str],
+    include_embeddings: bool
+) -> Iterator[str]:
+    """Yield export rows as NDJSON lines or CSV records"""
+    from ..database import SessionLocal
+
+    # The request-scoped session is closed before the body is streamed,
+    # so the generator owns its own session
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.id == user_id).first()
+        correction_service = CorrectionService(db, user)
+        rows = correction_service.iter_corrections(
+            source_language, target_language, include_embeddings
+        )
+
+        if format == "ndjson":
+            for row in rows:
+                yield json.dumps(row, ensure_ascii=False) + "\n"
+            return
+
+        fields = EXPORT_FIELDS + (EMBEDDING_EXPORT_FIELDS if include_embeddings else [])
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=fields)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+        if buffer.tell():
+            yield buffer.getvalue()
+    finally:
+        db.close()
+
+
+@router.get("/export")
 def export_corrections(
     source_language: str = None,
     target_language: str = None,
+    format: str = "ndjson",
+    include_embeddings: bool = False,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Export corrections for backup"""
+    """
+    Export corrections for backup
+
+    format=ndjson (the default) or format=csv streams rows with constant
+    memory regardless of the number of corrections; format=json returns the
+    legacy single document, built in memory.
+    """
+    if format in ("ndjson", "csv"):
+        media_types = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+        filename = f"corrections_{datetime.utcnow().strftime('%Y%m%d')}.{format}"
+        return StreamingResponse(
+            stream_corrections_export(
+                current_user.id, format, source_language, target_language, include_embeddings
+            ),
+            media_type=media_types[format],
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+        )
+
+    if format != "json":
+        raise HTTPException(status_code=400, detail="Unsupported format. Supported: json, ndjson, csv")
+
     correction_service = CorrectionService(db, current_user)
     corrections = correction_service.export_corrections(source_language, target_language)
 
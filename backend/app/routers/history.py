@@ -9,9 +9,11 @@ from typing import Optional
 from pathlib import Path
 
 from ..database import get_db
-from ..models import User, History
+from ..models import User, History, OCRPage
 from ..schemas import HistoryResponse, HistoryListResponse
 from ..services import ExportService
+from ..services.job_queue import job_queue
+from ..services.segmentation import load_segmentation
 from ..config import settings
 from .auth import get_current_user
 
@@ -88,6 +90,9 @@ def delete_history(
         except Exception:
             pass
 
+    # Drop queued work and per-page OCR results
+    job_queue.cancel(db, history_id)
+    db.query(OCRPage).filter(OCRPage.history_id == history_id).delete(synchronize_session=False)
     db.delete(history)
     db.commit()
 
@@ -125,6 +130,11 @@ async def export_translation(
     # Parse translation results
     translation_data = json.loads(history.translation_result)
 
+    # Page numbers from the stored segmentation (results follow its order)
+    for pair, sentence in zip(translation_data, load_segmentation(history) or []):
+        if pair.get("source") == sentence["text"] and sentence.get("page_numbers"):
+            pair["page_numbers"] = sentence["page_numbers"]
+
     # Prepare output path
     export_dir = Path(settings.UPLOAD_DIR) / str(current_user.id) / "exports"
     export_dir.mkdir(parents=True, exist_ok=True)
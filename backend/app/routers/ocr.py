@@ -1,35 +1,430 @@
 import os
 import shutil
 import json
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
 from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import Optional, AsyncGenerator
+from typing import Any, AsyncGenerator, Callable, Dict, List, Optional, Tuple
 from pathlib import Path
 import asyncio
 import logging
 
 from ..database import get_db
-from ..models import User, History, TaskStatus, TaskType
+from ..models import User, History, Job, JobStatus, OCRPage, TaskStatus, TaskType
 from ..schemas import OCRResponse, OCRPageResult
 from ..services import OCRService
+from ..services.admission import admission, estimate_job_tokens
+from ..services.job_queue import job_handler, job_queue
+from ..services.progress import ProgressReporter, live_progress
+from ..services.scheduler import JobPriority
 from ..config import settings
-from ..utils import EncryptionManager
+from ..utils import EncryptionManager, RetryBudget, use_retry_budget, current_retry_budget
+from ..utils.limiter import user_rate_limits
+from ..utils.circuit_breaker import park_while_open
+from ..utils.coordination import JobPaused, JobStopped, job_control
+from ..utils.deadline import Deadline, current_deadline, run_with_deadline, use_deadline
 from .auth import get_current_user
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/ocr", tags=["ocr"])
 
+# Job kinds: a whole file, and one page range of a split PDF
+OCR_JOB = "ocr"
+OCR_PAGES_JOB = "ocr_pages"
+# OCR streamed into translation in one job (handler in routers/translate.py)
+PIPELINE_JOB = "ocr_translate"
 
-async def process_ocr_background(history_id: int, user_id: int):
-    """Background task to process OCR"""
+
+def _mark_parked(db: Session, history: History, error: Exception):
+    """Show that the job is waiting for the OCR provider to recover"""
+    history.progress_message = f"OCR 服务暂不可用，等待恢复后继续第 {history.current_page or 1} 页: {error}"
+    db.commit()
+
+
+def _mark_interrupted(db: Session, history: History, error: JobStopped):
+    """Record a pause/stop; finished pages are kept for resume"""
+    if history.total_pages and Path(history.file_path).suffix.lower() == ".pdf":
+        history.current_page = db.query(OCRPage).filter(OCRPage.history_id == history.id).count()
+    done = f"{history.current_page or 0}/{history.total_pages or 0}"
+    if isinstance(error, JobPaused):
+        history.status = TaskStatus.PAUSED
+        history.progress_message = f"已暂停，已完成 {done} 页"
+    else:
+        history.status = TaskStatus.STOPPED
+        history.progress_message = f"已停止，已完成 {done} 页"
+    db.commit()
+    logger.info(f"OCR 任务 {history.id} {history.progress_message}")
+
+
+@job_handler(OCR_JOB)
+async def run_ocr_job(job: Job):
+    """Worker entry point for a queued OCR job"""
+    await process_ocr_background(job.history_id, job.user_id, job)
+
+
+async def process_ocr_background(history_id: int, user_id: int, job: Optional[Job] = None):
+    """Background task to process OCR; errors propagate so the queue retries the job"""
+    # Retries of all pages share one budget, and the job one deadline; both
+    # are grown once the page count is known
+    job_deadline = Deadline.for_items(
+        1, settings.JOB_DEADLINE_BASE_SECONDS, settings.OCR_JOB_DEADLINE_PER_PAGE, f"OCR job {history_id}"
+    )
+    with use_retry_budget(RetryBudget(settings.RETRY_JOB_BUDGET_MIN)), use_deadline(job_deadline):
+        await _process_ocr(history_id, user_id, job)
+
+
+def _mark_failed(db: Session, history: History, job: Optional[Job], error: Exception):
+    """Record a job error; History stays pending while the queue will retry the job"""
+    db.rollback()
+    if job is not None and job_queue.will_retry(job, error):
+        history.status = TaskStatus.PENDING
+        history.progress_message = f"处理失败，稍后自动重试: {str(error)}"
+    else:
+        history.status = TaskStatus.FAILED
+    history.error_message = str(error)
+    db.commit()
+
+
+async def _ocr_page(ocr_service: OCRService, image_path: str, page_num: int) -> Dict[str, Any]:
+    """OCR one page under its own deadline"""
+    return await run_with_deadline(
+        lambda: ocr_service.ocr_single_image(image_path),
+        settings.OCR_PAGE_DEADLINE_SECONDS,
+        f"page {page_num}"
+    )
+
+
+def _load_pages(db: Session, history_id: int) -> List[Dict[str, Any]]:
+    """OCR results of all finished pages, in page order"""
+    pages = db.query(OCRPage).filter(OCRPage.history_id == history_id).order_by(OCRPage.page_number).all()
+    return [
+        {"page_number": page.page_number, "text": page.text, "confidence": page.confidence}
+        for page in pages
+    ]
+
+
+def _save_page(db: Session, history_id: int, page_number: int, text: str, confidence: Optional[float]):
+    """Store one page; writing the same page again (a retried range) replaces it"""
+    values = {"text": text, "confidence": confidence}
+    updated = db.query(OCRPage).filter(
+        OCRPage.history_id == history_id, OCRPage.page_number == page_number
+    ).update(values, synchronize_session=False)
+    if not updated:
+        db.add(OCRPage(history_id=history_id, page_number=page_number, **values))
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another worker inserted the page first
+        db.rollback()
+        db.query(OCRPage).filter(
+            OCRPage.history_id == history_id, OCRPage.page_number == page_number
+        ).update(values, synchronize_session=False)
+        db.commit()
+
+
+async def _ocr_pdf_pages(
+    db: Session,
+    history: History,
+    ocr_service: OCRService,
+    first_page: int,
+    last_page: int,
+    on_page: Optional[Callable[[int, str], None]] = None,
+    control_kind: str = OCR_JOB,
+    on_pause: Optional[Callable[[], None]] = None
+):
+    """
+    OCR pages first_page..last_page of a PDF, skipping pages already stored
+
+    Args:
+        on_page: Called with (page_number, text) for every page in order, stored
+            ones included; the caller then reports progress instead
+        control_kind: Job control key checked for pause/stop
+        on_pause: If given, a pause is waited out here (calling it first)
+            instead of ending the job at the checkpoint
+    """
+    from pdf2image import convert_from_path
+    import time
+
+    file_path = history.file_path
+    total_pages = history.total_pages
+
+    convert_kwargs = {
+        'dpi': 150,
+        'fmt': 'png',
+        'thread_count': 1,
+    }
+    if settings.POPPLER_PATH:
+        convert_kwargs['poppler_path'] = settings.POPPLER_PATH
+        logger.info(f"使用 Poppler 路径: {settings.POPPLER_PATH}")
+
+    temp_dir = Path(file_path).parent / f"temp_{history.id}_{first_page}"
+    temp_dir.mkdir(exist_ok=True)
+    logger.info(f"临时目录创建: {temp_dir}")
+
+    # Page results are saved one by one; progress fields in batches
+    # (left to the caller when it takes the pages through on_page)
+    progress = ProgressReporter(db, history) if on_page is None else None
+
+    def pages_done() -> int:
+        # Counts pages finished by every worker on this document
+        return db.query(OCRPage).filter(OCRPage.history_id == history.id).count()
+
+    try:
+        for page_num in range(first_page, last_page + 1):
+            # Checkpoint: finished pages are stored, so pausing here loses nothing
+            if on_pause is not None:
+                state = await job_control.wait_while_paused(control_kind, history.id, on_pause=on_pause)
+            else:
+                state = await job_control.check(control_kind, history.id)
+            if state.get("stopped"):
+                raise JobStopped(f"OCR job {history.id} stopped")
+            if state.get("paused"):
+                raise JobPaused(f"OCR job {history.id} paused")
+
+            # Done by an earlier attempt, or by another worker since
+            stored = db.query(OCRPage.text).filter(
+                OCRPage.history_id == history.id, OCRPage.page_number == page_num
+            ).first()
+            if stored:
+                if on_page is not None:
+                    on_page(page_num, stored.text or "")
+                continue
+
+            logger.info("=" * 60)
+            logger.info(f"开始处理第 {page_num}/{total_pages} 页")
+            logger.info("=" * 60)
+
+            # Update progress
+            if on_page is None:
+                await progress.update(progress_message=f"正在处理第 {page_num} 页，共 {total_pages} 页")
+
+            # Convert single page
+            logger.info(f"正在转换 PDF 第 {page_num} 页为图片...")
+            convert_start = time.time()
+
+            images = convert_from_path(
+                file_path,
+                first_page=page_num,
+                last_page=page_num,
+                **convert_kwargs
+            )
+
+            convert_time = time.time() - convert_start
+            logger.info(f"PDF 转换完成，耗时 {convert_time:.2f} 秒")
+
+            if not images:
+                # Stored as an empty page so the document can still be assembled
+                logger.warning(f"第 {page_num} 页转换失败，跳过")
+                _save_page(db, history.id, page_num, "", None)
+                if on_page is not None:
+                    on_page(page_num, "")
+                else:
+                    await progress.update(item_done=True, current_page=pages_done)
+                continue
+
+            image = images[0]
+            temp_image_path = temp_dir / f"page_{page_num}.png"
+
+            save_start = time.time()
+            image.save(temp_image_path, 'PNG', optimize=True)
+            save_time = time.time() - save_start
+
+            image_size = temp_image_path.stat().st_size
+            logger.info(f"图片保存完成: {temp_image_path}")
+            logger.info(f"图片大小: {image_size/1024:.2f} KB，保存耗时 {save_time:.2f} 秒")
+
+            # OCR the page
+            logger.info(f"开始 OCR 识别第 {page_num} 页...")
+            ocr_start = time.time()
+
+            result = await job_control.run_cancellable(
+                control_kind,
+                history.id,
+                lambda: park_while_open(
+                    lambda: _ocr_page(ocr_service, str(temp_image_path), page_num),
+                    on_park=lambda e: _mark_parked(db, history, e)
+                )
+            )
+
+            ocr_time = time.time() - ocr_start
+            logger.info(f"OCR 识别完成，耗时 {ocr_time:.2f} 秒")
+
+            _save_page(db, history.id, page_num, result["text"], result.get("confidence"))
+
+            if on_page is not None:
+                on_page(page_num, result["text"])
+            else:
+                await progress.update(item_done=True, current_page=pages_done)
+            logger.info(f"第 {page_num} 页处理完成，识别文本长度: {len(result['text'])} 字符")
+
+            # Clean up
+            temp_image_path.unlink()
+            logger.info(f"临时文件清理完成")
+            del image, images
+
+        if progress is not None:
+            await progress.flush()
+
+    finally:
+        if temp_dir.exists():
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+async def _read_single_page(
+    db: Session,
+    history: History,
+    ocr_service: OCRService,
+    control_kind: str = OCR_JOB
+) -> Dict[str, Any]:
+    """Page 1 of a one-page file: an image (OCR), text file or Word document"""
+    file_path = history.file_path
+    file_ext = Path(file_path).suffix.lower()
+
+    if file_ext in ['.png', '.jpg', '.jpeg', '.bmp', '.gif']:
+        result = await job_control.run_cancellable(
+            control_kind,
+            history.id,
+            lambda: park_while_open(
+                lambda: _ocr_page(ocr_service, file_path, 1),
+                on_park=lambda e: _mark_parked(db, history, e)
+            )
+        )
+        return {"page_number": 1, "text": result["text"], "confidence": result.get("confidence")}
+
+    if file_ext in ['.txt', '.md']:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            text = f.read()
+        return {"page_number": 1, "text": text, "confidence": 1.0}
+
+    if file_ext in ['.docx', '.doc']:
+        from docx import Document
+        doc = Document(file_path)
+        text = "\n".join([para.text for para in doc.paragraphs])
+        return {"page_number": 1, "text": text, "confidence": 1.0}
+
+    raise ValueError(f"Unsupported file type: {file_ext}")
+
+
+def _page_ranges(pages: List[int], size: int) -> List[Tuple[int, int]]:
+    """Group sorted page numbers into contiguous ranges of at most `size` pages (0 = unlimited)"""
+    ranges: List[Tuple[int, int]] = []
+    for page in pages:
+        if ranges and page == ranges[-1][1] + 1 and (not size or page - ranges[-1][0] < size):
+            ranges[-1] = (ranges[-1][0], page)
+        else:
+            ranges.append((page, page))
+    return ranges
+
+
+def _enqueue_page_ranges(db: Session, history: History, pages: List[int], delay_seconds: float = 0):
+    """Queue page-range jobs for the given pages; workers on any node can lease them"""
+    size = settings.OCR_PAGE_RANGE_SIZE
+    ranges = _page_ranges(pages, size)
+    for first_page, last_page in ranges:
+        job_queue.enqueue(
+            db,
+            OCR_PAGES_JOB,
+            user_id=history.user_id,
+            history_id=history.id,
+            payload={"first_page": first_page, "last_page": last_page},
+            cost=last_page - first_page + 1,
+            priority=JobPriority.BULK,
+            tokens=estimate_job_tokens(pages=last_page - first_page + 1),
+            delay_seconds=delay_seconds,
+        )
+    history.progress_message = f"PDF 待处理 {len(pages)} 页，已拆分为 {len(ranges)} 个任务分布式处理"
+    db.commit()
+    logger.info(f"PDF {history.id} 的 {len(pages)} 页拆分为 {len(ranges)} 个页面范围任务")
+
+
+def _assemble_ocr_result(db: Session, history: History) -> bool:
+    """
+    Final step of a split document: build History.ocr_result from the pages
+
+    Safe to run more than once (the last two ranges may finish together).
+
+    Returns:
+        True if every page is present and the result was stored
+    """
+    if history.status == TaskStatus.COMPLETED:
+        return True
+    ocr_results = _load_pages(db, history.id)
+    if len(ocr_results) < (history.total_pages or 0):
+        return False
+
+    from datetime import datetime
+    history.ocr_result = json.dumps(ocr_results)
+    history.current_page = len(ocr_results)
+    history.status = TaskStatus.COMPLETED
+    history.progress_message = "全部完成"
+    history.completed_at = datetime.utcnow()
+    db.commit()
+    logger.info(f"PDF {history.id} 全部 {len(ocr_results)} 页完成，结果已合并")
+    return True
+
+
+@job_handler(OCR_PAGES_JOB)
+async def run_ocr_pages_job(job: Job):
+    """Worker entry point for one page range of a split PDF"""
+    payload = json.loads(job.payload)
+    first_page, last_page = payload["first_page"], payload["last_page"]
+    page_count = last_page - first_page + 1
+
+    deadline = Deadline.for_items(
+        page_count, settings.JOB_DEADLINE_BASE_SECONDS, settings.OCR_JOB_DEADLINE_PER_PAGE,
+        f"OCR job {job.history_id} pages {first_page}-{last_page}"
+    )
+    budget = RetryBudget.for_items(page_count, settings.RETRY_JOB_BUDGET_RATIO, settings.RETRY_JOB_BUDGET_MIN)
+    with use_retry_budget(budget), use_deadline(deadline):
+        await _process_ocr_range(job.history_id, job.user_id, first_page, last_page)
+
+
+async def _process_ocr_range(history_id: int, user_id: int, first_page: int, last_page: int):
+    """
+    OCR one page range; errors propagate so the queue retries the range
+    (on any worker) and fails the document after JOB_MAX_ATTEMPTS
+    """
+    from ..database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        history = db.query(History).filter(History.id == history_id).first()
+        user = db.query(User).filter(User.id == user_id).first()
+        if not history or not user:
+            logger.error(f"History or user not found: history_id={history_id}, user_id={user_id}")
+            return
+        if history.status in (TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.PAUSED, TaskStatus.STOPPED):
+            logger.info(f"PDF {history_id} 已结束或暂停 ({history.status})，跳过第 {first_page}-{last_page} 页")
+            return
+
+        logger.info(f"=== OCR 页面范围任务: history_id={history_id}, 第 {first_page}-{last_page} 页 ===")
+        if history.status == TaskStatus.PENDING:
+            # Resumed documents wait in the queue as PENDING until a range runs
+            history.status = TaskStatus.PROCESSING
+            db.commit()
+        await job_control.register(OCR_JOB, history_id, reset=False)
+        ocr_service = get_user_ocr_service(user)
+        try:
+            await _ocr_pdf_pages(db, history, ocr_service, first_page, last_page)
+        except JobStopped as e:
+            _mark_interrupted(db, history, e)
+            return
+        if _assemble_ocr_result(db, history):
+            await job_control.unregister(OCR_JOB, history_id)
+    finally:
+        db.close()
+
+
+async def _process_ocr(history_id: int, user_id: int, job: Optional[Job] = None):
     from ..database import SessionLocal
 
     logger.info(f"=== Background OCR task STARTING ===")
     logger.info(f"history_id={history_id}, user_id={user_id}")
 
     db = SessionLocal()
+    history = None
     try:
         logger.info(f"Database session created")
 
@@ -44,6 +439,12 @@ async def process_ocr_background(history_id: int, user_id: int):
         logger.info(f"Found history: {history.id}, file_path: {history.file_path}")
         logger.info(f"Found user: {user.id}, username: {user.username}")
 
+        if history.status in (TaskStatus.PAUSED, TaskStatus.STOPPED):
+            logger.info(f"OCR 任务 {history_id} 已{'暂停' if history.status == TaskStatus.PAUSED else '停止'}，跳过")
+            return
+        # Keep pause/stop requests made while the job was being leased
+        await job_control.register(OCR_JOB, history_id, reset=False)
+
         # Update status
         history.status = TaskStatus.PROCESSING
         db.commit()
@@ -69,12 +470,7 @@ async def process_ocr_background(history_id: int, user_id: int):
                 history.progress_message = "正在处理图片..."
                 db.commit()
 
-                result = await ocr_service.ocr_single_image(file_path)
-                ocr_results = [{
-                    "page_number": 1,
-                    "text": result["text"],
-                    "confidence": result.get("confidence")
-                }]
+                ocr_results = [await _read_single_page(db, history, ocr_service)]
 
                 history.current_page = 1
                 history.progress_message = "处理完成"
@@ -83,13 +479,16 @@ async def process_ocr_background(history_id: int, user_id: int):
             elif file_ext == '.pdf':
                 # PDF processing
                 logger.info(f"Processing PDF: {file_path}")
-                from pdf2image import convert_from_path
                 from pypdf import PdfReader
 
                 # Get page count
                 pdf_reader = PdfReader(file_path)
                 total_pages = len(pdf_reader.pages)
                 logger.info(f"PDF has {total_pages} pages")
+                current_retry_budget().grow_for_items(total_pages, settings.RETRY_JOB_BUDGET_RATIO)
+                current_deadline().grow_for_items(
+                    total_pages, settings.JOB_DEADLINE_BASE_SECONDS, settings.OCR_JOB_DEADLINE_PER_PAGE
+                )
 
                 # Initialize progress
                 history.total_pages = total_pages
@@ -98,86 +497,13 @@ async def process_ocr_background(history_id: int, user_id: int):
                 db.commit()
                 logger.info(f"进度初始化完成: 总页数={total_pages}")
 
-                convert_kwargs = {
-                    'dpi': 150,
-                    'fmt': 'png',
-                    'thread_count': 1,
-                }
-                if settings.POPPLER_PATH:
-                    convert_kwargs['poppler_path'] = settings.POPPLER_PATH
-                    logger.info(f"使用 Poppler 路径: {settings.POPPLER_PATH}")
-
-                temp_dir = Path(file_path).parent / f"temp_{history_id}"
-                temp_dir.mkdir(exist_ok=True)
-                logger.info(f"临时目录创建: {temp_dir}")
-
-                try:
-                    for page_num in range(1, total_pages + 1):
-                        logger.info("=" * 60)
-                        logger.info(f"开始处理第 {page_num}/{total_pages} 页")
-                        logger.info("=" * 60)
-
-                        # Update progress
-                        history.current_page = page_num
-                        history.progress_message = f"正在处理第 {page_num} 页，共 {total_pages} 页"
-                        db.commit()
-                        logger.info(f"进度更新: {page_num}/{total_pages}")
-
-                        # Convert single page
-                        logger.info(f"正在转换 PDF 第 {page_num} 页为图片...")
-                        import time
-                        convert_start = time.time()
-
-                        images = convert_from_path(
-                            file_path,
-                            first_page=page_num,
-                            last_page=page_num,
-                            **convert_kwargs
-                        )
-
-                        convert_time = time.time() - convert_start
-                        logger.info(f"PDF 转换完成，耗时 {convert_time:.2f} 秒")
-
-                        if not images:
-                            logger.warning(f"第 {page_num} 页转换失败，跳过")
-                            continue
-
-                        image = images[0]
-                        temp_image_path = temp_dir / f"page_{page_num}.png"
-
-                        save_start = time.time()
-                        image.save(temp_image_path, 'PNG', optimize=True)
-                        save_time = time.time() - save_start
-
-                        image_size = temp_image_path.stat().st_size
-                        logger.info(f"图片保存完成: {temp_image_path}")
-                        logger.info(f"图片大小: {image_size/1024:.2f} KB，保存耗时 {save_time:.2f} 秒")
-
-                        # OCR the page
-                        logger.info(f"开始 OCR 识别第 {page_num} 页...")
-                        ocr_start = time.time()
-
-                        result = await ocr_service.ocr_single_image(str(temp_image_path))
-
-                        ocr_time = time.time() - ocr_start
-                        logger.info(f"OCR 识别完成，耗时 {ocr_time:.2f} 秒")
-
-                        ocr_results.append({
-                            "page_number": page_num,
-                            "text": result["text"],
-                            "confidence": result.get("confidence")
-                        })
-
-                        logger.info(f"第 {page_num} 页处理完成，识别文本长度: {len(result['text'])} 字符")
-
-                        # Clean up
-                        temp_image_path.unlink()
-                        logger.info(f"临时文件清理完成")
-                        del image, images
-
-                finally:
-                    if temp_dir.exists():
-                        shutil.rmtree(temp_dir, ignore_errors=True)
+                if settings.OCR_PAGE_RANGE_SIZE and total_pages > settings.OCR_PAGE_RANGE_SIZE:
+                    # Large document: split into page ranges any worker can lease
+                    _enqueue_page_ranges(db, history, list(range(1, total_pages + 1)))
+                    return
+
+                await _ocr_pdf_pages(db, history, ocr_service, 1, total_pages)
+                ocr_results = _load_pages(db, history_id)
 
             elif file_ext in ['.txt', '.md']:
                 # Text file
@@ -187,13 +513,7 @@ async def process_ocr_background(history_id: int, user_id: int):
                 history.progress_message = "正在读取文本文件..."
                 db.commit()
 
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    text = f.read()
-                ocr_results = [{
-                    "page_number": 1,
-                    "text": text,
-                    "confidence": 1.0
-                }]
+                ocr_results = [await _read_single_page(db, history, ocr_service)]
 
                 history.current_page = 1
                 history.progress_message = "处理完成"
@@ -207,14 +527,7 @@ async def process_ocr_background(history_id: int, user_id: int):
                 history.progress_message = "正在读取 Word 文档..."
                 db.commit()
 
-                from docx import Document
-                doc = Document(file_path)
-                text = "\n".join([para.text for para in doc.paragraphs])
-                ocr_results = [{
-                    "page_number": 1,
-                    "text": text,
-                    "confidence": 1.0
-                }]
+                ocr_results = [await _read_single_page(db, history, ocr_service)]
 
                 history.current_page = 1
                 history.progress_message = "处理完成"
@@ -229,19 +542,16 @@ async def process_ocr_background(history_id: int, user_id: int):
             db.commit()
 
             logger.info(f"Background OCR task completed for history_id={history_id}")
+            await job_control.unregister(OCR_JOB, history_id)
 
-        except Exception as e:
-            logger.error(f"Background OCR task failed: {str(e)}", exc_info=True)
-            import traceback
-            logger.error(f"Full traceback:\n{traceback.format_exc()}")
-            history.status = TaskStatus.FAILED
-            history.error_message = str(e)
-            db.commit()
+        except JobStopped as e:
+            _mark_interrupted(db, history, e)
 
     except Exception as e:
-        logger.error(f"Fatal error in background task: {str(e)}", exc_info=True)
-        import traceback
-        logger.error(f"Full traceback:\n{traceback.format_exc()}")
+        logger.error(f"Background OCR task failed: {str(e)}", exc_info=True)
+        if history is not None:
+            _mark_failed(db, history, job, e)
+        raise
     finally:
         db.close()
         logger.info(f"=== Background OCR task ended for history_id={history_id} ===")
@@ -258,7 +568,19 @@ def get_user_ocr_service(user: User) -> OCRService:
     api_base = user.ocr_api_base or "https://api.siliconflow.cn/v1"
     model = user.ocr_model or "deepseek-ai/deepseek-vl2"
 
-    return OCRService(api_base, api_key, model)
+    return OCRService(api_base, api_key, model, rate_limits=user_rate_limits(user, "ocr"))
+
+
+def count_pages(file_path: str) -> int:
+    """Page count of an uploaded file (1 for anything but a readable PDF)"""
+    if Path(file_path).suffix.lower() != ".pdf":
+        return 1
+    try:
+        from pypdf import PdfReader
+        return len(PdfReader(file_path).pages)
+    except Exception as e:
+        logger.warning(f"Could not count PDF pages of {file_path}: {str(e)}")
+        return 1
 
 
 async def save_upload_file(upload_file: UploadFile, user_id: int) -> str:
@@ -280,185 +602,72 @@ async def save_upload_file(upload_file: UploadFile, user_id: int) -> str:
     return str(file_path)
 
 
-async def ocr_progress_stream(
-    history_id: int,
-    file_path: str,
-    ocr_service: OCRService,
-    db: Session
-) -> AsyncGenerator[str, None]:
-    """Stream OCR progress using SSE"""
-    try:
-        history = db.query(History).filter(History.id == history_id).first()
-        history.status = TaskStatus.PROCESSING
-        db.commit()
-
-        # Determine file type and process
-        file_ext = Path(file_path).suffix.lower()
-
-        if file_ext in ['.png', '.jpg', '.jpeg', '.bmp', '.gif']:
-            # Single image
-            yield f"data: {json.dumps({'type': 'progress', 'message': 'Processing image...', 'page': 1})}\n\n"
-
-            result = await ocr_service.ocr_single_image(file_path)
-
-            ocr_results = [{
-                "page_number": 1,
-                "text": result["text"],
-                "confidence": result.get("confidence")
-            }]
-
-        elif file_ext == '.pdf':
-            # PDF - convert to images and OCR each page
-            yield f"data: {json.dumps({'type': 'progress', 'message': 'Converting PDF to images...'})}\n\n"
-
-            try:
-                from pdf2image import convert_from_path
-                from pdf2image.exceptions import PDFInfoNotInstalledError, PDFPageCountError
-            except ImportError:
-                raise HTTPException(
-                    status_code=500,
-                    detail="pdf2image library not installed. Please run: pip install pdf2image"
-                )
+async def ocr_progress_stream(history_id: int) -> AsyncGenerator[str, None]:
+    """Stream a queued OCR job's progress using SSE until it completes, fails or is interrupted"""
+    from ..database import SessionLocal
 
-            # Convert PDF to images with lower DPI to reduce memory usage
-            convert_kwargs = {
-                'dpi': 150,  # Reduced from 200 to save memory
-                'fmt': 'png',
-                'thread_count': 1,  # Single thread to avoid memory issues
+    # Own session: the request's is closed before the stream ends
+    db = SessionLocal()
+    last_event = None
+    try:
+        while True:
+            db.expire_all()
+            history = db.query(History).filter(History.id == history_id).first()
+            if history is None:
+                yield f"data: {json.dumps({'type': 'error', 'message': 'History not found'})}\n\n"
+                return
+
+            if history.status == TaskStatus.COMPLETED:
+                results = json.loads(history.ocr_result or "[]")
+                yield f"data: {json.dumps({'type': 'complete', 'results': results})}\n\n"
+                return
+            if history.status == TaskStatus.FAILED:
+                yield f"data: {json.dumps({'type': 'error', 'message': history.error_message})}\n\n"
+                return
+            if history.status in (TaskStatus.PAUSED, TaskStatus.STOPPED):
+                event = {'type': history.status.value, 'message': history.progress_message}
+                yield f"data: {json.dumps(event)}\n\n"
+                return
+
+            event = {
+                'type': 'progress',
+                'status': history.status.value,
+                'message': history.progress_message,
+                'page': history.current_page or 0,
+                'total': history.total_pages or 0,
             }
-            if settings.POPPLER_PATH:
-                convert_kwargs['poppler_path'] = settings.POPPLER_PATH
-
-            ocr_results = []
-            temp_dir = Path(file_path).parent / f"temp_{history_id}"
-            temp_dir.mkdir(exist_ok=True)
-
-            try:
-                # Process PDF page by page instead of loading all at once
-                # First, get page count
-                from pypdf import PdfReader
-                pdf_reader = PdfReader(file_path)
-                total_pages = len(pdf_reader.pages)
-
-                yield f"data: {json.dumps({'type': 'progress', 'message': f'Found {total_pages} pages, starting OCR...'})}\n\n"
-
-                # Process each page individually to save memory
-                for page_num in range(1, total_pages + 1):
-                    yield f"data: {json.dumps({'type': 'progress', 'message': f'Converting page {page_num}/{total_pages}...', 'page': page_num})}\n\n"
-
-                    # Convert single page at a time
-                    images = convert_from_path(
-                        file_path,
-                        first_page=page_num,
-                        last_page=page_num,
-                        **convert_kwargs
-                    )
-
-                    if not images:
-                        continue
-
-                    image = images[0]
-
-                    # Save temporary image
-                    temp_image_path = temp_dir / f"page_{page_num}.png"
-                    image.save(temp_image_path, 'PNG', optimize=True)
-
-                    yield f"data: {json.dumps({'type': 'progress', 'message': f'OCR processing page {page_num}/{total_pages}...', 'page': page_num})}\n\n"
-
-                    # OCR the page
-                    result = await ocr_service.ocr_single_image(str(temp_image_path))
-
-                    ocr_results.append({
-                        "page_number": page_num,
-                        "text": result["text"],
-                        "confidence": result.get("confidence")
-                    })
-
-                    # Clean up temp image immediately
-                    temp_image_path.unlink()
-
-                    # Clear the image from memory
-                    del image
-                    del images
-
-            except PDFInfoNotInstalledError:
-                raise HTTPException(
-                    status_code=500,
-                    detail="Poppler not found. Please install poppler or set POPPLER_PATH in .env file. "
-                           "See setup_poppler.bat for installation instructions."
-                )
-            except Exception as e:
-                error_msg = str(e)
-                logger.error(f"PDF processing error: {error_msg}")
-                if 'poppler' in error_msg.lower():
-                    raise HTTPException(
-                        status_code=500,
-                        detail="Poppler not found. Please install poppler or set POPPLER_PATH in .env file. "
-                               "See setup_poppler.bat for installation instructions."
-                    )
-                raise HTTPException(
-                    status_code=500,
-                    detail=f"PDF processing failed: {error_msg}"
-                )
-            finally:
-                # Clean up temp directory
-                if temp_dir.exists():
-                    shutil.rmtree(temp_dir, ignore_errors=True)
-
-        elif file_ext in ['.txt', '.md']:
-            # Text file - just read content
-            with open(file_path, 'r', encoding='utf-8') as f:
-                text = f.read()
-
-            ocr_results = [{
-                "page_number": 1,
-                "text": text,
-                "confidence": 1.0
-            }]
-
-        elif file_ext in ['.docx', '.doc']:
-            # Word document
-            from docx import Document
-            doc = Document(file_path)
-            text = "\n".join([para.text for para in doc.paragraphs])
-
-            ocr_results = [{
-                "page_number": 1,
-                "text": text,
-                "confidence": 1.0
-            }]
-
-        else:
-            raise HTTPException(status_code=400, detail=f"Unsupported file type: {file_ext}")
-
-        # Save results to database
-        history.ocr_result = json.dumps(ocr_results)
-        history.status = TaskStatus.COMPLETED
-        history.completed_at = db.query(History).filter(History.id == history_id).first().created_at
-        db.commit()
-
-        # Send completion message
-        yield f"data: {json.dumps({'type': 'complete', 'results': ocr_results})}\n\n"
-
-    except Exception as e:
-        history = db.query(History).filter(History.id == history_id).first()
-        history.status = TaskStatus.FAILED
-        history.error_message = str(e)
-        db.commit()
-
-        yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
+            if history.status == TaskStatus.PROCESSING:
+                live = await live_progress(history_id)
+                event['message'] = live.get('progress_message', event['message'])
+                event['page'] = live.get('current_page', event['page']) or 0
+                event['total'] = live.get('total_pages', event['total']) or 0
+            else:
+                # Waiting for a worker: where in the queue, and roughly how long
+                event.update(job_queue.queue_info(db, history_id))
+            if event != last_event:
+                yield f"data: {json.dumps(event)}\n\n"
+                last_event = event
+
+            await asyncio.sleep(settings.PROGRESS_LIVE_SECONDS)
+    finally:
+        db.close()
 
 
 @router.post("/upload", response_model=dict)
 async def upload_file_for_ocr(
-    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     source_language: Optional[str] = Form("auto"),
     auto_process: bool = Form(True),
+    target_language: Optional[str] = Form(None),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Upload a file for OCR processing"""
+    """
+    Upload a file for OCR processing
+
+    With target_language, OCR and translation run as one job: each page is
+    translated as soon as it is recognized (see /translate/progress).
+    """
     # Validate file size
     file.file.seek(0, 2)  # Seek to end
     file_size = file.file.tell()
@@ -467,39 +676,184 @@ async def upload_file_for_ocr(
     if file_size > settings.MAX_FILE_SIZE_MB * 1024 * 1024:
         raise HTTPException(status_code=400, detail=f"File too large. Max size: {settings.MAX_FILE_SIZE_MB}MB")
 
+    pipeline = bool(target_language and auto_process)
+    if pipeline and not current_user.translate_api_key:
+        raise HTTPException(status_code=400, detail="Translation API key not configured")
+    kind = PIPELINE_JOB if pipeline else OCR_JOB
+
     # Save file
     file_path = await save_upload_file(file, current_user.id)
 
-    # Create history entry
-    history = History(
-        user_id=current_user.id,
-        task_type=TaskType.OCR,
-        status=TaskStatus.PENDING,
-        original_filename=file.filename,
-        file_path=file_path,
-        file_size=file_size,
-        source_language=source_language
-    )
-
-    db.add(history)
-    db.commit()
-    db.refresh(history)
-
-    # If auto_process is True, start background task
-    if auto_process:
-        logger.info(f"Starting background OCR task for history_id={history.id}")
-        background_tasks.add_task(
-            process_ocr_background,
-            history.id,
-            current_user.id
+    def create_history() -> History:
+        history = History(
+            user_id=current_user.id,
+            task_type=TaskType.OCR_TRANSLATE if pipeline else TaskType.OCR,
+            status=TaskStatus.PENDING,
+            original_filename=file.filename,
+            file_path=file_path,
+            file_size=file_size,
+            source_language=source_language,
+            target_language=target_language if pipeline else None
         )
+        db.add(history)
+        db.commit()
+        db.refresh(history)
+        return history
+
+    admitted = None
+    if not auto_process:
+        history = create_history()
+    else:
+        pages = count_pages(file_path)
+        # Translating a page costs roughly as much as recognizing it
+        tokens = estimate_job_tokens(pages=pages) * (2 if pipeline else 1)
+        async with admission.lock():
+            # Refuse (429) before creating anything if the queue cannot take the job
+            try:
+                admitted = admission.admit(db, current_user.id, kind, pages, tokens)
+            except HTTPException:
+                os.remove(file_path)
+                raise
+
+            history = create_history()
+
+            # Queue the OCR job for a worker
+            logger.info(f"Queueing {kind} job for history_id={history.id}")
+            history.progress_message = "系统繁忙，稍后处理..." if admitted.defer_seconds else "排队中..."
+            payload = None
+            if pipeline:
+                payload = {"source_language": source_language or "auto", "target_language": target_language}
+            job_queue.enqueue(
+                db, kind, user_id=current_user.id, history_id=history.id, payload=payload,
+                cost=pages, tokens=tokens, delay_seconds=admitted.defer_seconds
+            )
 
-    return {
+    response = {
         "message": "File uploaded successfully",
         "history_id": history.id,
         "filename": file.filename,
-        "auto_process": auto_process
+        "auto_process": auto_process,
+        "translate": pipeline
     }
+    if admitted is not None:
+        response.update(admitted.hint())
+        response["deferred_seconds"] = admitted.defer_seconds
+    return response
+
+
+def _get_user_history(db: Session, history_id: int, user: User) -> History:
+    history = db.query(History).filter(
+        History.id == history_id,
+        History.user_id == user.id
+    ).first()
+    if not history:
+        raise HTTPException(status_code=404, detail="History not found")
+    if history.task_type == TaskType.OCR_TRANSLATE:
+        # OCR of a combined job follows the translation controls
+        raise HTTPException(status_code=400, detail="Use the translation controls for this task")
+    return history
+
+
+async def _interrupt_ocr(db: Session, history: History, status: TaskStatus, **flags) -> int:
+    """Signal running jobs of a document and drop its queued ones"""
+    if history.status not in (TaskStatus.PENDING, TaskStatus.PROCESSING, TaskStatus.PAUSED):
+        raise HTTPException(status_code=400, detail="OCR task not running")
+
+    # Stored even if no worker runs the job yet, so one leasing it now sees it
+    await job_control.signal(OCR_JOB, history.id, create=True, **flags)
+    cancelled = sum(job_queue.cancel(db, history.id, kind) for kind in (OCR_JOB, OCR_PAGES_JOB))
+
+    if history.total_pages and Path(history.file_path).suffix.lower() == ".pdf":
+        history.current_page = db.query(OCRPage).filter(OCRPage.history_id == history.id).count()
+    history.status = status
+    action = "已暂停" if status == TaskStatus.PAUSED else "已停止"
+    history.progress_message = f"{action}，已完成 {history.current_page or 0}/{history.total_pages or 0} 页"
+    db.commit()
+    return cancelled
+
+
+@router.post("/pause/{history_id}")
+async def pause_ocr(
+    history_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Pause an OCR task after the pages in progress; finished pages are kept"""
+    history = _get_user_history(db, history_id, current_user)
+    cancelled = await _interrupt_ocr(db, history, TaskStatus.PAUSED, paused=True)
+    logger.info(f"OCR 任务 {history_id} 已暂停 (取消 {cancelled} 个排队任务)")
+    return {"message": "OCR paused", "task_id": history_id, "pages_done": history.current_page}
+
+
+@router.post("/stop/{history_id}")
+async def stop_ocr(
+    history_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Stop an OCR task now, cancelling requests in flight; finished pages are kept"""
+    history = _get_user_history(db, history_id, current_user)
+    cancelled = await _interrupt_ocr(db, history, TaskStatus.STOPPED, stopped=True, paused=False)
+    logger.info(f"OCR 任务 {history_id} 已停止 (取消 {cancelled} 个排队任务)")
+    return {"message": "OCR stopped", "task_id": history_id, "pages_done": history.current_page}
+
+
+@router.post("/resume/{history_id}")
+async def resume_ocr(
+    history_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Resume a paused or stopped OCR task at its first unfinished page"""
+    history = _get_user_history(db, history_id, current_user)
+    if history.status not in (TaskStatus.PAUSED, TaskStatus.STOPPED):
+        raise HTTPException(status_code=400, detail="OCR task cannot be resumed")
+
+    missing = None
+    if history.total_pages and Path(history.file_path).suffix.lower() == ".pdf":
+        done = {
+            page_number for (page_number,) in
+            db.query(OCRPage.page_number).filter(OCRPage.history_id == history_id)
+        }
+        missing = [page for page in range(1, history.total_pages + 1) if page not in done]
+        if not missing:
+            await job_control.signal(OCR_JOB, history_id, create=True, paused=False, stopped=False)
+            history.status = TaskStatus.PROCESSING
+            _assemble_ocr_result(db, history)
+            return {"message": "OCR already complete", "task_id": history_id}
+        pages = len(missing)
+    else:
+        # Page count not known yet (paused while queued) or a single-page file: start over
+        pages = count_pages(history.file_path)
+    kind = OCR_PAGES_JOB if missing else OCR_JOB
+    tokens = estimate_job_tokens(pages=pages)
+
+    async with admission.lock():
+        # A second resume of the same document sees it already queued
+        db.refresh(history)
+        if history.status not in (TaskStatus.PAUSED, TaskStatus.STOPPED):
+            raise HTTPException(status_code=400, detail="OCR task cannot be resumed")
+        # Refuse (429) like a new upload; the task then stays paused/stopped
+        admitted = admission.admit(db, current_user.id, kind, pages, tokens)
+        await job_control.signal(OCR_JOB, history_id, create=True, paused=False, stopped=False)
+
+        # PENDING until a worker leases the job, so the queue position is shown
+        history.status = TaskStatus.PENDING
+        if missing:
+            _enqueue_page_ranges(db, history, missing, delay_seconds=admitted.defer_seconds)
+        else:
+            job_queue.enqueue(
+                db, OCR_JOB, user_id=current_user.id, history_id=history_id,
+                cost=pages, tokens=tokens, delay_seconds=admitted.defer_seconds
+            )
+        history.progress_message = "系统繁忙，稍后处理..." if admitted.defer_seconds else "排队中..."
+        db.commit()
+
+    if missing:
+        logger.info(f"OCR 任务 {history_id} 从第 {missing[0]} 页继续，剩余 {len(missing)} 页")
+        return {"message": f"OCR resumed from page {missing[0]}", "task_id": history_id, **admitted.hint()}
+    logger.info(f"OCR 任务 {history_id} 重新入队")
+    return {"message": "OCR resumed", "task_id": history_id, **admitted.hint()}
 
 
 @router.get("/process/{history_id}")
@@ -508,7 +862,13 @@ async def process_ocr_stream(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Process OCR with SSE progress updates"""
+    """
+    Queue OCR for an uploaded file and stream its progress with SSE
+
+    The work runs on a job worker like any other OCR job (admission control,
+    fair scheduling, pause/stop); a file that is already queued or running,
+    or was paused, stopped or failed, is only watched.
+    """
     # Get history entry
     history = db.query(History).filter(
         History.id == history_id,
@@ -522,12 +882,37 @@ async def process_ocr_stream(
         # Already processed, return cached result
         return {"status": "completed", "results": json.loads(history.ocr_result)}
 
-    # Get OCR service
-    ocr_service = get_user_ocr_service(current_user)
+    def has_active_job() -> bool:
+        return db.query(Job.id).filter(
+            Job.history_id == history_id,
+            Job.status.in_([JobStatus.QUEUED, JobStatus.RUNNING])
+        ).first() is not None
+
+    # Paused, stopped and failed documents only get their terminal event;
+    # restarting them is /ocr/resume's job
+    startable = history.status in (TaskStatus.PENDING, TaskStatus.PROCESSING)
+    if startable and history.task_type == TaskType.OCR and not has_active_job():
+        # Fails early (400) without an OCR API key
+        get_user_ocr_service(current_user)
+        pages = count_pages(history.file_path)
+        tokens = estimate_job_tokens(pages=pages)
+        async with admission.lock():
+            # Checked again under the lock so two requests cannot both enqueue
+            db.refresh(history)
+            if history.status in (TaskStatus.PENDING, TaskStatus.PROCESSING) and not has_active_job():
+                admitted = admission.admit(db, current_user.id, OCR_JOB, pages, tokens)
+                await job_control.signal(OCR_JOB, history_id, create=True, paused=False, stopped=False)
+                history.status = TaskStatus.PENDING
+                history.error_message = None
+                history.progress_message = "系统繁忙，稍后处理..." if admitted.defer_seconds else "排队中..."
+                job_queue.enqueue(
+                    db, OCR_JOB, user_id=current_user.id, history_id=history_id,
+                    cost=pages, tokens=tokens, delay_seconds=admitted.defer_seconds
+                )
 
     # Return SSE stream
     return StreamingResponse(
-        ocr_progress_stream(history_id, history.file_path, ocr_service, db),
+        ocr_progress_stream(history_id),
         media_type="text/event-stream"
     )
 
@@ -564,7 +949,7 @@ def get_ocr_result(
 
 
 @router.get("/status/{history_id}")
-def get_ocr_status(
+async def get_ocr_status(
     history_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -586,6 +971,10 @@ def get_ocr_status(
         "completed_at": history.completed_at.isoformat() if history.completed_at else None,
     }
 
+    if history.status == TaskStatus.PENDING:
+        # Waiting for a worker: where in the queue, and roughly how long
+        response.update(job_queue.queue_info(db, history.id))
+
     if history.status == TaskStatus.COMPLETED and history.ocr_result:
         ocr_results = json.loads(history.ocr_result)
         response["total_pages"] = len(ocr_results)
@@ -594,6 +983,15 @@ def get_ocr_status(
         response["error_message"] = history.error_message
         response["has_result"] = False
     else:
+        response["current_page"] = history.current_page or 0
+        response["total_pages"] = history.total_pages or 0
+        response["progress_message"] = history.progress_message
         response["has_result"] = False
+        if history.status == TaskStatus.PROCESSING:
+            # Ahead of the last database flush
+            live = await live_progress(history.id)
+            response["current_page"] = live.get("current_page", response["current_page"]) or 0
+            response["total_pages"] = live.get("total_pages", response["total_pages"]) or 0
+            response["progress_message"] = live.get("progress_message", response["progress_message"])
 
     return response
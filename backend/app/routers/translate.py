@@ -1,25 +1,41 @@
 import json
 import logging
 import asyncio
-import re
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+import time
+from pathlib import Path
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import Iterable, List, Optional, Union
 from datetime import datetime
 
 from ..database import get_db
-from ..models import User, History, TaskStatus, TaskType
+from ..models import User, History, Job, JobStatus, TaskStatus, TaskType
 from ..schemas import TranslationRequest, TranslationResponse, SentencePair, TaskStatusResponse
 from ..services import TranslationService
+from ..services.admission import admission, estimate_job_tokens
+from ..services.job_queue import job_error_retryable, job_handler, job_queue
+from ..services.progress import ProgressReporter, live_progress
+from ..services.segmentation import load_segmentation, segment_history, segment_text, store_segmentation
 from ..config import settings
-from ..utils import EncryptionManager
+from ..utils import (
+    EncryptionManager,
+    RetryBudget,
+    SentenceSplitter,
+    StreamingSentenceSplitter,
+    use_retry_budget,
+    current_retry_budget,
+)
+from ..utils.coordination import JobStopped, job_control
+from ..utils.circuit_breaker import CircuitOpenError, park_while_open
+from ..utils.deadline import Deadline, current_deadline, run_with_deadline, use_deadline
 from .auth import get_current_user
+from .ocr import PIPELINE_JOB, _load_pages, _ocr_pdf_pages, _read_single_page, count_pages, get_user_ocr_service
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/translate", tags=["translation"])
 
-# 存储翻译任务的暂停状态（内存中，生产环境可以用 Redis）
-translation_task_states = {}
+# 翻译任务的暂停/停止信号保存在协调后端中（多进程部署时各 worker 共享）
+JOB_KIND = "translate"
 
 
 def get_user_translation_service(user: User, db: Session) -> TranslationService:
@@ -36,6 +52,256 @@ def get_user_translation_service(user: User, db: Session) -> TranslationService:
     return TranslationService(api_base, api_key, model, db, user)
 
 
+def _translate_config(user: User):
+    """(api_base, api_key, model) of a user's translation provider, for workers"""
+    if not user.translate_api_key:
+        raise RuntimeError("Translation API key not configured")
+
+    api_key = EncryptionManager.decrypt_api_key(
+        user.translate_api_key, user.id, settings.SECRET_KEY
+    )
+    api_base = user.translate_api_base or "https://api.openai.com/v1"
+    model = user.translate_model or "gpt-4"
+    return api_base, api_key, model
+
+
+def _resume_index(job: Job, history: History, start_index: int) -> int:
+    """A retried job continues after the sentences it already saved"""
+    if job.attempts > 1 and history.translation_result:
+        try:
+            start_index = max(start_index, len(json.loads(history.translation_result)))
+        except json.JSONDecodeError:
+            pass
+    return start_index
+
+
+class _SentenceFeed:
+    """
+    Sentences to translate, in order
+
+    A pipeline job appends them while OCR is still running; the translation
+    loop waits for the next one and ends once the feed is closed.
+    """
+
+    def __init__(self, sentences: Optional[List[str]] = None):
+        self.sentences: List[str] = list(sentences or [])
+        self.closed = sentences is not None
+        self.error: Optional[BaseException] = None
+        self.pages_done = 0
+        self.page_count = 0
+        self._changed = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self.sentences)
+
+    def extend(self, sentences: Iterable[str]):
+        self.sentences.extend(sentences)
+        self._changed.set()
+
+    def close(self, error: Optional[BaseException] = None):
+        """No more sentences; `error` (if any) is raised to the waiting loop"""
+        self.closed = True
+        self.error = error
+        self._changed.set()
+
+    def wake(self):
+        """Let the waiting loop pass its pause/stop checkpoint"""
+        self._changed.set()
+
+    async def wait(self, index: int):
+        """Wait until sentence `index` exists, the feed ends, or wake() is called"""
+        if self.error is None and index >= len(self.sentences) and not self.closed:
+            self._changed.clear()
+            await self._changed.wait()
+        if self.error is not None:
+            raise self.error
+
+
+@job_handler(JOB_KIND)
+async def run_translate_job(job: Job):
+    """Worker entry point for a queued translation job"""
+    from ..database import SessionLocal
+
+    payload = json.loads(job.payload)
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.id == job.user_id).first()
+        history = db.query(History).filter(History.id == job.history_id).first()
+        if not user or not history:
+            raise RuntimeError(f"History or user not found: history_id={job.history_id}, user_id={job.user_id}")
+        api_base, api_key, model = _translate_config(user)
+        start_index = _resume_index(job, history, payload.get("start_index", 0))
+
+        # Split once when the job was created (jobs queued before that carry their own copy)
+        sentences = payload.get("sentences")
+        if sentences is None:
+            segmentation = load_segmentation(history)
+            if segmentation is None:
+                raise RuntimeError(f"No sentences stored for history_id={job.history_id}")
+            sentences = [sentence["text"] for sentence in segmentation]
+    finally:
+        db.close()
+
+    await background_translate_task(
+        history_id=job.history_id,
+        sentences=sentences,
+        source_language=payload["source_language"],
+        target_language=payload["target_language"],
+        user_id=job.user_id,
+        api_base=api_base,
+        api_key=api_key,
+        model=model,
+        start_index=start_index,
+        job=job
+    )
+
+
+@job_handler(PIPELINE_JOB)
+async def run_pipeline_job(job: Job):
+    """Worker entry point for a combined OCR + translation job"""
+    from ..database import SessionLocal
+
+    payload = json.loads(job.payload)
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.id == job.user_id).first()
+        history = db.query(History).filter(History.id == job.history_id).first()
+        if not user or not history:
+            raise RuntimeError(f"History or user not found: history_id={job.history_id}, user_id={job.user_id}")
+        api_base, api_key, model = _translate_config(user)
+        start_index = _resume_index(job, history, payload.get("start_index", 0))
+    finally:
+        db.close()
+
+    # Both grow as pages and sentences become known
+    job_deadline = Deadline.for_items(
+        1, settings.JOB_DEADLINE_BASE_SECONDS, settings.OCR_JOB_DEADLINE_PER_PAGE,
+        f"OCR + translation job {job.history_id}"
+    )
+    with use_retry_budget(RetryBudget(settings.RETRY_JOB_BUDGET_MIN)), use_deadline(job_deadline):
+        await _ocr_translate_task(
+            history_id=job.history_id,
+            source_language=payload["source_language"],
+            target_language=payload["target_language"],
+            user_id=job.user_id,
+            api_base=api_base,
+            api_key=api_key,
+            model=model,
+            start_index=start_index,
+            job=job
+        )
+
+
+async def _ocr_translate_task(
+    history_id: int,
+    source_language: str,
+    target_language: str,
+    user_id: int,
+    api_base: str,
+    api_key: str,
+    model: str,
+    start_index: int = 0,
+    job: Optional[Job] = None
+):
+    """
+    OCR and translate a document in one job
+
+    OCR runs page by page in a producer task; each page is segmented as soon
+    as it is recognized (a sentence running onto the next page is held until
+    that page arrives) and its sentences are translated while later pages are
+    still being recognized. Pause/stop use the translation controls for both.
+    """
+    feed = _SentenceFeed()
+    producer = asyncio.create_task(_ocr_into_feed(history_id, user_id, source_language, feed))
+    try:
+        await _translate_sentences_task(
+            history_id, feed, source_language, target_language,
+            user_id, api_base, api_key, model, start_index, job
+        )
+    finally:
+        if not producer.done():
+            producer.cancel()
+        await asyncio.gather(producer, return_exceptions=True)
+
+
+async def _ocr_into_feed(history_id: int, user_id: int, source_language: str, feed: _SentenceFeed):
+    """Pipeline producer: OCR the document into `feed`; errors end the feed"""
+    from ..database import SessionLocal
+
+    db = SessionLocal()
+    splitter: Optional[StreamingSentenceSplitter] = None
+    segmentation = []
+
+    def add_sentences(sentences):
+        segmentation.extend(sentences)
+        feed.extend(sentence["text"] for sentence in sentences)
+
+    def on_page(page_number: int, text: str):
+        nonlocal splitter
+        if splitter is None and text.strip():
+            language = source_language
+            if language == "auto":
+                # Fixed by the first page with text, so sentences never change later
+                language = SentenceSplitter.detect_language(text)
+            splitter = StreamingSentenceSplitter(language)
+        feed.pages_done += 1
+        add_sentences(splitter.add_page(page_number, text) if splitter is not None else [])
+        _grow_limits(feed)
+
+    try:
+        history = db.query(History).filter(History.id == history_id).first()
+        user = db.query(User).filter(User.id == user_id).first()
+        if not history or not user:
+            raise RuntimeError(f"History or user not found: history_id={history_id}, user_id={user_id}")
+        ocr_service = get_user_ocr_service(user)
+
+        if Path(history.file_path).suffix.lower() == ".pdf":
+            feed.page_count = count_pages(history.file_path)
+            _grow_limits(feed)
+            await _ocr_pdf_pages(
+                db, history, ocr_service, 1, feed.page_count,
+                on_page=on_page, control_kind=JOB_KIND, on_pause=feed.wake
+            )
+            pages = _load_pages(db, history_id)
+        else:
+            feed.page_count = 1
+            pages = [await _read_single_page(db, history, ocr_service, control_kind=JOB_KIND)]
+            on_page(1, pages[0]["text"])
+
+        if splitter is not None:
+            add_sentences(splitter.finish())
+        history.ocr_result = json.dumps(pages)
+        # Later resumes and retranslations reuse exactly these sentences
+        store_segmentation(history, segmentation, source_language)
+        db.commit()
+        logger.info(f"流水线 {history_id} OCR 完成，共 {len(pages)} 页，{len(feed)} 句")
+        feed.close()
+    except Exception as e:
+        if not isinstance(e, JobStopped):
+            logger.error(f"流水线 {history_id} OCR 失败: {str(e)}")
+        feed.close(e)
+    finally:
+        db.close()
+
+
+def _grow_limits(feed: _SentenceFeed):
+    """Size the pipeline's deadline and retry budget to the pages and sentences known so far"""
+    current_deadline().grow_for_items(
+        len(feed),
+        settings.JOB_DEADLINE_BASE_SECONDS + feed.page_count * settings.OCR_JOB_DEADLINE_PER_PAGE,
+        settings.TRANSLATE_JOB_DEADLINE_PER_SENTENCE
+    )
+    current_retry_budget().grow_for_items(feed.page_count + len(feed), settings.RETRY_JOB_BUDGET_RATIO)
+
+
+async def _mark_stopped(progress: ProgressReporter, done: int, total: int):
+    # Resume starts at current_page, the first sentence without a result
+    await progress.transition(
+        TaskStatus.STOPPED, current_page=done, progress_message=f"翻译已停止，完成 {done}/{total} 句"
+    )
+    logger.info(f"翻译任务 {progress.history.id} 已停止，完成 {done}/{total} 句")
+
+
 async def background_translate_task(
     history_id: int,
     sentences: list[str],
@@ -45,12 +311,50 @@ async def background_translate_task(
     api_base: str,
     api_key: str,
     model: str,
-    start_index: int = 0  # 从哪个句子开始
+    start_index: int = 0,  # 从哪个句子开始
+    job: Optional[Job] = None
 ):
     """Background task for translation with progress updates"""
+    budget = RetryBudget.for_items(
+        len(sentences) - start_index, settings.RETRY_JOB_BUDGET_RATIO, settings.RETRY_JOB_BUDGET_MIN
+    )
+    job_deadline = Deadline.for_items(
+        len(sentences) - start_index,
+        settings.JOB_DEADLINE_BASE_SECONDS,
+        settings.TRANSLATE_JOB_DEADLINE_PER_SENTENCE,
+        f"translation job {history_id}"
+    )
+    with use_retry_budget(budget), use_deadline(job_deadline):
+        await _translate_sentences_task(
+            history_id, sentences, source_language, target_language,
+            user_id, api_base, api_key, model, start_index, job
+        )
+
+
+async def _translate_sentences_task(
+    history_id: int,
+    sentences: Union[List[str], _SentenceFeed],
+    source_language: str,
+    target_language: str,
+    user_id: int,
+    api_base: str,
+    api_key: str,
+    model: str,
+    start_index: int,
+    job: Optional[Job] = None
+):
+    """
+    Translate sentences from start_index on
+
+    Errors are re-raised so the job queue retries the job (it continues after
+    the saved sentences); History is marked FAILED only when no retry follows.
+    """
     from ..database import SessionLocal
 
+    feed = sentences if isinstance(sentences, _SentenceFeed) else _SentenceFeed(sentences)
     db = SessionLocal()
+    history = None
+    progress = None
     try:
         # Get history and user
         history = db.query(History).filter(History.id == history_id).first()
@@ -60,18 +364,16 @@ async def background_translate_task(
             logger.error(f"History {history_id} or user {user_id} not found")
             return
 
-        # Update status to processing
-        history.status = TaskStatus.PROCESSING
-        history.total_pages = len(sentences)  # Use total_pages for total sentences
-        history.current_page = start_index
-        db.commit()
+        # Update status to processing; later progress is written in batches
+        progress = ProgressReporter(db, history)
+        await progress.transition(
+            TaskStatus.PROCESSING,
+            total_pages=len(feed),  # Use total_pages for total sentences
+            current_page=start_index
+        )
 
-        # Initialize task state
-        translation_task_states[history_id] = {
-            "paused": False,
-            "stopped": False,
-            "sentences": sentences  # 保存句子列表用于继续翻译
-        }
+        # Register task so pause/stop requests from any worker reach it
+        await job_control.register(JOB_KIND, history_id)
 
         # Create translation service
         translate_service = TranslationService(api_base, api_key, model, db, user)
@@ -84,101 +386,152 @@ async def background_translate_task(
             except json.JSONDecodeError:
                 pass
 
+        def results():
+            return json.dumps(translated_pairs, ensure_ascii=False)
+
         # Translate one by one with progress updates
-        for index in range(start_index, len(sentences)):
-            sentence = sentences[index]
-
-            # Check if paused or stopped
-            task_state = translation_task_states.get(history_id, {})
-
-            # 如果暂停，等待继续
-            while task_state.get("paused", False):
-                history.status = "paused"
-                history.progress_message = f"已暂停，当前进度: {index}/{len(sentences)}"
-                db.commit()
-                await asyncio.sleep(1)
-                task_state = translation_task_states.get(history_id, {})
-
-                # 如果被停止，退出
-                if task_state.get("stopped", False):
-                    break
+        index = start_index
+        while True:
+            # 暂停时在此等待继续（暂停时间不计入任务截止时间）；
+            # 暂停前先写入缓存的结果
+            paused = False
+
+            async def on_pause():
+                nonlocal paused
+                paused = True
+                await progress.transition(
+                    TaskStatus.PAUSED,
+                    current_page=index,
+                    progress_message=f"已暂停，当前进度: {index}/{len(feed)}"
+                )
+
+            paused_at = time.monotonic()
+            task_state = await job_control.wait_while_paused(JOB_KIND, history_id, on_pause=on_pause)
+            current_deadline().extend(time.monotonic() - paused_at)
 
             # 检查是否停止
             if task_state.get("stopped", False):
-                history.status = "stopped"
-                history.progress_message = f"翻译已停止，完成 {index}/{len(sentences)} 句"
-                db.commit()
-                logger.info(f"翻译任务 {history_id} 已停止，完成 {index}/{len(sentences)} 句")
+                await _mark_stopped(progress, index, len(feed))
                 return
+            if paused:
+                await progress.transition(TaskStatus.PROCESSING)
 
-            try:
-                logger.info(f"翻译第 {index + 1}/{len(sentences)} 句")
+            if index >= len(feed):
+                if feed.closed and feed.error is None:
+                    break
+                # Pipeline: the next sentence is still being recognized
+                await progress.update(
+                    total_pages=len(feed),
+                    progress_message=f"等待 OCR，已识别 {feed.pages_done}/{feed.page_count} 页..."
+                )
+                try:
+                    await job_control.run_cancellable(JOB_KIND, history_id, lambda: feed.wait(index))
+                except JobStopped:
+                    await _mark_stopped(progress, index, len(feed))
+                    return
+                continue
+            sentence = feed.sentences[index]
 
-                # Update status back to processing
-                history.status = TaskStatus.PROCESSING
+            try:
+                logger.info(f"翻译第 {index + 1}/{len(feed)} 句")
 
                 # Update progress
-                history.current_page = index + 1
-                history.progress_message = f"正在翻译第 {index + 1}/{len(sentences)} 句..."
-                db.commit()
-
-                # Translate single sentence
-                translation = await translate_service.translate_text(
-                    sentence,
-                    source_language,
-                    target_language,
-                    use_corrections=True
+                message = f"正在翻译第 {index + 1}/{len(feed)} 句..."
+                if not feed.closed:
+                    message += f" (OCR 已识别 {feed.pages_done}/{feed.page_count} 页)"
+                await progress.update(current_page=index + 1, total_pages=len(feed), progress_message=message)
+
+                # Translate single sentence (waits while the provider's circuit is open)
+                async def on_park(error):
+                    await progress.flush(
+                        progress_message=f"翻译服务暂不可用，等待恢复后继续第 {index + 1} 句: {error}"
+                    )
+
+                # A stop request cancels the in-flight request
+                translation = await job_control.run_cancellable(
+                    JOB_KIND,
+                    history_id,
+                    lambda: park_while_open(
+                        lambda: run_with_deadline(
+                            lambda: translate_service.translate_text(
+                                sentence,
+                                source_language,
+                                target_language,
+                                use_corrections=True
+                            ),
+                            settings.TRANSLATE_SENTENCE_DEADLINE_SECONDS,
+                            f"sentence {index + 1}"
+                        ),
+                        on_park=on_park
+                    )
                 )
 
-                # Add to results
+                # Add to results (saved with the next progress flush)
                 translated_pairs.append({
                     "source": sentence,
                     "translation": translation
                 })
+                await progress.update(item_done=True, translation_result=results)
 
-                # Save intermediate results
-                history.translation_result = json.dumps(translated_pairs, ensure_ascii=False)
-                db.commit()
-
+            except JobStopped:
+                await _mark_stopped(progress, index, len(feed))
+                return
+            except CircuitOpenError:
+                # Provider still down after parking: fail the job, not every sentence
+                raise
             except Exception as e:
+                if current_deadline().expired or job_error_retryable(e):
+                    # Out of job time, or the provider is failing: fail the job (the
+                    # queue retries it later) instead of every remaining sentence
+                    raise
                 logger.error(f"翻译第 {index + 1} 句失败: {str(e)}")
                 translated_pairs.append({
                     "source": sentence,
                     "translation": f"[翻译错误: {str(e)}]"
                 })
-                history.translation_result = json.dumps(translated_pairs, ensure_ascii=False)
-                db.commit()
+                await progress.update(item_done=True, translation_result=results)
+            index += 1
 
         # Mark as completed
-        history.status = TaskStatus.COMPLETED
-        history.completed_at = datetime.utcnow()
-        history.progress_message = "翻译完成"
-        db.commit()
+        await progress.transition(
+            TaskStatus.COMPLETED,
+            completed_at=datetime.utcnow(),
+            total_pages=len(feed),
+            progress_message="翻译完成"
+        )
 
-        logger.info(f"✅ 翻译任务 {history_id} 完成，共 {len(sentences)} 句")
+        logger.info(f"✅ 翻译任务 {history_id} 完成，共 {len(feed)} 句")
 
     except Exception as e:
         logger.error(f"翻译任务 {history_id} 失败: {str(e)}")
-        if history:
-            history.status = TaskStatus.FAILED
-            history.error_message = str(e)
+        retry = job is not None and job_queue.will_retry(job, e)
+        fields = {"error_message": str(e)}
+        if retry:
+            fields["progress_message"] = f"翻译失败，稍后自动重试: {str(e)}"
+        status = TaskStatus.PENDING if retry else TaskStatus.FAILED
+        if progress is not None:
+            # Keeps the sentences translated since the last flush
+            await progress.transition(status, **fields)
+        elif history:
+            history.status = status
+            for name, value in fields.items():
+                setattr(history, name, value)
             db.commit()
+        raise
     finally:
         # 清理任务状态
-        if history_id in translation_task_states:
-            del translation_task_states[history_id]
+        await job_control.unregister(JOB_KIND, history_id)
         db.close()
 
 
 @router.post("/start", response_model=TaskStatusResponse)
 async def translate(
     request: TranslationRequest,
-    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
-    Start translation task (runs in background)
+    Start translation task (queued for a background worker)
 
     Either provide 'text' directly or 'history_id' to translate OCR results
     """
@@ -194,34 +547,15 @@ async def translate(
     if not current_user.translate_api_key:
         raise HTTPException(status_code=400, detail="Translation API key not configured")
 
-    api_key = EncryptionManager.decrypt_api_key(
-        current_user.translate_api_key, current_user.id, settings.SECRET_KEY
-    )
-    api_base = current_user.translate_api_base or "https://api.openai.com/v1"
-    model = current_user.translate_model or "gpt-4"
-
-    logger.info(f"翻译模型: {model}")
-    logger.info(f"API Base: {api_base}")
+    logger.info(f"翻译模型: {current_user.translate_model or 'gpt-4'}")
+    logger.info(f"API Base: {current_user.translate_api_base or 'https://api.openai.com/v1'}")
 
     # Determine source text and create history
     if request.text:
         source_text = request.text
+        history = None
         logger.info(f"使用直接输入的文本，长度: {len(source_text)} 字符")
 
-        # Create new history entry for translation only
-        new_history = History(
-            user_id=current_user.id,
-            task_type=TaskType.TRANSLATE,
-            status=TaskStatus.PENDING,
-            original_filename="text_input.txt",
-            source_language=request.source_language,
-            target_language=request.target_language
-        )
-        db.add(new_history)
-        db.commit()
-        db.refresh(new_history)
-        history_id = new_history.id
-
     elif request.history_id:
         # Get OCR results from history
         logger.info(f"从历史记录加载 OCR 结果: {request.history_id}")
@@ -238,80 +572,85 @@ async def translate(
             logger.error(f"历史记录无 OCR 结果: {request.history_id}")
             raise HTTPException(status_code=400, detail="No OCR result available")
 
-        # Extract text from OCR results and merge cross-page sentences
+        # Extract text from OCR results
         ocr_results = json.loads(history.ocr_result)
         logger.info(f"OCR 结果包含 {len(ocr_results)} 页")
-
-        # Merge text from pages, handling cross-page sentences
-        merged_text_parts = []
-        for i, page in enumerate(ocr_results):
-            text = page["text"].strip()
-            if not text:
-                continue
-
-            # If this is not the first page and previous text doesn't end with sentence ending
-            # and current text doesn't start with capital letter, merge them
-            if merged_text_parts and not re.search(r'[.!?。！？]\s*$', merged_text_parts[-1]):
-                # Check if current text looks like continuation (doesn't start with capital or number)
-                if text and not re.match(r'^[A-Z0-9#\[]', text):
-                    # Merge with previous (cross-page sentence)
-                    merged_text_parts[-1] = merged_text_parts[-1].rstrip() + ' ' + text
-                else:
-                    # New sentence/paragraph
-                    merged_text_parts.append(text)
-            else:
-                merged_text_parts.append(text)
-
-        source_text = "\n\n".join(merged_text_parts)
-        history_id = request.history_id
-
-        # Update history
-        history.task_type = TaskType.OCR_TRANSLATE
-        history.source_language = request.source_language
-        history.target_language = request.target_language
-        history.status = TaskStatus.PENDING
-        db.commit()
-
-        logger.info(f"提取的文本长度: {len(source_text)} 字符")
     else:
         logger.error("请求中未提供文本或历史记录 ID")
         raise HTTPException(status_code=400, detail="Either 'text' or 'history_id' must be provided")
 
-    # Split text into sentences
+    # Split text into sentences (once per document and source language; kept
+    # on the history entry for resume, retranslation and export)
     logger.info("-" * 60)
     logger.info("分割文本为句子...")
-    sentences = TranslationService.split_and_merge_text(
-        source_text, request.source_language
-    )
+    if history is None:
+        segmentation = segment_text(source_text, request.source_language)
+    else:
+        # Sentences that span pages are merged (same rule as the OCR + translate pipeline)
+        segmentation = segment_history(history, request.source_language)
+    sentences = [sentence["text"] for sentence in segmentation]
     logger.info(f"分割完成，共 {len(sentences)} 个句子")
 
-    # Start background translation task
-    logger.info("启动后台翻译任务...")
-    background_tasks.add_task(
-        background_translate_task,
-        history_id=history_id,
-        sentences=sentences,
-        source_language=request.source_language,
-        target_language=request.target_language,
-        user_id=current_user.id,
-        api_base=api_base,
-        api_key=api_key,
-        model=model,
-        start_index=0
-    )
+    tokens = estimate_job_tokens(sentences=sentences)
+    async with admission.lock():
+        # Refuse (429) before touching history if the queue cannot take the job
+        admitted = admission.admit(db, current_user.id, JOB_KIND, len(sentences), tokens)
+
+        if history is None:
+            # Create new history entry for translation only
+            history = History(
+                user_id=current_user.id,
+                task_type=TaskType.TRANSLATE,
+                status=TaskStatus.PENDING,
+                original_filename="text_input.txt",
+                source_language=request.source_language,
+                target_language=request.target_language
+            )
+            store_segmentation(history, segmentation, request.source_language)
+            db.add(history)
+        else:
+            history.task_type = TaskType.OCR_TRANSLATE
+            history.source_language = request.source_language
+            history.target_language = request.target_language
+            history.status = TaskStatus.PENDING
+        if admitted.defer_seconds:
+            history.progress_message = "系统繁忙，稍后处理..."
+        db.commit()
+        db.refresh(history)
+        history_id = history.id
+
+        # Queue the translation for a worker (the API key is read again there)
+        logger.info("翻译任务入队...")
+        job_queue.enqueue(
+            db,
+            JOB_KIND,
+            user_id=current_user.id,
+            history_id=history_id,
+            payload={
+                "source_language": request.source_language,
+                "target_language": request.target_language,
+                "start_index": 0,
+            },
+            cost=len(sentences),
+            tokens=tokens,
+            delay_seconds=admitted.defer_seconds
+        )
 
     logger.info(f"✅ 翻译任务已创建: {history_id}")
     logger.info("=" * 60)
 
+    message = "Translation task started"
+    if admitted.defer_seconds:
+        message = f"Service busy: translation task deferred by {admitted.defer_seconds}s"
     return TaskStatusResponse(
         task_id=history_id,
         status=TaskStatus.PENDING,
-        message="Translation task started"
+        message=message
     )
 
 
 @router.post("/pause/{history_id}")
-def pause_translation(
+async def pause_translation(
     history_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -325,8 +664,7 @@ def pause_translation(
     if not history:
         raise HTTPException(status_code=404, detail="History not found")
 
-    if history_id in translation_task_states:
-        translation_task_states[history_id]["paused"] = True
+    if await job_control.signal(JOB_KIND, history_id, paused=True):
         logger.info(f"翻译任务 {history_id} 已暂停")
         return {"message": "Translation paused", "task_id": history_id}
     else:
@@ -336,7 +674,6 @@ def pause_translation(
 @router.post("/resume/{history_id}")
 async def resume_translation(
     history_id: int,
-    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -350,66 +687,87 @@ async def resume_translation(
         raise HTTPException(status_code=404, detail="History not found")
 
     # 如果任务还在内存中（只是暂停状态），直接恢复
-    if history_id in translation_task_states:
-        translation_task_states[history_id]["paused"] = False
+    if await job_control.signal(JOB_KIND, history_id, paused=False):
         logger.info(f"翻译任务 {history_id} 继续")
         return {"message": "Translation resumed", "task_id": history_id}
 
     # 如果任务不在内存中（可能服务重启了），需要重新启动
     # 从数据库中获取已翻译的进度
-    if history.status in ["paused", "stopped", TaskStatus.PROCESSING]:
+    if history.status in [TaskStatus.PAUSED, TaskStatus.STOPPED, TaskStatus.PROCESSING]:
         # 获取翻译服务配置
         if not current_user.translate_api_key:
             raise HTTPException(status_code=400, detail="Translation API key not configured")
 
-        api_key = EncryptionManager.decrypt_api_key(
-            current_user.translate_api_key, current_user.id, settings.SECRET_KEY
-        )
-        api_base = current_user.translate_api_base or "https://api.openai.com/v1"
-        model = current_user.translate_model or "gpt-4"
-
         # 获取已翻译的句子数
         start_index = history.current_page or 0
+        payload = {
+            "source_language": history.source_language or "auto",
+            "target_language": history.target_language or "zh",
+            "start_index": start_index,
+        }
 
-        # 需要重新分割文本（或从保存的状态中恢复）
-        # 这里简化处理：如果有 OCR 结果，重新提取文本
-        if history.ocr_result:
-            ocr_results = json.loads(history.ocr_result)
-            merged_text_parts = []
-            for page in ocr_results:
-                text = page["text"].strip()
-                if text:
-                    merged_text_parts.append(text)
-            source_text = "\n\n".join(merged_text_parts)
+        if not history.ocr_result and history.task_type == TaskType.OCR_TRANSLATE and history.file_path:
+            # 流水线任务在 OCR 完成前中断：重新入队，已识别的页和已翻译的句子都会跳过
+            kind = PIPELINE_JOB
+            cost = count_pages(history.file_path)
+            tokens = estimate_job_tokens(pages=cost) * 2
         else:
-            raise HTTPException(status_code=400, detail="Cannot resume: no source text available")
-
-        sentences = TranslationService.split_and_merge_text(
-            source_text, history.source_language or "auto"
-        )
-
-        # 启动后台任务从上次位置继续
-        background_tasks.add_task(
-            background_translate_task,
-            history_id=history_id,
-            sentences=sentences,
-            source_language=history.source_language or "auto",
-            target_language=history.target_language or "zh",
-            user_id=current_user.id,
-            api_base=api_base,
-            api_key=api_key,
-            model=model,
-            start_index=start_index
-        )
-
-        logger.info(f"翻译任务 {history_id} 从第 {start_index} 句继续")
-        return {"message": f"Translation resumed from sentence {start_index}", "task_id": history_id}
+            # 使用创建任务时保存的分句结果，start_index 与原句子列表一一对应；
+            # 旧记录没有保存时按同样的跨页合并规则从 OCR 结果分句一次
+            segmentation = load_segmentation(history)
+            if segmentation is None:
+                if not history.ocr_result:
+                    raise HTTPException(status_code=400, detail="Cannot resume: no source text available")
+                segmentation = segment_history(history, history.source_language or "auto")
+            sentences = [sentence["text"] for sentence in segmentation]
+            kind = JOB_KIND
+            cost = len(sentences) - start_index
+            tokens = estimate_job_tokens(sentences=sentences[start_index:])
+
+        async with admission.lock():
+            # 重复点击继续、或任务仍在排队/运行时，不再重复入队
+            active = db.query(Job.id).filter(
+                Job.history_id == history_id,
+                Job.status.in_([JobStatus.QUEUED, JobStatus.RUNNING])
+            ).first()
+            if active:
+                await job_control.signal(JOB_KIND, history_id, create=True, paused=False)
+                logger.info(f"翻译任务 {history_id} 已在队列中")
+                return {"message": "Translation already queued", "task_id": history_id}
+
+            admitted = admission.admit(db, current_user.id, kind, cost, tokens)
+            await job_control.signal(JOB_KIND, history_id, create=True, paused=False, stopped=False)
+
+            # 重新入队，从上次位置继续；Worker 领取后再改为 PROCESSING
+            history.status = TaskStatus.PENDING
+            history.progress_message = "系统繁忙，稍后处理..." if admitted.defer_seconds else "排队中..."
+            db.commit()
+            job_queue.enqueue(
+                db,
+                kind,
+                user_id=current_user.id,
+                history_id=history_id,
+                payload=payload,
+                cost=cost,
+                tokens=tokens,
+                delay_seconds=admitted.defer_seconds
+            )
+
+        if kind == PIPELINE_JOB:
+            logger.info(f"OCR + 翻译任务 {history_id} 从第 {start_index} 句继续")
+        else:
+            logger.info(f"翻译任务 {history_id} 从第 {start_index} 句继续")
+        return {
+            "message": f"Translation resumed from sentence {start_index}",
+            "task_id": history_id,
+            **admitted.hint()
+        }
 
     raise HTTPException(status_code=400, detail="Translation task cannot be resumed")
 
 
 @router.post("/stop/{history_id}")
-def stop_translation(
+async def stop_translation(
     history_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -423,20 +781,21 @@ def stop_translation(
     if not history:
         raise HTTPException(status_code=404, detail="History not found")
 
-    if history_id in translation_task_states:
-        translation_task_states[history_id]["stopped"] = True
-        translation_task_states[history_id]["paused"] = False  # 取消暂停以允许循环退出
+    # 取消暂停以允许循环退出
+    if await job_control.signal(JOB_KIND, history_id, stopped=True, paused=False):
         logger.info(f"翻译任务 {history_id} 已停止")
         return {"message": "Translation stopped", "task_id": history_id}
     else:
-        # 任务可能已经完成或不存在
-        history.status = "stopped"
+        # 任务可能还在排队、已经完成或不存在
+        for kind in (JOB_KIND, PIPELINE_JOB):
+            job_queue.cancel(db, history_id, kind)
+        history.status = TaskStatus.STOPPED
         db.commit()
         return {"message": "Translation marked as stopped", "task_id": history_id}
 
 
 @router.get("/progress/{history_id}")
-def get_translation_progress(
+async def get_translation_progress(
     history_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -458,7 +817,7 @@ def get_translation_progress(
         except json.JSONDecodeError:
             pass
 
-    return {
+    response = {
         "task_id": history.id,
         "status": history.status,
         "current": history.current_page or 0,
@@ -467,6 +826,15 @@ def get_translation_progress(
         "translations": translated_pairs,
         "error": history.error_message
     }
+    if history.status == TaskStatus.PROCESSING:
+        # Position and message are ahead of the last database flush
+        live = await live_progress(history.id)
+        response["current"] = live.get("current_page", response["current"]) or 0
+        response["total"] = live.get("total_pages", response["total"]) or 0
+        response["message"] = live.get("progress_message", response["message"])
+    # Waiting for a worker: where in the queue, and roughly how long
+    response.update(job_queue.queue_info(db, history.id))
+    return response
 
 
 @router.get("/result/{history_id}", response_model=TranslationResponse)
@@ -7,6 +7,7 @@ from .user import (
     UserResponse,
     APIConfig,
     APIConfigResponse,
+    RateLimitOverride,
 )
 from .task import (
     OCRRequest,
@@ -36,6 +37,7 @@ __all__ = [
     "UserResponse",
     "APIConfig",
     "APIConfigResponse",
+    "RateLimitOverride",
     "OCRRequest",
     "OCRPageResult",
     "OCRResponse",
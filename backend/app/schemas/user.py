@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, field_validator
-from typing import Optional
+from typing import Dict, Optional
 from datetime import datetime
 
 
@@ -34,6 +34,13 @@ class UserResponse(UserBase):
         from_attributes = True
 
 
+class RateLimitOverride(BaseModel):
+    """Rate limits of the user's own API key for one service (None = server default)"""
+    rpm: Optional[int] = Field(None, ge=1)
+    tpm: Optional[int] = Field(None, ge=0)
+    concurrency: Optional[int] = Field(None, ge=1)
+
+
 class APIConfig(BaseModel):
     """API configuration for OCR, Translation, and Embedding"""
     ocr_api_base: Optional[str] = None
@@ -49,6 +56,18 @@ class APIConfig(BaseModel):
     embedding_model: Optional[str] = "text-embedding-004"
     embedding_dimension: Optional[int] = 768
 
+    # Keyed by "ocr", "translate" or "embedding"; omitted keeps the stored overrides
+    rate_limits: Optional[Dict[str, RateLimitOverride]] = None
+
+    @field_validator("rate_limits")
+    @classmethod
+    def validate_rate_limit_kinds(cls, v):
+        if v is not None:
+            unknown = set(v) - {"ocr", "translate", "embedding"}
+            if unknown:
+                raise ValueError(f"Unknown rate limit kinds: {', '.join(sorted(unknown))}")
+        return v
+
 
 class APIConfigResponse(BaseModel):
     """Response model that shows config without sensitive keys"""
@@ -64,3 +83,5 @@ class APIConfigResponse(BaseModel):
     embedding_model: Optional[str] = None
     embedding_dimension: Optional[int] = None
     embedding_api_key_set: bool = False
+
+    rate_limits: Dict[str, RateLimitOverride] = {}
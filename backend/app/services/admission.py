@@ -0,0 +1,187 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Optional, Sequence
+
+from fastapi import HTTPException
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models import Job, JobStatus
+from ..utils.coordination import coordination_backend
+from ..utils.limiter import estimate_tokens
+from .scheduler import scheduler
+
+logger = logging.getLogger(__name__)
+
+# Lease held in the coordination backend while one submission is checked
+# and enqueued; expires on its own if the holder dies
+ADMISSION_LOCK_KEY = "admission"
+ADMISSION_LOCK_TTL_SECONDS = 30.0
+
+
+@dataclass
+class AdmissionDecision:
+    """Outcome of an admission check; queue_position/eta_seconds are hints for the client"""
+    admitted: bool
+    reason: str = ""
+    retry_after: int = 0
+    defer_seconds: int = 0
+    queue_position: int = 0
+    eta_seconds: int = 0
+
+    def hint(self) -> Dict[str, Any]:
+        return {"queue_position": self.queue_position, "eta_seconds": self.eta_seconds}
+
+
+class AdmissionController:
+    """
+    Refuses new jobs when the queue is overloaded instead of letting every job slow down
+
+    Limits (0 = unlimited):
+    - per user: queued + running jobs, and their estimated tokens
+    - global: queued jobs, and estimated tokens of queued + running jobs
+    Per-user quotas always reject. Global overload rejects too, unless
+    ADMISSION_DEFER_WHEN_BUSY is set: then the job is accepted but only
+    becomes leasable after the estimated drain time (the user's quota still
+    bounds how much can be deferred).
+
+    The check reads the jobs table, so callers hold `lock()` from admit()
+    until their job row is committed; otherwise concurrent submissions
+    could all pass the same check and overshoot the limits.
+    """
+
+    @asynccontextmanager
+    async def lock(self, poll_interval: float = 0.02) -> AsyncIterator[None]:
+        """Serialize check-and-enqueue across every process sharing the coordination backend"""
+        while True:
+            lease_id = await coordination_backend.acquire_lease(
+                ADMISSION_LOCK_KEY, 1, ADMISSION_LOCK_TTL_SECONDS
+            )
+            if lease_id:
+                break
+            await asyncio.sleep(poll_interval)
+        try:
+            yield
+        finally:
+            await coordination_backend.release_lease(ADMISSION_LOCK_KEY, lease_id)
+
+    @staticmethod
+    def _pending(db: Session, user_id: Optional[int] = None):
+        """(jobs, tokens) of unfinished jobs, optionally of one user"""
+        query = db.query(func.count(Job.id), func.coalesce(func.sum(Job.tokens), 0)).filter(
+            Job.status.in_([JobStatus.QUEUED, JobStatus.RUNNING])
+        )
+        if user_id is not None:
+            query = query.filter(Job.user_id == user_id)
+        jobs, tokens = query.one()
+        return jobs, tokens
+
+    @staticmethod
+    def _work_seconds(db: Session, rows) -> float:
+        rates: Dict[str, float] = {}
+        total = 0.0
+        for kind, cost in rows:
+            if kind not in rates:
+                rates[kind] = scheduler.seconds_per_item(db, kind)
+            total += rates[kind] * (cost or 1)
+        return total
+
+    def _drain_seconds(self, db: Session, user_id: Optional[int] = None) -> float:
+        """Estimated time for unfinished work (all, or one user's) to clear the workers"""
+        query = db.query(Job.kind, Job.cost).filter(Job.status.in_([JobStatus.QUEUED, JobStatus.RUNNING]))
+        running = db.query(func.count(Job.id)).filter(Job.status == JobStatus.RUNNING)
+        if user_id is not None:
+            query = query.filter(Job.user_id == user_id)
+            running = running.filter(Job.user_id == user_id)
+        return self._work_seconds(db, query.all()) / max(1, running.scalar() or 0)
+
+    @staticmethod
+    def _clamp_retry_after(seconds: float) -> int:
+        return int(min(settings.ADMISSION_RETRY_AFTER_MAX, max(settings.ADMISSION_RETRY_AFTER_MIN, seconds)))
+
+    def check(self, db: Session, user_id: int, kind: str, cost: int, tokens: int) -> AdmissionDecision:
+        """
+        Decide whether a new job may be queued
+
+        Args:
+            cost: Pages or sentences of the new job
+            tokens: Estimated API tokens of the new job
+        """
+        queued = db.query(func.count(Job.id)).filter(Job.status == JobStatus.QUEUED).scalar() or 0
+        own_work = self._work_seconds(db, [(kind, cost)])
+        position = queued + 1
+        eta = round(self._drain_seconds(db) + own_work)
+
+        user_jobs, user_tokens = self._pending(db, user_id)
+        user_reason = ""
+        if settings.ADMISSION_MAX_JOBS_PER_USER and user_jobs >= settings.ADMISSION_MAX_JOBS_PER_USER:
+            user_reason = f"Too many unfinished jobs ({user_jobs}, limit {settings.ADMISSION_MAX_JOBS_PER_USER})"
+        elif (
+            settings.ADMISSION_MAX_TOKENS_PER_USER and user_tokens
+            and user_tokens + tokens > settings.ADMISSION_MAX_TOKENS_PER_USER
+        ):
+            # A single oversized job is still admitted when the user has nothing pending
+            user_reason = f"Too much pending work (~{user_tokens + tokens} tokens, limit {settings.ADMISSION_MAX_TOKENS_PER_USER})"
+        if user_reason:
+            return AdmissionDecision(
+                admitted=False,
+                reason=user_reason,
+                retry_after=self._clamp_retry_after(self._drain_seconds(db, user_id)),
+                queue_position=position,
+                eta_seconds=eta,
+            )
+
+        _, total_tokens = self._pending(db)
+        busy_reason = ""
+        if settings.ADMISSION_MAX_QUEUED_JOBS and queued >= settings.ADMISSION_MAX_QUEUED_JOBS:
+            busy_reason = f"Job queue is full ({queued} queued)"
+        elif (
+            settings.ADMISSION_MAX_PENDING_TOKENS and total_tokens
+            and total_tokens + tokens > settings.ADMISSION_MAX_PENDING_TOKENS
+        ):
+            busy_reason = f"Service is busy (~{total_tokens} tokens pending)"
+        if not busy_reason:
+            return AdmissionDecision(admitted=True, queue_position=position, eta_seconds=eta)
+
+        retry_after = self._clamp_retry_after(self._drain_seconds(db))
+        if settings.ADMISSION_DEFER_WHEN_BUSY:
+            return AdmissionDecision(
+                admitted=True,
+                reason=busy_reason,
+                defer_seconds=retry_after,
+                queue_position=position,
+                eta_seconds=eta + retry_after,
+            )
+        return AdmissionDecision(
+            admitted=False, reason=busy_reason, retry_after=retry_after, queue_position=position, eta_seconds=eta
+        )
+
+    def admit(self, db: Session, user_id: int, kind: str, cost: int, tokens: int) -> AdmissionDecision:
+        """
+        check(), raising 429 with Retry-After and a queue-position hint when refused
+
+        Call under `lock()` and enqueue the job before releasing it.
+        """
+        decision = self.check(db, user_id, kind, cost, tokens)
+        if decision.admitted:
+            if decision.defer_seconds:
+                logger.warning(f"系统繁忙，用户 {user_id} 的 {kind} 任务延后 {decision.defer_seconds} 秒执行: {decision.reason}")
+            return decision
+
+        logger.warning(f"拒绝用户 {user_id} 的 {kind} 任务 (Retry-After {decision.retry_after}s): {decision.reason}")
+        raise HTTPException(
+            status_code=429,
+            detail={"message": decision.reason, "retry_after": decision.retry_after, **decision.hint()},
+            headers={"Retry-After": str(decision.retry_after)},
+        )
+
+
+def estimate_job_tokens(pages: int = 0, sentences: Sequence[str] = ()) -> int:
+    """Rough API tokens of a job: a fixed amount per OCR page, prompt plus ~2x output per sentence"""
+    return pages * settings.ADMISSION_TOKENS_PER_PAGE + sum(3 * estimate_tokens(s) for s in sentences)
+
+
+admission = AdmissionController()
@@ -0,0 +1,231 @@
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Set, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models import Correction
+from ..utils.aho_corasick import AhoCorasick
+from ..utils.lexical_index import LexicalIndex
+
+logger = logging.getLogger(__name__)
+
+# Scripts written without spaces between words; terms in them match anywhere
+_UNSPACED_SCRIPT = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]")
+
+
+def _is_word_char(char: str) -> bool:
+    return (char.isalnum() or char == "_") and not _UNSPACED_SCRIPT.match(char)
+
+
+class CorrectionIndex:
+    """In-memory lookup structures for one user's language pair"""
+
+    def __init__(self):
+        self.matcher: AhoCorasick[int] = AhoCorasick()
+        self.lexical = LexicalIndex()
+        # correction id -> (normalized source, source text, corrected translation)
+        self.entries: Dict[int, Tuple[str, str, str]] = {}
+        # normalized source -> correction ids, for exact sentence matches
+        self.by_source: Dict[str, Set[int]] = {}
+        # correction ids, most recently used first, for the prompt's
+        # "previous corrections" examples
+        self.recent: List[int] = []
+        self.fingerprint: Tuple[int, int] = (0, 0)
+        self.checked_at = 0.0
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return re.sub(r"\s+", " ", text).strip().lower()
+
+    @staticmethod
+    def prompt_tokens(source_text: str, translation: str) -> int:
+        """Rough prompt cost of one correction (1 token ≈ 4 characters for English, 1 for Chinese)"""
+        return (len(source_text) + len(translation)) // 3
+
+    def add(self, correction_id: int, source_text: str, translation: str, newest: bool = False):
+        """Index a correction (no-op if already present); newest puts it first in `recent`"""
+        if correction_id in self.entries:
+            return
+        normalized = self.normalize(source_text)
+        self.entries[correction_id] = (normalized, source_text, translation)
+        if newest:
+            self.recent.insert(0, correction_id)
+        else:
+            self.recent.append(correction_id)
+        self.by_source.setdefault(normalized, set()).add(correction_id)
+        self.lexical.add(correction_id, source_text)
+        if normalized and len(normalized) <= settings.GLOSSARY_MAX_TERM_CHARS:
+            self.matcher.add(normalized, correction_id)
+
+    def remove(self, correction_id: int):
+        """Drop a correction from the index"""
+        entry = self.entries.pop(correction_id, None)
+        if entry:
+            self.recent.remove(correction_id)
+            self.matcher.remove(entry[0], correction_id)
+            self.lexical.remove(correction_id)
+            ids = self.by_source.get(entry[0])
+            if ids:
+                ids.discard(correction_id)
+                if not ids:
+                    del self.by_source[entry[0]]
+
+    def touch(self, correction_id: int):
+        """Move a correction to the front of `recent` after it was used"""
+        if correction_id in self.entries:
+            self.recent.remove(correction_id)
+            self.recent.insert(0, correction_id)
+
+    def exact_matches(self, text: str) -> List[int]:
+        """Ids of corrections whose source text equals text (whitespace/case-insensitive)"""
+        return sorted(self.by_source.get(self.normalize(text), ()))
+
+    def find_terms(self, text: str) -> List[Dict[str, str]]:
+        """
+        Every glossary term occurring in text, in order of first occurrence
+
+        Terms in spaced scripts must start and end on word boundaries so
+        that e.g. "art" does not match inside "start".
+        """
+        normalized = self.normalize(text)
+        seen = set()
+        found = []
+
+        for start, end, correction_id in self.matcher.iter_matches(normalized):
+            if correction_id in seen:
+                continue
+            term = self.entries[correction_id][0]
+            if _is_word_char(term[0]) and start > 0 and _is_word_char(normalized[start - 1]):
+                continue
+            if _is_word_char(term[-1]) and end < len(normalized) and _is_word_char(normalized[end]):
+                continue
+            seen.add(correction_id)
+            _, source_text, translation = self.entries[correction_id]
+            found.append({"id": correction_id, "source": source_text, "translation": translation})
+
+        return found
+
+    def prompt_examples(self, max_tokens: int, exclude: Iterable[str] = ()) -> List[Dict[str, str]]:
+        """Most recently used corrections that fit in max_tokens, skipping sources in exclude"""
+        exclude = set(exclude)
+        selected = []
+        for correction_id in self.recent:
+            _, source_text, translation = self.entries[correction_id]
+            if source_text in exclude:
+                continue
+            tokens = self.prompt_tokens(source_text, translation)
+            if tokens > max_tokens:
+                break
+            selected.append({"source": source_text, "translation": translation})
+            max_tokens -= tokens
+        return selected
+
+
+class CorrectionIndexRegistry:
+    """
+    Per (user, source language, target language) correction indexes
+
+    Indexes are built lazily from the database and then kept up to date by
+    CorrectionService on create/delete/import. Changes made by other worker
+    processes are picked up by comparing a (count, max id) fingerprint at
+    most every CORRECTION_INDEX_REFRESH_SECONDS.
+    """
+
+    def __init__(self, max_indexes: int = 256, refresh_seconds: float = 30.0):
+        self.max_indexes = max_indexes
+        self.refresh_seconds = refresh_seconds
+        self._indexes: "OrderedDict[tuple, CorrectionIndex]" = OrderedDict()
+
+    @staticmethod
+    def _fingerprint(db: Session, key: tuple) -> Tuple[int, int]:
+        user_id, source_language, target_language = key
+        count, max_id = db.query(func.count(Correction.id), func.max(Correction.id)).filter(
+            Correction.user_id == user_id,
+            Correction.source_language == source_language,
+            Correction.target_language == target_language,
+        ).one()
+        return count or 0, max_id or 0
+
+    def _build(self, db: Session, key: tuple) -> CorrectionIndex:
+        user_id, source_language, target_language = key
+        index = CorrectionIndex()
+        rows = db.query(
+            Correction.id, Correction.source_text, Correction.corrected_translation
+        ).filter(
+            Correction.user_id == user_id,
+            Correction.source_language == source_language,
+            Correction.target_language == target_language,
+        ).order_by(
+            Correction.last_used_at.desc(), Correction.id.desc()
+        ).execution_options(yield_per=1000)
+
+        for correction_id, source_text, translation in rows:
+            index.add(correction_id, source_text, translation)
+
+        index.fingerprint = (len(index.entries), max(index.entries, default=0))
+        index.checked_at = time.monotonic()
+        logger.info(f"Built correction index for {key}: {len(index.entries)} entries")
+        return index
+
+    def get(self, db: Session, user_id: int, source_language: str, target_language: str) -> CorrectionIndex:
+        """Return the index for a language pair, building or refreshing it if needed"""
+        key = (user_id, source_language, target_language)
+        index = self._indexes.get(key)
+
+        if index is not None and time.monotonic() - index.checked_at > self.refresh_seconds:
+            if self._fingerprint(db, key) != index.fingerprint:
+                index = None
+            else:
+                index.checked_at = time.monotonic()
+
+        if index is None:
+            index = self._build(db, key)
+            self._indexes[key] = index
+            while len(self._indexes) > self.max_indexes:
+                self._indexes.popitem(last=False)
+
+        self._indexes.move_to_end(key)
+        return index
+
+    def on_created(
+        self,
+        user_id: int,
+        source_language: str,
+        target_language: str,
+        items: Iterable[Tuple[int, str, str]]
+    ):
+        """Add new (id, source_text, corrected_translation) items to a loaded index"""
+        index = self._indexes.get((user_id, source_language, target_language))
+        if index is None:
+            return
+        for correction_id, source_text, translation in items:
+            index.add(correction_id, source_text, translation, newest=True)
+            index.fingerprint = (len(index.entries), max(index.fingerprint[1], correction_id))
+
+    def on_used(self, correction: Correction):
+        """Mark a correction as most recently used in its loaded index"""
+        index = self._indexes.get(
+            (correction.user_id, correction.source_language, correction.target_language)
+        )
+        if index is not None:
+            index.touch(correction.id)
+
+    def on_deleted(self, correction: Correction):
+        """Remove a deleted correction from its loaded index"""
+        index = self._indexes.get(
+            (correction.user_id, correction.source_language, correction.target_language)
+        )
+        if index is not None:
+            index.remove(correction.id)
+            index.fingerprint = (len(index.entries), index.fingerprint[1])
+
+
+correction_index_registry = CorrectionIndexRegistry(
+    max_indexes=settings.CORRECTION_INDEX_MAX_LOADED,
+    refresh_seconds=settings.CORRECTION_INDEX_REFRESH_SECONDS,
+)
@@ -1,14 +1,20 @@
+import base64
 import json
 import logging
-from typing import List, Optional, Dict, Any
+import numpy as np
+from typing import List, Optional, Dict, Any, Callable, Iterable, Iterator
+from sqlalchemy import insert, or_
 from sqlalchemy.orm import Session
 from datetime import datetime
 
 from ..models import Correction, User
 from ..schemas import CorrectionCreate
 from .embedding_service import EmbeddingService
+from .correction_index import correction_index_registry
 from ..config import settings
 from ..utils import EncryptionManager
+from ..utils.vector_quantization import quantize, cosine_similarities
+from ..utils.limiter import user_rate_limits
 
 logger = logging.getLogger(__name__)
 
@@ -29,7 +35,10 @@ class CorrectionService:
             )
             api_base = user.embedding_api_base or "https://generativelanguage.googleapis.com/v1beta"
             model = user.embedding_model or "text-embedding-004"
-            self.embedding_service = EmbeddingService(api_base, decrypted_key, model)
+            self.embedding_service = EmbeddingService(
+                api_base, decrypted_key, model, dimension=self.embedding_dimension,
+                rate_limits=user_rate_limits(user, "embedding")
+            )
 
     async def create_correction(
         self,
@@ -45,13 +54,13 @@ class CorrectionService:
             Created correction object
         """
         # Create embedding for source text if service available
-        embedding = None
+        embedding_columns = self.encode_embedding(None)
         if self.embedding_service:
             try:
                 embedding_vec = await self.embedding_service.get_embedding(
                     correction_data.source_text
                 )
-                embedding = json.dumps(embedding_vec)
+                embedding_columns = self.encode_embedding(embedding_vec)
             except Exception as e:
                 logger.error(f"Failed to create embedding: {str(e)}")
 
@@ -61,16 +70,51 @@ class CorrectionService:
             corrected_translation=correction_data.corrected_translation,
             source_language=correction_data.source_language,
             target_language=correction_data.target_language,
-            embedding=embedding,
             history_id=correction_data.history_id,
+            **embedding_columns,
         )
 
         self.db.add(correction)
         self.db.commit()
         self.db.refresh(correction)
 
+        correction_index_registry.on_created(
+            self.user.id,
+            correction.source_language,
+            correction.target_language,
+            [(correction.id, correction.source_text, correction.corrected_translation)]
+        )
+
         return correction
 
+    def find_glossary_terms(
+        self,
+        texts: List[str],
+        source_language: str,
+        target_language: str
+    ) -> List[Dict[str, str]]:
+        """
+        Find every correction whose source text occurs in any of the texts
+
+        Uses the in-memory Aho–Corasick index for the language pair, so the
+        lookup is linear in the text length and needs no embedding calls.
+
+        Returns:
+            List of dicts with 'id', 'source' and 'translation' keys
+        """
+        index = correction_index_registry.get(
+            self.db, self.user.id, source_language, target_language
+        )
+
+        terms = []
+        seen = set()
+        for text in texts:
+            for term in index.find_terms(text):
+                if term["id"] not in seen:
+                    seen.add(term["id"])
+                    terms.append(term)
+        return terms
+
     async def find_similar_corrections(
         self,
         source_text: str,
@@ -93,15 +137,52 @@ class CorrectionService:
         if threshold is None:
             threshold = settings.VECTOR_SIMILARITY_THRESHOLD
 
-        # Get all corrections for this language pair
-        corrections = self.db.query(Correction).filter(
+        # An identical sentence needs no embedding round trip
+        index = correction_index_registry.get(
+            self.db, self.user.id, source_language, target_language
+        )
+        exact_ids = index.exact_matches(source_text)
+        if exact_ids:
+            return self.db.query(Correction).filter(Correction.id.in_(exact_ids)).all()
+
+        # Lexical prefilter: BM25 over word tokens / CJK bigrams
+        shortlist = index.lexical.search(source_text, settings.CORRECTION_SHORTLIST_SIZE)
+
+        if not self.embedding_service:
+            # Without embeddings, fall back to token overlap on the shortlist
+            matches = sorted(
+                (
+                    (index.lexical.overlap(source_text, correction_id), correction_id)
+                    for correction_id, _ in shortlist
+                ),
+                reverse=True
+            )
+            matches = [m for m in matches if m[0] >= settings.LEXICAL_SIMILARITY_THRESHOLD]
+            return self._load_matches(matches)
+
+        # Load only the vectors of the shortlist; full rows are fetched for the
+        # matches afterwards
+        query = self.db.query(
+            Correction.id,
+            Correction.embedding_vector,
+            Correction.embedding_dtype,
+            Correction.embedding,
+        ).filter(
             Correction.user_id == self.user.id,
             Correction.source_language == source_language,
             Correction.target_language == target_language,
-            Correction.embedding.isnot(None)
-        ).all()
-
-        if not corrections or not self.embedding_service:
+            or_(Correction.embedding_vector.isnot(None), Correction.embedding.isnot(None))
+        )
+        candidates = []
+        if shortlist:
+            candidates = query.filter(
+                Correction.id.in_([correction_id for correction_id, _ in shortlist])
+            ).all()
+        if not candidates:
+            # Nothing shares a token with the query: search the full language pair
+            candidates = query.all()
+
+        if not candidates:
             return []
 
         # Get embedding for query text
@@ -111,40 +192,96 @@ class CorrectionService:
             logger.error(f"Failed to get query embedding: {str(e)}")
             return []
 
-        # Find similar corrections
+        scores = self._score_candidates(query_embedding, candidates)
+        matches = sorted(
+            ((score, correction_id) for correction_id, score in scores.items() if score >= threshold),
+            reverse=True
+        )
+        return self._load_matches(matches)
+
+    def _load_matches(self, matches: List[tuple]) -> List[Correction]:
+        """Fetch corrections for (similarity, id) pairs, keeping their order"""
+        if not matches:
+            return []
+
+        corrections = {
+            c.id: c for c in self.db.query(Correction).filter(
+                Correction.id.in_([correction_id for _, correction_id in matches])
+            )
+        }
+
         similar_corrections = []
-        for correction in corrections:
-            if not correction.embedding:
-                continue
+        for similarity, correction_id in matches:
+            if correction_id in corrections:
+                logger.info(f"Found similar correction (similarity: {similarity:.3f})")
+                similar_corrections.append(corrections[correction_id])
+
+        return similar_corrections
 
+    @staticmethod
+    def _score_candidates(query_embedding: List[float], candidates) -> Dict[int, float]:
+        """
+        Cosine similarity of the query against stored vectors
+
+        Quantized vectors are grouped by (dtype, byte length) and scored as one
+        matrix; legacy JSON embeddings are scored individually.
+        """
+        scores: Dict[int, float] = {}
+        groups: Dict[tuple, List] = {}
+
+        for row in candidates:
+            if row.embedding_vector is not None and row.embedding_dtype:
+                key = (row.embedding_dtype, len(row.embedding_vector))
+                groups.setdefault(key, []).append(row)
+            elif row.embedding:
+                try:
+                    scores[row.id] = EmbeddingService.cosine_similarity(
+                        query_embedding, json.loads(row.embedding)
+                    )
+                except Exception as e:
+                    logger.error(f"Failed to compare embeddings: {str(e)}")
+
+        for (dtype, _), rows in groups.items():
             try:
-                correction_embedding = json.loads(correction.embedding)
-                similarity = EmbeddingService.cosine_similarity(
-                    query_embedding, correction_embedding
+                similarities = cosine_similarities(
+                    query_embedding, [row.embedding_vector for row in rows], dtype
                 )
+            except ValueError as e:
+                logger.error(f"Failed to compare embeddings: {str(e)}")
+                continue
+            for row, similarity in zip(rows, similarities):
+                scores[row.id] = float(similarity)
 
-                if similarity >= threshold:
-                    similar_corrections.append(correction)
-                    logger.info(f"Found similar correction (similarity: {similarity:.3f})")
+        return scores
 
-            except Exception as e:
-                logger.error(f"Failed to compare embeddings: {str(e)}")
+    @staticmethod
+    def encode_embedding(vector: Optional[List[float]]) -> Dict[str, Any]:
+        """Column values for storing an embedding in the configured format"""
+        if not vector:
+            return {"embedding_vector": None, "embedding_dtype": None, "embedding_scale": None}
 
-        return similar_corrections
+        dtype = settings.EMBEDDING_STORAGE_FORMAT
+        data, scale = quantize(vector, dtype)
+        return {"embedding_vector": data, "embedding_dtype": dtype, "embedding_scale": scale}
 
     def get_corrections_for_prompt(
         self,
         source_language: str,
         target_language: str,
-        max_tokens: int = None
+        max_tokens: int = None,
+        exclude: Iterable[str] = ()
     ) -> List[Dict[str, str]]:
         """
         Get corrections to include in translation prompt
 
+        Served from the cached correction index (most recently used first),
+        so building a prompt per sentence does not query the database.
+
         Args:
             source_language: Source language
             target_language: Target language
             max_tokens: Maximum tokens to include (default from settings)
+            exclude: Source texts already in the prompt (e.g. glossary terms)
 
         Returns:
             List of correction dicts with 'source' and 'translation' keys
@@ -152,31 +289,11 @@ class CorrectionService:
         if max_tokens is None:
             max_tokens = settings.CORRECTION_TOKEN_THRESHOLD
 
-        # Get recent corrections for this language pair
-        corrections = self.db.query(Correction).filter(
-            Correction.user_id == self.user.id,
-            Correction.source_language == source_language,
-            Correction.target_language == target_language
-        ).order_by(Correction.last_used_at.desc()).all()
-
-        # Estimate tokens and select corrections
-        selected = []
-        estimated_tokens = 0
-
-        for correction in corrections:
-            # Rough token estimation (1 token ≈ 4 characters for English, 1 for Chinese)
-            correction_tokens = (len(correction.source_text) + len(correction.corrected_translation)) // 3
-
-            if estimated_tokens + correction_tokens > max_tokens:
-                break
-
-            selected.append({
-                "source": correction.source_text,
-                "translation": correction.corrected_translation
-            })
-            estimated_tokens += correction_tokens
-
-        logger.info(f"Selected {len(selected)} corrections (~{estimated_tokens} tokens)")
+        index = correction_index_registry.get(
+            self.db, self.user.id, source_language, target_language
+        )
+        selected = index.prompt_examples(max_tokens, exclude)
+        logger.debug(f"Selected {len(selected)} corrections (budget ~{max_tokens} tokens)")
         return selected
 
     def update_correction_usage(self, correction_id: int):
@@ -190,6 +307,7 @@ class CorrectionService:
             correction.usage_count += 1
             correction.last_used_at = datetime.utcnow()
             self.db.commit()
+            correction_index_registry.on_used(correction)
 
     def delete_correction(self, correction_id: int) -> bool:
         """Delete a correction"""
@@ -201,6 +319,7 @@ class CorrectionService:
         if correction:
             self.db.delete(correction)
             self.db.commit()
+            correction_index_registry.on_deleted(correction)
             return True
 
         return False
@@ -222,22 +341,197 @@ class CorrectionService:
 
         return query.all()
 
+    def iter_corrections(
+        self,
+        source_language: Optional[str] = None,
+        target_language: Optional[str] = None,
+        include_embeddings: bool = False,
+        batch_size: int = 500
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Stream corrections as plain dicts using a server-side cursor
+
+        Embeddings, when requested, are emitted as base64 of little-endian
+        float32 bytes together with their dtype and dimension.
+        """
+        columns = [
+            Correction.id,
+            Correction.source_text,
+            Correction.corrected_translation,
+            Correction.source_language,
+            Correction.target_language,
+            Correction.created_at,
+            Correction.usage_count,
+            Correction.last_used_at,
+        ]
+        if include_embeddings:
+            columns.extend([
+                Correction.embedding_vector,
+                Correction.embedding_dtype,
+                Correction.embedding_scale,
+                Correction.embedding,
+            ])
+
+        query = self.db.query(*columns).filter(Correction.user_id == self.user.id)
+        if source_language:
+            query = query.filter(Correction.source_language == source_language)
+        if target_language:
+            query = query.filter(Correction.target_language == target_language)
+
+        query = query.order_by(Correction.id).execution_options(
+            stream_results=True, yield_per=batch_size
+        )
+
+        for row in query:
+            item = {
+                "id": row.id,
+                "source_text": row.source_text,
+                "corrected_translation": row.corrected_translation,
+                "source_language": row.source_language,
+                "target_language": row.target_language,
+                "created_at": row.created_at.isoformat() if row.created_at else None,
+                "usage_count": row.usage_count or 0,
+                "last_used_at": row.last_used_at.isoformat() if row.last_used_at else None,
+            }
+            if include_embeddings:
+                item.update(self._encode_embedding_for_export(row))
+            yield item
+
+    @staticmethod
+    def _encode_embedding_for_export(row) -> Dict[str, Any]:
+        """Emit the stored embedding bytes as base64"""
+        if row.embedding_vector is not None and row.embedding_dtype:
+            data = row.embedding_vector
+            dtype = row.embedding_dtype
+            scale = row.embedding_scale
+        elif row.embedding:
+            data = np.asarray(json.loads(row.embedding), dtype="<f4").tobytes()
+            dtype = "float32"
+            scale = 1.0
+        else:
+            return {
+                "embedding": None,
+                "embedding_dtype": None,
+                "embedding_scale": None,
+                "embedding_dim": None,
+            }
+
+        return {
+            "embedding": base64.b64encode(data).decode("ascii"),
+            "embedding_dtype": dtype,
+            "embedding_scale": scale,
+            "embedding_dim": len(data) // np.dtype(dtype).itemsize,
+        }
+
     async def import_corrections(
         self,
-        corrections_data: List[CorrectionCreate]
-    ) -> int:
+        corrections_data: List[CorrectionCreate],
+        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, int]:
         """
-        Import corrections from backup
+        Bulk import corrections from backup
+
+        The input is validated and de-duplicated, source texts are embedded
+        in concurrent batches, and rows are written with bulk INSERT
+        statements committed every IMPORT_INSERT_BATCH_SIZE rows.
+
+        Args:
+            corrections_data: Corrections to import
+            on_progress: Optional callback receiving the running stats dict
 
         Returns:
-            Number of corrections imported
+            Dict with 'total', 'imported', 'skipped' and 'failed' counts
         """
-        count = 0
-        for correction_data in corrections_data:
+        stats = {"total": len(corrections_data), "processed": 0, "imported": 0, "skipped": 0, "failed": 0}
+
+        def report(stage: str):
+            stats["stage"] = stage
+            if on_progress:
+                on_progress(dict(stats))
+
+        # Validate and de-duplicate within the payload (last occurrence wins)
+        unique: Dict[tuple, Dict[str, Any]] = {}
+        for item in corrections_data:
+            source_text = item.source_text.strip()
+            translation = item.corrected_translation.strip()
+            source_language = item.source_language.strip()
+            target_language = item.target_language.strip()
+            if not (source_text and translation and source_language and target_language):
+                stats["failed"] += 1
+                continue
+            key = (source_language, target_language, source_text)
+            if key in unique:
+                stats["skipped"] += 1
+            unique[key] = {
+                "user_id": self.user.id,
+                "source_text": source_text,
+                "corrected_translation": translation,
+                "source_language": source_language,
+                "target_language": target_language,
+                "history_id": item.history_id,
+                **self.encode_embedding(None),
+            }
+
+        # Drop entries that already exist verbatim
+        language_pairs = {(k[0], k[1]) for k in unique}
+        for source_language, target_language in language_pairs:
+            existing = self.db.query(
+                Correction.source_text, Correction.corrected_translation
+            ).filter(
+                Correction.user_id == self.user.id,
+                Correction.source_language == source_language,
+                Correction.target_language == target_language,
+            )
+            for source_text, translation in existing:
+                key = (source_language, target_language, source_text)
+                if key in unique and unique[key]["corrected_translation"] == translation:
+                    del unique[key]
+                    stats["skipped"] += 1
+        self.db.commit()
+
+        rows = list(unique.values())
+        stats["processed"] = stats["skipped"] + stats["failed"]
+        report("validated")
+
+        batch_size = max(1, settings.IMPORT_INSERT_BATCH_SIZE)
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+
+            if self.embedding_service:
+                try:
+                    vectors = await self.embedding_service.get_embeddings_batch(
+                        [row["source_text"] for row in batch]
+                    )
+                    for row, vector in zip(batch, vectors):
+                        row.update(self.encode_embedding(vector))
+                except Exception as e:
+                    logger.error(f"Failed to embed import batch: {str(e)}")
+
             try:
-                await self.create_correction(correction_data)
-                count += 1
+                result = self.db.execute(
+                    insert(Correction).returning(
+                        Correction.id, sort_by_parameter_order=True
+                    ),
+                    batch
+                )
+                ids = result.scalars().all()
+                self.db.commit()
+                stats["imported"] += len(batch)
+
+                for row, correction_id in zip(batch, ids):
+                    correction_index_registry.on_created(
+                        self.user.id,
+                        row["source_language"],
+                        row["target_language"],
+                        [(correction_id, row["source_text"], row["corrected_translation"])]
+                    )
             except Exception as e:
-                logger.error(f"Failed to import correction: {str(e)}")
+                self.db.rollback()
+                logger.error(f"Failed to insert import batch: {str(e)}")
+                stats["failed"] += len(batch)
+
+            stats["processed"] += len(batch)
+            report("importing")
 
-        return count
+        report("completed")
+        return stats
@@ -0,0 +1,226 @@
+import hashlib
+import logging
+import re
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import func, select
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models import EmbeddingCacheEntry
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """
+    Persistent embedding cache keyed by (model, dimension, normalized text hash)
+
+    A small in-process LRU sits in front of the `embedding_cache` table so hot
+    sentences never touch the database. The table itself is capped at
+    `max_entries` rows and evicts the least recently used entries.
+    """
+
+    def __init__(self, max_entries: int = 100000, memory_entries: int = 2000):
+        """
+        Args:
+            max_entries: Maximum number of rows kept in the database
+            memory_entries: Maximum number of vectors kept in process memory
+        """
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._row_count: Optional[int] = None
+
+        # Metrics
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def normalize_text(text: str) -> str:
+        """Normalize text so trivially different strings share one entry"""
+        text = unicodedata.normalize("NFC", text)
+        return re.sub(r"\s+", " ", text).strip()
+
+    @staticmethod
+    def make_key(model: str, dimension: int, text: str) -> str:
+        """Build cache key for a (model, dimension, text) triple"""
+        normalized = EmbeddingCache.normalize_text(text)
+        raw = f"{model}\x00{dimension}\x00{normalized}".encode("utf-8")
+        return hashlib.sha256(raw).hexdigest()
+
+    @staticmethod
+    def _pack(embedding: List[float]) -> bytes:
+        return np.asarray(embedding, dtype="<f4").tobytes()
+
+    @staticmethod
+    def _unpack(data: bytes) -> List[float]:
+        return np.frombuffer(data, dtype="<f4").tolist()
+
+    @staticmethod
+    def _chunks(keys: List[str], size: int = 500):
+        """Split keys so IN clauses stay below SQLite's variable limit"""
+        for i in range(0, len(keys), size):
+            yield keys[i:i + size]
+
+    def _remember(self, key: str, embedding: List[float]):
+        """Insert into the in-process LRU"""
+        self._memory[key] = embedding
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, model: str, dimension: int, text: str) -> Optional[List[float]]:
+        """Return cached embedding or None"""
+        return self.get_many(model, dimension, [text]).get(text)
+
+    def get_many(self, model: str, dimension: int, texts: List[str]) -> Dict[str, List[float]]:
+        """
+        Look up embeddings for several texts at once
+
+        Returns:
+            Dict mapping each cached text to its embedding (misses are absent)
+        """
+        found: Dict[str, List[float]] = {}
+        pending: Dict[str, List[str]] = {}
+
+        for text in texts:
+            key = self.make_key(model, dimension, text)
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                found[text] = self._memory[key]
+                self.memory_hits += 1
+            else:
+                pending.setdefault(key, []).append(text)
+
+        if not pending:
+            return found
+
+        db = SessionLocal()
+        try:
+            rows = []
+            for keys in self._chunks(list(pending.keys())):
+                rows.extend(db.query(EmbeddingCacheEntry).filter(
+                    EmbeddingCacheEntry.cache_key.in_(keys)
+                ).all())
+
+            now = datetime.utcnow()
+            for row in rows:
+                embedding = self._unpack(row.embedding)
+                row.last_used_at = now
+                row.hit_count = (row.hit_count or 0) + 1
+                self._remember(row.cache_key, embedding)
+                for text in pending.pop(row.cache_key):
+                    found[text] = embedding
+                    self.db_hits += 1
+
+            if rows:
+                db.commit()
+        except Exception as e:
+            logger.error(f"Embedding cache lookup failed: {str(e)}")
+            db.rollback()
+        finally:
+            db.close()
+
+        self.misses += sum(len(t) for t in pending.values())
+        return found
+
+    def set(self, model: str, dimension: int, text: str, embedding: List[float]):
+        """Store a single embedding"""
+        self.set_many(model, dimension, {text: embedding})
+
+    def set_many(self, model: str, dimension: int, embeddings: Dict[str, List[float]]):
+        """Store several embeddings, evicting old entries if over capacity"""
+        entries = {}
+        for text, embedding in embeddings.items():
+            if not embedding:
+                continue
+            key = self.make_key(model, dimension, text)
+            self._remember(key, embedding)
+            entries[key] = embedding
+
+        if not entries:
+            return
+
+        db = SessionLocal()
+        try:
+            existing = set()
+            for keys in self._chunks(list(entries.keys())):
+                existing.update(
+                    key for (key,) in db.query(EmbeddingCacheEntry.cache_key).filter(
+                        EmbeddingCacheEntry.cache_key.in_(keys)
+                    )
+                )
+            new_rows = [
+                EmbeddingCacheEntry(
+                    cache_key=key,
+                    model=model,
+                    dimension=dimension,
+                    embedding=self._pack(embedding),
+                )
+                for key, embedding in entries.items()
+                if key not in existing
+            ]
+            db.add_all(new_rows)
+            db.commit()
+
+            if self._row_count is None:
+                self._row_count = db.query(func.count(EmbeddingCacheEntry.id)).scalar() or 0
+            else:
+                self._row_count += len(new_rows)
+
+            if self._row_count > self.max_entries:
+                self._evict(db)
+        except Exception as e:
+            logger.error(f"Embedding cache store failed: {str(e)}")
+            db.rollback()
+        finally:
+            db.close()
+
+    def _evict(self, db):
+        """Delete least recently used rows down to 90% of capacity"""
+        target = int(self.max_entries * 0.9)
+        excess = self._row_count - target
+        if excess <= 0:
+            return
+
+        stale_ids = (
+            select(EmbeddingCacheEntry.id)
+            .order_by(EmbeddingCacheEntry.last_used_at.asc(), EmbeddingCacheEntry.id.asc())
+            .limit(excess)
+        )
+        deleted = db.query(EmbeddingCacheEntry).filter(
+            EmbeddingCacheEntry.id.in_(stale_ids.scalar_subquery())
+        ).delete(synchronize_session=False)
+        db.commit()
+
+        self.evictions += deleted
+        self._row_count -= deleted
+        logger.info(f"Embedding cache evicted {deleted} entries")
+
+    def stats(self) -> Dict[str, float]:
+        """Hit-rate metrics"""
+        hits = self.memory_hits + self.db_hits
+        lookups = hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "memory_entries": len(self._memory),
+            "db_entries": self._row_count,
+            "max_entries": self.max_entries,
+        }
+
+
+embedding_cache = EmbeddingCache(
+    max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES,
+    memory_entries=settings.EMBEDDING_CACHE_MEMORY_ENTRIES,
+)
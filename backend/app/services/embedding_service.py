@@ -1,27 +1,119 @@
+import asyncio
 import httpx
-import json
 import logging
 import numpy as np
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
-from ..utils import retry_on_failure
-from ..utils.limiter import embedding_limiter
+from ..config import settings
+from ..utils import RetryPolicy
+from ..utils.circuit_breaker import circuit_breakers
+from ..utils.deadline import request_timeout
+from ..utils.limiter import embedding_limiters, estimate_tokens
+from .embedding_cache import EmbeddingCache, embedding_cache
 
 logger = logging.getLogger(__name__)
 
+embedding_retry_policy = RetryPolicy(
+    "embedding",
+    max_retries=settings.EMBEDDING_MAX_RETRIES,
+    base_delay=settings.RETRY_BASE_DELAY,
+    max_delay=settings.RETRY_MAX_DELAY,
+    max_retry_after=settings.RETRY_MAX_RETRY_AFTER,
+)
+
+
+class GeminiEmbeddingAdapter:
+    """Request/response format for Gemini `batchEmbedContents`"""
+
+    # Gemini rejects batches with more than 100 requests
+    max_batch_size = 100
+
+    def __init__(self, api_base: str, api_key: str, model: str):
+        self.api_base = api_base
+        self.api_key = api_key
+        self.model = model
+
+    def build_request(self, texts: List[str]) -> Tuple[str, Dict[str, str], Dict[str, Any]]:
+        # Gemini API uses API key as query parameter
+        url = f"{self.api_base}/models/{self.model}:batchEmbedContents?key={self.api_key}"
+        headers = {"Content-Type": "application/json"}
+        payload = {
+            "requests": [
+                {
+                    "model": f"models/{self.model}",
+                    "content": {"parts": [{"text": text}]}
+                }
+                for text in texts
+            ]
+        }
+        return url, headers, payload
+
+    @staticmethod
+    def parse_response(result: Dict[str, Any]) -> List[List[float]]:
+        return [item.get("values", []) for item in result.get("embeddings", [])]
 
-class EmbeddingService:
-    """Service for text embedding using Gemini API"""
 
-    def __init__(self, api_base: str, api_key: str, model: str = "text-embedding-004"):
+class OpenAIEmbeddingAdapter:
+    """Request/response format for OpenAI-compatible `/embeddings`"""
+
+    # OpenAI accepts up to 2048 inputs; most compatible providers accept far fewer
+    max_batch_size = 64
+
+    def __init__(self, api_base: str, api_key: str, model: str):
+        self.api_base = api_base
+        self.api_key = api_key
+        self.model = model
+
+    def build_request(self, texts: List[str]) -> Tuple[str, Dict[str, str], Dict[str, Any]]:
+        url = f"{self.api_base}/embeddings"
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
+        payload = {"model": self.model, "input": texts}
+        return url, headers, payload
+
+    @staticmethod
+    def parse_response(result: Dict[str, Any]) -> List[List[float]]:
+        data = sorted(result.get("data", []), key=lambda item: item.get("index", 0))
+        return [item.get("embedding", []) for item in data]
+
+
+class EmbeddingService:
+    """Service for text embedding (supports Gemini and OpenAI formats)"""
+
+    def __init__(
+        self,
+        api_base: str,
+        api_key: str,
+        model: str = "text-embedding-004",
+        dimension: int = 768,
+        cache: Optional[EmbeddingCache] = embedding_cache,
+        rate_limits: Optional[Dict[str, int]] = None
+    ):
         self.api_base = api_base.rstrip("/")
         self.api_key = api_key
         self.model = model
+        self.dimension = dimension
+        self.cache = cache
+        self.rate_limits = rate_limits
+        self.breaker = circuit_breakers.get(self.api_base, model)
+        self.adapter = self._create_adapter()
+
+    def _create_adapter(self):
+        """Pick request format based on api_base or model"""
+        model = self.model.lower()
+        if (
+            'generativelanguage.googleapis.com' in self.api_base
+            or 'gemini' in model
+            or model in ("text-embedding-004", "embedding-001")
+        ):
+            return GeminiEmbeddingAdapter(self.api_base, self.api_key, self.model)
+        return OpenAIEmbeddingAdapter(self.api_base, self.api_key, self.model)
 
-    @retry_on_failure(max_retries=3, delays=[2, 4, 8])
     async def get_embedding(self, text: str) -> List[float]:
         """
-        Get embedding vector for text
+        Get embedding vector for text, served from cache when possible
 
         Args:
             text: Text to embed
@@ -29,53 +121,82 @@ class EmbeddingService:
         Returns:
             Embedding vector as list of floats
         """
-        async with embedding_limiter:
-            headers = {
-                "Content-Type": "application/json",
-            }
-
-            payload = {
-                "model": f"models/{self.model}",
-                "content": {
-                    "parts": [{"text": text}]
-                }
-            }
-
-            # Gemini API uses API key as query parameter
-            url = f"{self.api_base}/models/{self.model}:embedContent?key={self.api_key}"
-
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    url,
-                    headers=headers,
-                    json=payload
-                )
-                response.raise_for_status()
-                result = response.json()
-
-            # Extract embedding from response
-            embedding = result.get("embedding", {}).get("values", [])
-            return embedding
+        embeddings = await self.get_embeddings_batch([text])
+        return embeddings[0]
 
-    @retry_on_failure(max_retries=3, delays=[2, 4, 8])
     async def get_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
         """
         Get embeddings for multiple texts
 
+        Cached texts are served locally; the rest are de-duplicated, split into
+        chunks of the provider's maximum batch size and requested concurrently.
+
         Args:
             texts: List of texts to embed
 
         Returns:
-            List of embedding vectors
+            List of embedding vectors (same order as texts)
         """
-        # Gemini API doesn't support batch embedding in a single call
-        # We need to call multiple times
-        embeddings = []
-        for text in texts:
-            embedding = await self.get_embedding(text)
-            embeddings.append(embedding)
-
-        return embeddings
+        if not texts:
+            return []
+
+        found: Dict[str, List[float]] = {}
+        if self.cache:
+            found = self.cache.get_many(self.model, self.dimension, texts)
+
+        missing = list(dict.fromkeys(t for t in texts if t not in found))
+        if missing:
+            chunk_size = max(1, min(self.adapter.max_batch_size, settings.EMBEDDING_BATCH_SIZE))
+            chunks = [missing[i:i + chunk_size] for i in range(0, len(missing), chunk_size)]
+            semaphore = asyncio.Semaphore(max(1, settings.EMBEDDING_BATCH_CONCURRENCY))
+
+            async def run_chunk(chunk: List[str]) -> List[List[float]]:
+                async with semaphore:
+                    return await self._request_batch(chunk)
+
+            results = await asyncio.gather(*(run_chunk(chunk) for chunk in chunks))
+
+            fetched: Dict[str, List[float]] = {}
+            for chunk, embeddings in zip(chunks, results):
+                fetched.update(zip(chunk, embeddings))
+
+            if self.cache:
+                self.cache.set_many(self.model, self.dimension, fetched)
+            found.update(fetched)
+
+        return [found.get(text, []) for text in texts]
+
+    @embedding_retry_policy
+    async def _request_batch(self, texts: List[str]) -> List[List[float]]:
+        """Call the embedding API once for a chunk of texts"""
+        embedding_limiter = await embedding_limiters.get(self.api_base, self.api_key, self.rate_limits)
+        tokens = sum(estimate_tokens(t) for t in texts)
+        async with self.breaker.guard(), embedding_limiter.reserve(tokens) as slot:
+            url, headers, payload = self.adapter.build_request(texts)
+
+            timeout = request_timeout(
+                settings.EMBEDDING_TIMEOUT_BASE,
+                settings.EMBEDDING_TIMEOUT_PER_1K_TOKENS,
+                tokens / 1000,
+                settings.EMBEDDING_TIMEOUT_MAX,
+            )
+            async with httpx.AsyncClient(timeout=timeout) as client:
+                response = await client.post(
+                    url,
+                    headers=headers,
+                    json=payload
+                )
+                await embedding_limiter.observe(response.status_code, response.headers)
+                response.raise_for_status()
+                result = response.json()
+
+            slot.record_usage(result.get("usage"))
+            embeddings = self.adapter.parse_response(result)
+            if len(embeddings) != len(texts):
+                raise ValueError(
+                    f"Embedding API returned {len(embeddings)} vectors for {len(texts)} texts"
+                )
+            return embeddings
 
     @staticmethod
     def cosine_similarity(vec1: List[float], vec2: List[float]) -> float:
@@ -19,6 +19,18 @@ logger = logging.getLogger(__name__)
 class ExportService:
     """Service for exporting translations to various formats"""
 
+    @staticmethod
+    def page_label(pair: Dict[str, Any]) -> str:
+        """' (p. 3)', ' (pp. 3-4)' or ' (pp. 3, 7)' for pairs that carry page numbers, else ''"""
+        pages = sorted(set(pair.get("page_numbers") or []))
+        if not pages:
+            return ""
+        if len(pages) == 1:
+            return f" (p. {pages[0]})"
+        if pages[-1] - pages[0] == len(pages) - 1:
+            return f" (pp. {pages[0]}-{pages[-1]})"
+        return f" (pp. {', '.join(str(page) for page in pages)})"
+
     @staticmethod
     def export_to_markdown(
         sentences: List[Dict[str, str]],
@@ -43,7 +55,7 @@ class ExportService:
         ]
 
         for idx, pair in enumerate(sentences, 1):
-            lines.append(f"## {idx}\n\n")
+            lines.append(f"## {idx}{ExportService.page_label(pair)}\n\n")
             lines.append(f"**{source_language}:**\n\n")
             lines.append(f"{pair['source']}\n\n")
             lines.append(f"**{target_language}:**\n\n")
@@ -95,7 +107,7 @@ class ExportService:
             # Sequential format
             lines = []
             for idx, pair in enumerate(sentences, 1):
-                lines.append(f"[{idx}]\n")
+                lines.append(f"[{idx}]{ExportService.page_label(pair)}\n")
                 lines.append(f"Source: {pair['source']}\n")
                 lines.append(f"Translation: {pair['translation']}\n")
                 lines.append("\n")
@@ -131,7 +143,7 @@ class ExportService:
         # Add each translation pair
         for idx, pair in enumerate(sentences, 1):
             # Add section number
-            heading = doc.add_heading(f"Section {idx}", level=2)
+            heading = doc.add_heading(f"Section {idx}{ExportService.page_label(pair)}", level=2)
 
             # Add source text
             source_para = doc.add_paragraph()
@@ -199,7 +211,7 @@ class ExportService:
         # Add content
         for idx, pair in enumerate(sentences, 1):
             # Section heading
-            section_heading = Paragraph(f"Section {idx}", heading_style)
+            section_heading = Paragraph(f"Section {idx}{ExportService.page_label(pair)}", heading_style)
             story.append(section_heading)
 
             # Create table for parallel display
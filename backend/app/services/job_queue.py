@@ -0,0 +1,304 @@
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models import History, Job, JobStatus, TaskStatus
+from ..utils.circuit_breaker import CircuitOpenError
+from ..utils.deadline import DeadlineExceeded
+from ..utils.retry import RetryError, classify_error
+from .scheduler import scheduler
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[Job], Awaitable[None]]
+
+# kind -> coroutine that runs one job; filled in by the routers that own the work
+_handlers: Dict[str, JobHandler] = {}
+
+
+def _root_error(error: BaseException) -> BaseException:
+    """The error behind a RetryError (the last attempt's), else error itself"""
+    if isinstance(error, RetryError) and error.last_exception is not None:
+        return error.last_exception
+    return error
+
+
+def job_error_retryable(error: BaseException) -> bool:
+    """
+    Whether running a failed job again later can help
+
+    Transient provider errors are (also once a call's own retries or the
+    job's retry budget ran out), as are open circuits and deadlines; bad
+    input and configuration errors are not.
+    """
+    error = _root_error(error)
+    if isinstance(error, (CircuitOpenError, DeadlineExceeded)):
+        # classify_error calls open circuits final for the call, not the job
+        return True
+    retryable, _ = classify_error(error)
+    return retryable
+
+
+def job_handler(kind: str):
+    """Register the function that runs jobs of `kind` in the worker"""
+    def decorator(func: JobHandler) -> JobHandler:
+        _handlers[kind] = func
+        return func
+    return decorator
+
+
+def get_handler(kind: str) -> Optional[JobHandler]:
+    return _handlers.get(kind)
+
+
+def job_kinds() -> List[str]:
+    return list(_handlers)
+
+
+class JobQueue:
+    """
+    Durable job queue on the application database
+
+    Leasing is a compare-and-set UPDATE on one row, so any number of worker
+    processes (on any host sharing the database) can poll the same table
+    without taking a job twice; the FairShareScheduler decides the order.
+    A lease lasts JOB_VISIBILITY_TIMEOUT_SECONDS and is renewed by
+    heartbeats; expired leases make the job visible again.
+    """
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+
+    @staticmethod
+    def _leasable(now: datetime):
+        """Queued jobs that are due, and running jobs whose worker stopped heartbeating"""
+        return or_(
+            and_(Job.status == JobStatus.QUEUED, Job.available_at <= now),
+            and_(Job.status == JobStatus.RUNNING, Job.lease_expires_at < now),
+        )
+
+    def enqueue(
+        self,
+        db: Session,
+        kind: str,
+        user_id: int,
+        history_id: Optional[int] = None,
+        payload: Optional[Dict[str, Any]] = None,
+        cost: int = 1,
+        priority: Optional[int] = None,
+        max_attempts: Optional[int] = None,
+        tokens: int = 0,
+        delay_seconds: float = 0
+    ) -> Job:
+        """
+        Add a job; committed with the caller's session
+
+        Args:
+            cost: Pages or sentences to process, used for scheduling and ETAs
+            priority: JobPriority; by default derived from cost
+            tokens: Estimated API tokens, counted by admission control
+            delay_seconds: Not leased before this many seconds (deferred admission)
+        """
+        job = Job(
+            kind=kind,
+            user_id=user_id,
+            history_id=history_id,
+            payload=json.dumps(payload or {}, ensure_ascii=False),
+            status=JobStatus.QUEUED,
+            cost=cost,
+            priority=priority,
+            max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+            tokens=tokens,
+            available_at=datetime.utcnow() + timedelta(seconds=delay_seconds),
+        )
+        scheduler.tag(db, job)
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        logger.info(
+            f"任务已入队: job_id={job.id}, kind={kind}, history_id={history_id}, "
+            f"cost={job.cost}, priority={job.priority}"
+        )
+        return job
+
+    def lease(self, worker_id: str, kinds: List[str]) -> Optional[Job]:
+        """
+        Take the next available job of the given kinds, in scheduler order
+
+        Returns:
+            The leased job (detached from any session), or None
+        """
+        db = self.session_factory()
+        try:
+            now = datetime.utcnow()
+            for job_id in scheduler.candidates(db, kinds, self._leasable(now), now):
+                claimed = db.query(Job).filter(Job.id == job_id, self._leasable(now)).update(
+                    {
+                        Job.status: JobStatus.RUNNING,
+                        Job.lease_owner: worker_id,
+                        Job.lease_expires_at: now + timedelta(seconds=settings.JOB_VISIBILITY_TIMEOUT_SECONDS),
+                        Job.heartbeat_at: now,
+                        Job.started_at: now,
+                        Job.attempts: Job.attempts + 1,
+                    },
+                    synchronize_session=False,
+                )
+                db.commit()
+                if not claimed:
+                    # Another worker was faster
+                    continue
+
+                job = db.query(Job).filter(Job.id == job_id).first()
+                if job.attempts > job.max_attempts:
+                    # Lease expired on the last attempt: its worker kept dying
+                    self._give_up(db, job, job.last_error or "Worker lost the job too many times")
+                    continue
+
+                db.expunge(job)
+                return job
+            return None
+        finally:
+            db.close()
+
+    def heartbeat(self, job_id: int, worker_id: str) -> bool:
+        """Extend a lease; False if the worker no longer holds it"""
+        db = self.session_factory()
+        try:
+            now = datetime.utcnow()
+            renewed = db.query(Job).filter(
+                Job.id == job_id,
+                Job.lease_owner == worker_id,
+                Job.status == JobStatus.RUNNING,
+            ).update(
+                {
+                    Job.lease_expires_at: now + timedelta(seconds=settings.JOB_VISIBILITY_TIMEOUT_SECONDS),
+                    Job.heartbeat_at: now,
+                },
+                synchronize_session=False,
+            )
+            db.commit()
+            return bool(renewed)
+        finally:
+            db.close()
+
+    def complete(self, job_id: int, worker_id: str):
+        self._finish(job_id, worker_id, {Job.status: JobStatus.SUCCEEDED, Job.last_error: None})
+
+    def fail(self, job_id: int, worker_id: str, error: BaseException):
+        """Requeue with backoff, or give up after max_attempts"""
+        db = self.session_factory()
+        try:
+            job = db.query(Job).filter(Job.id == job_id, Job.lease_owner == worker_id).first()
+            if job is None:
+                return
+            message = f"{type(error).__name__}: {str(error)}"
+            if not self.will_retry(job, error):
+                self._give_up(db, job, message)
+                return
+
+            delay = settings.JOB_RETRY_DELAY_SECONDS * 2 ** (job.attempts - 1)
+            root = _root_error(error)
+            if isinstance(root, CircuitOpenError):
+                # No point leasing the job again before the circuit may close
+                delay = max(delay, root.retry_after)
+            job.status = JobStatus.QUEUED
+            job.available_at = datetime.utcnow() + timedelta(seconds=delay)
+            job.lease_owner = None
+            job.lease_expires_at = None
+            job.last_error = message
+            db.commit()
+            logger.warning(f"任务 {job_id} 第 {job.attempts} 次执行失败，{delay:.0f} 秒后重试: {message}")
+        finally:
+            db.close()
+
+    @staticmethod
+    def will_retry(job: Job, error: BaseException) -> bool:
+        """Whether fail() will requeue the job after this error (handlers use it to set History status)"""
+        return job.attempts < job.max_attempts and job_error_retryable(error)
+
+    def release(self, job_id: int, worker_id: str):
+        """Give a job back without counting the attempt (worker shutting down)"""
+        db = self.session_factory()
+        try:
+            db.query(Job).filter(
+                Job.id == job_id, Job.lease_owner == worker_id, Job.status == JobStatus.RUNNING
+            ).update(
+                {
+                    Job.status: JobStatus.QUEUED,
+                    Job.available_at: datetime.utcnow(),
+                    Job.lease_owner: None,
+                    Job.lease_expires_at: None,
+                    Job.attempts: Job.attempts - 1,
+                },
+                synchronize_session=False,
+            )
+            db.commit()
+            logger.info(f"任务 {job_id} 已归还队列")
+        finally:
+            db.close()
+
+    def cancel(self, db: Session, history_id: int, kind: Optional[str] = None) -> int:
+        """Cancel queued (not yet running) jobs of a history entry"""
+        query = db.query(Job).filter(Job.history_id == history_id, Job.status == JobStatus.QUEUED)
+        if kind is not None:
+            query = query.filter(Job.kind == kind)
+        cancelled = query.update(
+            {Job.status: JobStatus.CANCELLED, Job.finished_at: datetime.utcnow()},
+            synchronize_session=False,
+        )
+        db.commit()
+        return cancelled
+
+    def queue_info(self, db: Session, history_id: int) -> Dict[str, Any]:
+        """Queue position and ETA of a history entry's queued job ({} if none)"""
+        return scheduler.queue_info(db, history_id)
+
+    def _finish(self, job_id: int, worker_id: str, values: Dict[Any, Any]):
+        db = self.session_factory()
+        try:
+            values[Job.finished_at] = datetime.utcnow()
+            values[Job.lease_expires_at] = None
+            db.query(Job).filter(Job.id == job_id, Job.lease_owner == worker_id).update(
+                values, synchronize_session=False
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    @staticmethod
+    def _give_up(db: Session, job: Job, message: str):
+        """Mark a job (and its history entry, if unfinished) as failed"""
+        job.status = JobStatus.FAILED
+        job.last_error = message
+        job.lease_expires_at = None
+        job.finished_at = datetime.utcnow()
+        if job.history_id is not None:
+            history = db.query(History).filter(History.id == job.history_id).first()
+            if history is not None and history.status not in (TaskStatus.COMPLETED, TaskStatus.FAILED):
+                history.status = TaskStatus.FAILED
+                history.error_message = message
+        db.commit()
+        logger.error(f"任务 {job.id} 在 {job.attempts} 次尝试后失败: {message}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Job counts by kind and status, for /metrics"""
+        db = self.session_factory()
+        try:
+            rows = db.query(Job.kind, Job.status, func.count(Job.id)).filter(
+                Job.status.in_([JobStatus.QUEUED, JobStatus.RUNNING])
+            ).group_by(Job.kind, Job.status).all()
+            counts: Dict[str, Dict[str, int]] = {}
+            for kind, status, count in rows:
+                counts.setdefault(kind, {})[status.value] = count
+            return counts
+        finally:
+            db.close()
+
+
+job_queue = JobQueue()
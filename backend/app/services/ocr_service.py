@@ -2,32 +2,86 @@ import httpx
 import base64
 import json
 import logging
-from typing import List, Dict, Any, Optional, AsyncGenerator
+from typing import List, Dict, Any, Optional, AsyncGenerator, Tuple
 from pathlib import Path
 from PIL import Image
 import io
 
 from ..config import settings
-from ..utils import retry_on_failure, SentenceSplitter
-from ..utils.limiter import ocr_limiter
+from ..utils import APIError, RetryPolicy, SentenceSplitter
+from ..utils.circuit_breaker import circuit_breakers
+from ..utils.deadline import request_timeout
+from ..utils.hedging import Hedger
+from ..utils.limiter import APILimiter, ocr_limiters, estimate_image_tokens, estimate_tokens, parse_duration
 
 logger = logging.getLogger(__name__)
 
+ocr_retry_policy = RetryPolicy(
+    "ocr",
+    max_retries=settings.OCR_MAX_RETRIES,
+    base_delay=settings.RETRY_BASE_DELAY,
+    max_delay=settings.RETRY_MAX_DELAY,
+    max_retry_after=settings.RETRY_MAX_RETRY_AFTER,
+)
+
+# Hedging state per (api_base, model): latencies of one provider say nothing about another
+_hedgers: Dict[Tuple[str, str], Hedger] = {}
+
+
+def get_hedger(api_base: str, model: str) -> Hedger:
+    key = (api_base, model)
+    if key not in _hedgers:
+        _hedgers[key] = Hedger(
+            f"ocr {api_base} [{model}]",
+            enabled=settings.OCR_HEDGE_ENABLED,
+            percentile=settings.OCR_HEDGE_PERCENTILE,
+            min_delay=settings.OCR_HEDGE_MIN_DELAY,
+            budget_ratio=settings.OCR_HEDGE_BUDGET_RATIO,
+            min_samples=settings.OCR_HEDGE_MIN_SAMPLES,
+        )
+    return _hedgers[key]
+
+
+def hedging_metrics() -> Dict[str, Dict[str, Any]]:
+    """Counters of every OCR hedger"""
+    return {hedger.name: hedger.metrics() for hedger in _hedgers.values()}
+
 
 class OCRService:
     """Service for OCR operations using multimodal LLMs"""
 
-    def __init__(self, api_base: str, api_key: str, model: str = "deepseek-ai/deepseek-vl2"):
+    # Completion budget per page; dense pages can use most of it
+    max_tokens = 8000
+
+    def __init__(
+        self,
+        api_base: str,
+        api_key: str,
+        model: str = "deepseek-ai/deepseek-vl2",
+        rate_limits: Optional[Dict[str, int]] = None
+    ):
         self.api_base = api_base.rstrip("/")
         self.api_key = api_key
         self.model = model
+        self.rate_limits = rate_limits
+        self.breaker = circuit_breakers.get(self.api_base, model)
+        self.hedger = get_hedger(self.api_base, model)
 
     def _encode_image(self, image_path: str) -> str:
         """Encode image to base64"""
         with open(image_path, "rb") as image_file:
             return base64.b64encode(image_file.read()).decode("utf-8")
 
-    @retry_on_failure(max_retries=settings.OCR_MAX_RETRIES, delays=settings.retry_delays)
+    def _estimate_tokens(self, image_path: str) -> int:
+        """Worst-case tokens for one page: image patches + prompt + full completion budget"""
+        try:
+            with Image.open(image_path) as image:
+                image_tokens = estimate_image_tokens(*image.size)
+        except Exception:
+            image_tokens = estimate_image_tokens(1024, 1024)
+        return image_tokens + estimate_tokens("Please extract all text from this image.") + self.max_tokens
+
+    @ocr_retry_policy
     async def ocr_single_image(self, image_path: str) -> Dict[str, Any]:
         """
         Perform OCR on a single image using multimodal LLM
@@ -38,8 +92,17 @@ class OCRService:
         Returns:
             Dict with 'text' and optional 'confidence'
         """
-        # Use rate limiter to control API calls
-        async with ocr_limiter:
+        # Use rate limiter to control API calls (scoped to this API key)
+        ocr_limiter = await ocr_limiters.get(self.api_base, self.api_key, self.rate_limits)
+        # Slow pages get a duplicate request, but only if the limiter has room for it
+        return await self.hedger.run(
+            lambda: self._ocr_attempt(image_path, ocr_limiter),
+            can_hedge=ocr_limiter.has_headroom
+        )
+
+    async def _ocr_attempt(self, image_path: str, ocr_limiter: APILimiter) -> Dict[str, Any]:
+        """One OCR request, admitted by the circuit breaker and rate limiter"""
+        async with self.breaker.guard(), ocr_limiter.reserve(self._estimate_tokens(image_path)) as slot:
             try:
                 # Encode image
                 logger.info(f"Encoding image: {image_path}")
@@ -92,7 +155,7 @@ class OCRService:
                 payload = {
                     "model": self.model,
                     "messages": messages,
-                    "max_tokens": 8000,
+                    "max_tokens": self.max_tokens,
                     "temperature": 0.1,
                 }
 
@@ -109,8 +172,15 @@ class OCRService:
                 logger.info(f"Temperature: {payload['temperature']}")
                 logger.info("-" * 60)
 
-                # Increase timeout to 180 seconds for large images
-                async with httpx.AsyncClient(timeout=180.0) as client:
+                # Larger images take longer; never wait past the page/job deadline
+                timeout = request_timeout(
+                    settings.OCR_TIMEOUT_BASE,
+                    settings.OCR_TIMEOUT_PER_MB,
+                    image_size / (1024 * 1024),
+                    settings.OCR_TIMEOUT_MAX,
+                )
+                logger.info(f"Request timeout: {timeout:.0f} seconds")
+                async with httpx.AsyncClient(timeout=timeout) as client:
                     logger.info("正在发送请求到硅基流动 API...")
                     logger.info(f"请求 URL: {self.api_base}/chat/completions")
 
@@ -126,6 +196,7 @@ class OCRService:
                     )
 
                     elapsed_time = time.time() - start_time
+                    await ocr_limiter.observe(response.status_code, response.headers)
                     logger.info("-" * 60)
                     logger.info(f"API 响应状态码: {response.status_code}")
                     logger.info(f"API 响应时间: {elapsed_time:.2f} 秒")
@@ -137,7 +208,11 @@ class OCRService:
                     if response.status_code != 200:
                         error_text = response.text
                         logger.error(f"OCR API error response: {error_text}")
-                        raise Exception(f"OCR API error: {response.status_code} - {error_text}")
+                        raise APIError(
+                            f"OCR API error: {response.status_code} - {error_text}",
+                            status_code=response.status_code,
+                            retry_after=parse_duration(response.headers.get("retry-after")),
+                        )
 
                     response.raise_for_status()
                     result = response.json()
@@ -146,6 +221,7 @@ class OCRService:
 
                     if "usage" in result:
                         logger.info(f"Token 使用情况: {result['usage']}")
+                        slot.record_usage(result["usage"])
 
                 # Extract text from response
                 if "choices" not in result:
@@ -192,14 +268,25 @@ class OCRService:
                 }
 
             except httpx.TimeoutException as e:
-                logger.error(f"OCR timeout error after 180s: {str(e)}")
+                logger.error(f"OCR timeout error after {timeout:.0f}s: {str(e)}")
                 logger.error(f"API endpoint: {self.api_base}/chat/completions")
                 logger.error(f"Image size: {image_size/1024:.2f} KB")
-                raise Exception(f"OCR request timeout after 180 seconds. Image might be too large.")
+                raise APIError(
+                    f"OCR request timeout after {timeout:.0f} seconds. Image might be too large.", retryable=True
+                ) from e
+            except httpx.TransportError as e:
+                logger.error(f"OCR connection error: {type(e).__name__}: {str(e)}")
+                raise APIError(f"OCR connection error: {type(e).__name__}: {str(e)}", retryable=True) from e
             except httpx.HTTPStatusError as e:
                 logger.error(f"OCR HTTP error: {e.response.status_code}")
                 logger.error(f"Response text: {e.response.text}")
-                raise Exception(f"OCR HTTP error: {e.response.status_code} - {e.response.text}")
+                raise APIError(
+                    f"OCR HTTP error: {e.response.status_code} - {e.response.text}",
+                    status_code=e.response.status_code,
+                    retry_after=parse_duration(e.response.headers.get("retry-after")),
+                ) from e
+            except APIError:
+                raise
             except KeyError as e:
                 logger.error(f"OCR response parsing error: {str(e)}")
                 if 'result' in locals():
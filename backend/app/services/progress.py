@@ -0,0 +1,111 @@
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models import History, TaskStatus
+from ..utils.coordination import job_control
+
+logger = logging.getLogger(__name__)
+
+
+# Fields mirrored to the live view
+LIVE_FIELDS = ("current_page", "total_pages", "progress_message")
+
+
+def _live_key(history_id: int) -> str:
+    return f"progress:{history_id}"
+
+
+class ProgressReporter:
+    """
+    Coalesces one job's progress writes to its History row
+
+    update() only buffers; the buffered fields are written in one commit
+    every PROGRESS_FLUSH_ITEMS items or PROGRESS_FLUSH_SECONDS seconds,
+    and at once on state transitions. Values may be callables, evaluated
+    at flush time (e.g. serializing results). Between flushes the current
+    position and message are published to the live view (the coordination
+    backend, at most every PROGRESS_LIVE_SECONDS), which status endpoints
+    read instead of the database.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        history: History,
+        every_items: Optional[int] = None,
+        every_seconds: Optional[float] = None
+    ):
+        self.db = db
+        self.history = history
+        self.every_items = every_items or settings.PROGRESS_FLUSH_ITEMS
+        self.every_seconds = settings.PROGRESS_FLUSH_SECONDS if every_seconds is None else every_seconds
+        self._pending: Dict[str, Any] = {}
+        self._items = 0
+        self._flushed_at = time.monotonic()
+        self._published_at = 0.0
+        self._live = {name: getattr(history, name) for name in LIVE_FIELDS}
+
+    async def update(self, item_done: bool = False, **fields):
+        """
+        Buffer History fields (current_page, progress_message, ...)
+
+        Args:
+            item_done: A page/sentence finished; counts toward the flush interval
+        """
+        self._remember(fields)
+        if item_done:
+            self._items += 1
+        if self._items >= self.every_items or time.monotonic() - self._flushed_at >= self.every_seconds:
+            await self.flush()
+        elif time.monotonic() - self._published_at >= settings.PROGRESS_LIVE_SECONDS:
+            await self._publish()
+
+    async def flush(self, **fields):
+        """Write buffered fields (plus `fields`) in one commit"""
+        self._remember(fields)
+        if self._pending:
+            for name, value in self._pending.items():
+                setattr(self.history, name, value() if callable(value) else value)
+            self.db.commit()
+        self._pending.clear()
+        self._items = 0
+        self._flushed_at = time.monotonic()
+        await self._publish()
+
+    async def transition(self, status: TaskStatus, **fields):
+        """Change status, writing everything buffered immediately"""
+        await self.flush(status=status, **fields)
+        if status not in (TaskStatus.PENDING, TaskStatus.PROCESSING):
+            await clear_live_progress(self.history.id)
+
+    def _remember(self, fields: Dict[str, Any]):
+        self._pending.update(fields)
+        self._live.update((name, value) for name, value in fields.items() if name in LIVE_FIELDS)
+
+    async def _publish(self):
+        live = {name: value() if callable(value) else value for name, value in self._live.items()}
+        self._published_at = time.monotonic()
+        try:
+            await job_control.backend.update_state(_live_key(self.history.id), live, job_control.ttl)
+        except Exception as e:
+            # The live view is best effort; the database still gets every flush
+            logger.warning(f"进度发布失败 (history_id={self.history.id}): {str(e)}")
+
+
+async def live_progress(history_id: int) -> Dict[str, Any]:
+    """Latest published progress of a running job ({} if none)"""
+    try:
+        return await job_control.backend.get_state(_live_key(history_id)) or {}
+    except Exception:
+        return {}
+
+
+async def clear_live_progress(history_id: int):
+    try:
+        await job_control.backend.delete_state(_live_key(history_id))
+    except Exception:
+        pass
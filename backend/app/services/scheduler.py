@@ -0,0 +1,139 @@
+import enum
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import and_, case, func, or_
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models import Job, JobStatus, User
+
+logger = logging.getLogger(__name__)
+
+
+class JobPriority(int, enum.Enum):
+    INTERACTIVE = 0  # short texts and single images: served first
+    BULK = 1         # documents and books
+
+
+class FairShareScheduler:
+    """
+    Decides which queued job a worker leases next
+
+    - Priority: interactive jobs (at most SCHEDULER_INTERACTIVE_MAX_ITEMS
+      pages/sentences) go ahead of bulk jobs.
+    - Weighted fair queuing across users (start-time fair queuing): a job is
+      tagged at enqueue time with
+          start  = max(virtual time, finish tag of the user's previous job)
+          finish = start + estimated seconds of work / user weight
+      and jobs are served in start-tag order. A user who queues ten books
+      gets them interleaved with other users' jobs instead of ahead of them.
+    - Per-user cap: jobs of users already running SCHEDULER_MAX_RUNNING_PER_USER
+      jobs are served only when no other user's job is waiting, so one user
+      cannot crowd others out but can still use otherwise idle workers.
+    """
+
+    def tag(self, db: Session, job: Job):
+        """Set priority (unless given) and fair-queuing tags on a job about to be enqueued"""
+        job.cost = max(1, job.cost or 1)
+        if job.priority is None:
+            job.priority = (
+                JobPriority.INTERACTIVE if job.cost <= settings.SCHEDULER_INTERACTIVE_MAX_ITEMS else JobPriority.BULK
+            )
+
+        user = db.query(User).filter(User.id == job.user_id).first()
+        weight = (user.scheduler_weight if user is not None else None) or settings.SCHEDULER_DEFAULT_WEIGHT
+
+        # Virtual time: start tag of the latest job a worker ran or is running.
+        # Cancelled (never served) and failed jobs must not advance it
+        virtual_time = db.query(func.max(Job.virtual_start)).filter(
+            Job.status.in_([JobStatus.RUNNING, JobStatus.SUCCEEDED])
+        ).scalar() or 0.0
+        # Finish tag of the user's backlog (jobs not yet done)
+        user_finish = db.query(func.max(Job.virtual_finish)).filter(
+            Job.user_id == job.user_id,
+            Job.status.in_([JobStatus.QUEUED, JobStatus.RUNNING]),
+        ).scalar() or 0.0
+
+        job.virtual_start = max(virtual_time, user_finish)
+        job.virtual_finish = job.virtual_start + job.cost * self._configured_seconds_per_item(job.kind) / weight
+
+    @staticmethod
+    def _order():
+        return (Job.priority, Job.virtual_start, Job.id)
+
+    def candidates(self, db: Session, kinds: List[str], leasable, now: datetime, limit: int = 20) -> List[int]:
+        """Ids of leasable jobs in dispatch order, users at their cap last"""
+        running = db.query(Job.user_id, func.count(Job.id)).filter(
+            Job.status == JobStatus.RUNNING, Job.lease_expires_at >= now
+        ).group_by(Job.user_id).all()
+        capped = [user_id for user_id, count in running if count >= settings.SCHEDULER_MAX_RUNNING_PER_USER]
+
+        order = self._order()
+        if capped:
+            order = (case((Job.user_id.in_(capped), 1), else_=0),) + order
+        query = db.query(Job.id).filter(Job.kind.in_(kinds), leasable)
+        return [job_id for (job_id,) in query.order_by(*order).limit(limit).all()]
+
+    @staticmethod
+    def _configured_seconds_per_item(kind: str) -> float:
+        if kind.startswith("ocr"):
+            return settings.SCHEDULER_OCR_SECONDS_PER_PAGE
+        return settings.SCHEDULER_TRANSLATE_SECONDS_PER_SENTENCE
+
+    def seconds_per_item(self, db: Session, kind: str) -> float:
+        """Average processing time per page/sentence of recent jobs of a kind"""
+        recent = db.query(Job.started_at, Job.finished_at, Job.cost).filter(
+            Job.kind == kind,
+            Job.status == JobStatus.SUCCEEDED,
+            Job.started_at.isnot(None),
+            Job.finished_at.isnot(None),
+        ).order_by(Job.id.desc()).limit(20).all()
+
+        seconds = sum((finished - started).total_seconds() for started, finished, _ in recent)
+        items = sum(cost or 1 for _, _, cost in recent)
+        if items and seconds > 0:
+            return seconds / items
+        # No history yet: configured guess
+        return self._configured_seconds_per_item(kind)
+
+    def queue_info(self, db: Session, history_id: int) -> Dict[str, Any]:
+        """
+        Queue position and estimated seconds to completion of a queued job
+
+        Returns:
+            {} if the history entry has no queued job
+        """
+        job = db.query(Job).filter(
+            Job.history_id == history_id, Job.status == JobStatus.QUEUED
+        ).order_by(Job.id.desc()).first()
+        if job is None:
+            return {}
+
+        ahead = db.query(Job.kind, Job.cost).filter(
+            Job.status == JobStatus.QUEUED,
+            or_(
+                Job.priority < job.priority,
+                and_(Job.priority == job.priority, Job.virtual_start < job.virtual_start),
+                and_(Job.priority == job.priority, Job.virtual_start == job.virtual_start, Job.id < job.id),
+            ),
+        ).all()
+        running = db.query(func.count(Job.id)).filter(Job.status == JobStatus.RUNNING).scalar() or 0
+
+        rates: Dict[str, float] = {}
+
+        def work(kind: str, cost: Optional[int]) -> float:
+            if kind not in rates:
+                rates[kind] = self.seconds_per_item(db, kind)
+            return rates[kind] * (cost or 1)
+
+        # Work ahead is shared by the busy worker slots; then this job runs
+        wait = sum(work(kind, cost) for kind, cost in ahead) / max(1, running)
+        return {
+            "queue_position": len(ahead) + 1,
+            "eta_seconds": round(wait + work(job.kind, job.cost)),
+        }
+
+
+scheduler = FairShareScheduler()
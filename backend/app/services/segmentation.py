@@ -0,0 +1,69 @@
+import json
+import logging
+from typing import Any, Dict, List, Optional
+
+from ..models import History
+from ..utils import SentenceSplitter
+from .translate_service import TranslationService
+
+logger = logging.getLogger(__name__)
+
+
+def store_segmentation(history: History, sentences: List[Dict[str, Any]], source_language: str):
+    """
+    Keep a document's sentence list on its History row (committed by the caller)
+
+    Args:
+        sentences: Dicts with 'text' and 'page_numbers' keys
+        source_language: Language the text was split for ("auto" included)
+    """
+    history.segmentation = json.dumps(
+        {"source_language": source_language, "sentences": sentences}, ensure_ascii=False
+    )
+
+
+def load_segmentation(history: History, source_language: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
+    """
+    Stored sentence list of a history entry
+
+    Returns:
+        None if nothing is stored, or it was split for a different source_language
+    """
+    if not history.segmentation:
+        return None
+    try:
+        stored = json.loads(history.segmentation)
+    except json.JSONDecodeError:
+        logger.warning(f"历史记录 {history.id} 的分句结果无法解析，将重新分句")
+        return None
+    if source_language is not None and stored.get("source_language") != source_language:
+        return None
+    return stored.get("sentences")
+
+
+def segment_text(text: str, source_language: str) -> List[Dict[str, Any]]:
+    """Sentences of directly entered text (no page numbers)"""
+    return [
+        {"text": sentence, "page_numbers": []}
+        for sentence in TranslationService.split_and_merge_text(text, source_language)
+    ]
+
+
+def segment_history(history: History, source_language: str) -> List[Dict[str, Any]]:
+    """
+    Sentences of a history entry's OCR result, split once and then reused
+
+    Sentences spanning pages are merged; the result is stored on the row
+    (committed by the caller) so resume, retranslation and export see the
+    same list.
+    """
+    sentences = load_segmentation(history, source_language)
+    if sentences is not None:
+        logger.info(f"使用已保存的分句结果: {len(sentences)} 句")
+        return sentences
+
+    if not history.ocr_result:
+        raise ValueError(f"History {history.id} has no OCR result to split")
+    sentences = SentenceSplitter.split_pages(json.loads(history.ocr_result), source_language)
+    store_segmentation(history, sentences, source_language)
+    return sentences
@@ -6,16 +6,30 @@ from sqlalchemy.orm import Session
 
 from ..models import User
 from ..config import settings
-from ..utils import retry_on_failure, SentenceSplitter, EncryptionManager
-from ..utils.limiter import translate_limiter
+from ..utils import RetryPolicy, SentenceSplitter, EncryptionManager
+from ..utils.circuit_breaker import circuit_breakers
+from ..utils.deadline import request_timeout
+from ..utils.limiter import translate_limiters, estimate_tokens, user_rate_limits
+from .correction_index import CorrectionIndex
 from .correction_service import CorrectionService
 
 logger = logging.getLogger(__name__)
 
+translate_retry_policy = RetryPolicy(
+    "translate",
+    max_retries=settings.TRANSLATE_MAX_RETRIES,
+    base_delay=settings.RETRY_BASE_DELAY,
+    max_delay=settings.RETRY_MAX_DELAY,
+    max_retry_after=settings.RETRY_MAX_RETRY_AFTER,
+)
+
 
 class TranslationService:
     """Service for translation using LLMs (supports OpenAI and Gemini formats)"""
 
+    # Completion budget per request
+    max_tokens = 4000
+
     def __init__(
         self,
         api_base: str,
@@ -29,6 +43,8 @@ class TranslationService:
         self.model = model
         self.db = db
         self.user = user
+        self.rate_limits = user_rate_limits(user, "translate")
+        self.breaker = circuit_breakers.get(self.api_base, model)
         self.correction_service = CorrectionService(db, user)
 
         # Detect API type
@@ -43,7 +59,6 @@ class TranslationService:
         else:
             return 'openai'
 
-    @retry_on_failure(max_retries=3, delays=[2, 4, 8])
     async def translate_text(
         self,
         text: str,
@@ -65,7 +80,7 @@ class TranslationService:
         """
         # Build prompt with corrections if enabled
         system_prompt = self._build_system_prompt(
-            source_language, target_language, use_corrections
+            source_language, target_language, use_corrections, text
         )
 
         if self.api_type == 'gemini':
@@ -73,9 +88,26 @@ class TranslationService:
         else:
             return await self._translate_openai(text, system_prompt)
 
+    def _estimate_tokens(self, text: str, system_prompt: str) -> int:
+        """Prompt tokens plus an expected translation of about twice the source"""
+        return estimate_tokens(system_prompt) + estimate_tokens(text) + min(
+            self.max_tokens, 2 * estimate_tokens(text) + 50
+        )
+
+    def _request_timeout(self, text: str, system_prompt: str) -> float:
+        """Timeout sized to the expected tokens, cut to the sentence/job deadline"""
+        return request_timeout(
+            settings.TRANSLATE_TIMEOUT_BASE,
+            settings.TRANSLATE_TIMEOUT_PER_1K_TOKENS,
+            self._estimate_tokens(text, system_prompt) / 1000,
+            settings.TRANSLATE_TIMEOUT_MAX,
+        )
+
+    @translate_retry_policy
     async def _translate_openai(self, text: str, system_prompt: str) -> str:
         """Translate using OpenAI-compatible API"""
-        async with translate_limiter:
+        translate_limiter = await translate_limiters.get(self.api_base, self.api_key, self.rate_limits)
+        async with self.breaker.guard(), translate_limiter.reserve(self._estimate_tokens(text, system_prompt)) as slot:
             headers = {
                 "Authorization": f"Bearer {self.api_key}",
                 "Content-Type": "application/json",
@@ -90,11 +122,11 @@ class TranslationService:
                 "model": self.model,
                 "messages": messages,
                 "temperature": 0.3,
-                "max_tokens": 4000,
+                "max_tokens": self.max_tokens,
             }
 
             try:
-                async with httpx.AsyncClient(timeout=60.0) as client:
+                async with httpx.AsyncClient(timeout=self._request_timeout(text, system_prompt)) as client:
                     # Log request details
                     request_url = f"{self.api_base}/chat/completions"
                     logger.info("=" * 60)
@@ -110,6 +142,8 @@ class TranslationService:
                         json=payload
                     )
 
+                    await translate_limiter.observe(response.status_code, response.headers)
+
                     # Log response details
                     if response.status_code != 200:
                         logger.error(f"翻译 API 错误响应: 状态码 {response.status_code}")
@@ -124,6 +158,7 @@ class TranslationService:
                 # Log token usage if available
                 if "usage" in result:
                     usage = result["usage"]
+                    slot.record_usage(usage)
                     logger.info(f"📊 Token 使用情况:")
                     logger.info(f"  - 提示词 tokens: {usage.get('prompt_tokens', 'N/A')}")
                     logger.info(f"  - 完成 tokens: {usage.get('completion_tokens', 'N/A')}")
@@ -144,9 +179,11 @@ class TranslationService:
                 logger.error(f"翻译 API 异常: {type(e).__name__} - {str(e)}")
                 raise
 
+    @translate_retry_policy
     async def _translate_gemini(self, text: str, system_prompt: str) -> str:
         """Translate using Gemini API"""
-        async with translate_limiter:
+        translate_limiter = await translate_limiters.get(self.api_base, self.api_key, self.rate_limits)
+        async with self.breaker.guard(), translate_limiter.reserve(self._estimate_tokens(text, system_prompt)) as slot:
             headers = {
                 "Content-Type": "application/json",
             }
@@ -164,7 +201,7 @@ class TranslationService:
                 ],
                 "generationConfig": {
                     "temperature": 0.3,
-                    "maxOutputTokens": 4000,
+                    "maxOutputTokens": self.max_tokens,
                 }
             }
 
@@ -181,12 +218,13 @@ class TranslationService:
             logger.info(f"待翻译文本预览: {text[:100]}...")
 
             try:
-                async with httpx.AsyncClient(timeout=60.0) as client:
+                async with httpx.AsyncClient(timeout=self._request_timeout(text, system_prompt)) as client:
                     response = await client.post(
                         url,
                         headers=headers,
                         json=payload
                     )
+                    await translate_limiter.observe(response.status_code, response.headers)
 
                     if response.status_code != 200:
                         logger.error(f"翻译 API 错误响应: 状态码 {response.status_code}")
@@ -201,6 +239,7 @@ class TranslationService:
                 # Log token usage if available (Gemini format)
                 if "usageMetadata" in result:
                     usage = result["usageMetadata"]
+                    slot.record_usage(usage)
                     logger.info(f"📊 Token 使用情况:")
                     logger.info(f"  - 提示词 tokens: {usage.get('promptTokenCount', 'N/A')}")
                     logger.info(f"  - 完成 tokens: {usage.get('candidatesTokenCount', 'N/A')}")
@@ -281,9 +320,10 @@ class TranslationService:
         self,
         source_language: str,
         target_language: str,
-        use_corrections: bool
+        use_corrections: bool,
+        text: Optional[str] = None
     ) -> str:
-        """Build system prompt for translation"""
+        """Build system prompt for translation (glossary terms are matched against text)"""
         language_names = {
             "en": "English",
             "zh": "Chinese",
@@ -305,8 +345,31 @@ Requirements:
 
         # Add corrections to prompt if enabled and available
         if use_corrections:
+            # Glossary terms and correction examples share one token budget
+            token_budget = settings.CORRECTION_TOKEN_THRESHOLD
+            glossary_sources = set()
+            if text:
+                glossary = self.correction_service.find_glossary_terms(
+                    [text], source_language, target_language
+                )
+
+                selected = []
+                for term in glossary:
+                    term_tokens = CorrectionIndex.prompt_tokens(term["source"], term["translation"])
+                    if term_tokens > token_budget:
+                        break
+                    selected.append(term)
+                    token_budget -= term_tokens
+
+                if selected:
+                    prompt += "\n\nGlossary terms in this text (always use these translations):\n"
+                    for term in selected:
+                        prompt += f"- \"{term['source']}\" → \"{term['translation']}\"\n"
+                        glossary_sources.add(term["source"])
+                    logger.info(f"Glossary matched {len(glossary)} terms, {len(selected)} added to prompt")
+
             corrections = self.correction_service.get_corrections_for_prompt(
-                source_language, target_language
+                source_language, target_language, max_tokens=token_budget, exclude=glossary_sources
             )
 
             if corrections:
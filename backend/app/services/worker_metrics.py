@@ -0,0 +1,83 @@
+import logging
+import time
+from typing import Any, Dict, Iterable
+
+from ..config import settings
+from ..utils.circuit_breaker import circuit_breakers
+from ..utils.coordination import job_control
+from ..utils.limiter import limiter_metrics
+from ..utils.retry import retry_metrics
+from .embedding_cache import embedding_cache
+from .ocr_service import hedging_metrics
+
+logger = logging.getLogger(__name__)
+
+# One state entry holding {worker id: latest snapshot}; entries of workers
+# that stopped publishing are ignored and pruned by the next publisher
+WORKER_METRICS_KEY = "worker_metrics"
+
+# Worst circuit state wins when workers disagree
+_CIRCUIT_SEVERITY = {"closed": 0, "half_open": 1, "open": 2}
+
+
+def process_metrics() -> Dict[str, Any]:
+    """Provider-call state kept in this process's memory"""
+    return {
+        "embedding_cache": embedding_cache.stats(),
+        "limiters": limiter_metrics(),
+        "retries": retry_metrics(),
+        "circuit_breakers": circuit_breakers.metrics(),
+        "ocr_hedging": hedging_metrics(),
+    }
+
+
+def _backend():
+    # Same backend as the job signals: shared between processes even when
+    # COORDINATION_BACKEND is local
+    return job_control.backend
+
+
+def _ttl() -> float:
+    return settings.WORKER_METRICS_PUBLISH_SECONDS * 3
+
+
+async def publish_worker_metrics(worker_id: str):
+    """Store this worker's snapshot in the coordination backend"""
+    now = time.time()
+    current = await _backend().get_state(WORKER_METRICS_KEY) or {}
+    # Entries cannot be deleted from a merged state, only blanked
+    values: Dict[str, Any] = {
+        other: None for other, snapshot in current.items()
+        if snapshot and snapshot["published_at"] < now - _ttl()
+    }
+    values[worker_id] = {"published_at": now, **process_metrics()}
+    await _backend().update_state(WORKER_METRICS_KEY, values, _ttl())
+
+
+async def withdraw_worker_metrics(worker_id: str):
+    """Drop this worker's snapshot (on shutdown)"""
+    await _backend().update_state(
+        WORKER_METRICS_KEY, {worker_id: None}, _ttl(), only_if_exists=True
+    )
+
+
+async def worker_metrics() -> Dict[str, Dict[str, Any]]:
+    """Latest snapshot of every live worker, keyed by worker id"""
+    current = await _backend().get_state(WORKER_METRICS_KEY) or {}
+    cutoff = time.time() - _ttl()
+    return {
+        worker_id: snapshot for worker_id, snapshot in current.items()
+        if snapshot and snapshot["published_at"] >= cutoff
+    }
+
+
+def combined_circuit_states(snapshots: Iterable[Dict[str, Any]]) -> Dict[str, str]:
+    """Circuit states of this process and the given worker snapshots, worst state per circuit"""
+    states = circuit_breakers.states()
+    for snapshot in snapshots:
+        for name, breaker in snapshot.get("circuit_breakers", {}).items():
+            known = states.get(name, "closed")
+            if _CIRCUIT_SEVERITY.get(breaker["state"], 0) > _CIRCUIT_SEVERITY.get(known, 0):
+                known = breaker["state"]
+            states[name] = known
+    return states
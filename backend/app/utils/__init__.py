@@ -1,6 +1,16 @@
 from .crypto import verify_password, get_password_hash, EncryptionManager
-from .retry import async_retry, retry_on_failure, RetryError
-from .sentence_splitter import SentenceSplitter
+from .retry import (
+    async_retry,
+    retry_on_failure,
+    RetryError,
+    APIError,
+    RetryPolicy,
+    RetryBudget,
+    use_retry_budget,
+    current_retry_budget,
+    classify_error,
+)
+from .sentence_splitter import SentenceSplitter, StreamingSentenceSplitter
 
 __all__ = [
     "verify_password",
@@ -9,5 +19,12 @@ __all__ = [
     "async_retry",
     "retry_on_failure",
     "RetryError",
+    "APIError",
+    "RetryPolicy",
+    "RetryBudget",
+    "use_retry_budget",
+    "current_retry_budget",
+    "classify_error",
     "SentenceSplitter",
+    "StreamingSentenceSplitter",
 ]
@@ -0,0 +1,119 @@
+from collections import deque
+from typing import Dict, Generic, Hashable, Iterator, List, Set, Tuple, TypeVar
+
+V = TypeVar("V", bound=Hashable)
+
+
+class _Node:
+    __slots__ = ("children", "fail", "outputs", "dict_link", "depth")
+
+    def __init__(self, depth: int = 0):
+        self.children: Dict[str, "_Node"] = {}
+        self.fail: "_Node" = None
+        self.outputs: Set = set()
+        # Nearest node on the failure chain that has outputs
+        self.dict_link: "_Node" = None
+        self.depth = depth
+
+
+class AhoCorasick(Generic[V]):
+    """
+    Aho–Corasick automaton for multi-pattern substring search
+
+    Patterns can be added and removed at any time. Adding only extends the
+    trie; failure links are recomputed lazily on the next search (linear in
+    the trie size), and removing only detaches the value from its node.
+    Searching is linear in the length of the text plus the number of matches.
+    """
+
+    def __init__(self):
+        self._root = _Node()
+        self._dirty = False
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, pattern: str, value: V):
+        """Register value under pattern"""
+        if not pattern:
+            return
+        node = self._root
+        for char in pattern:
+            child = node.children.get(char)
+            if child is None:
+                child = _Node(node.depth + 1)
+                node.children[char] = child
+                self._dirty = True
+            node = child
+        if value not in node.outputs:
+            node.outputs.add(value)
+            self._size += 1
+            self._dirty = True
+
+    def remove(self, pattern: str, value: V) -> bool:
+        """Detach value from pattern; returns False if it was not registered"""
+        node = self._root
+        for char in pattern:
+            node = node.children.get(char)
+            if node is None:
+                return False
+        if value not in node.outputs:
+            return False
+        node.outputs.discard(value)
+        self._size -= 1
+        # A node may stop having outputs, which changes dictionary links
+        self._dirty = True
+        return True
+
+    def _build(self):
+        """Compute failure and dictionary links breadth-first"""
+        root = self._root
+        root.fail = root
+        root.dict_link = None
+        queue = deque()
+
+        for child in root.children.values():
+            child.fail = root
+            child.dict_link = None
+            queue.append(child)
+
+        while queue:
+            node = queue.popleft()
+            for char, child in node.children.items():
+                fail = node.fail
+                while fail is not root and char not in fail.children:
+                    fail = fail.fail
+                target = fail.children.get(char)
+                child.fail = target if target is not None and target is not child else root
+                child.dict_link = child.fail if child.fail.outputs else child.fail.dict_link
+                queue.append(child)
+
+        self._dirty = False
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, V]]:
+        """
+        Yield (start, end, value) for every pattern occurrence in text
+
+        Offsets are character positions in text, end exclusive.
+        """
+        if self._dirty:
+            self._build()
+
+        root = self._root
+        node = root
+        for index, char in enumerate(text):
+            while node is not root and char not in node.children:
+                node = node.fail
+            node = node.children.get(char, root)
+
+            match = node if node.outputs else node.dict_link
+            while match is not None:
+                start = index + 1 - match.depth
+                for value in match.outputs:
+                    yield start, index + 1, value
+                match = match.dict_link
+
+    def find_all(self, text: str) -> List[Tuple[int, int, V]]:
+        """List of all (start, end, value) matches"""
+        return list(self.iter_matches(text))
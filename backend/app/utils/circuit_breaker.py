@@ -0,0 +1,234 @@
+import asyncio
+import inspect
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from ..config import settings
+from .deadline import DeadlineExceeded, current_deadline
+from .retry import APIError, classify_error
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(APIError):
+    """Raised instead of calling a provider whose circuit is open"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(
+            f"{name} is unavailable (circuit open), retry in {retry_after:.0f} seconds",
+            retry_after=retry_after,
+            retryable=False,
+        )
+        self.name = name
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for one provider endpoint
+
+    closed: calls pass; `failure_threshold` consecutive provider failures
+        (5xx, timeouts, connection errors) open the circuit.
+    open: calls fail at once with CircuitOpenError until `open_seconds` pass.
+    half_open: up to `half_open_probes` calls probe the provider; a success
+        closes the circuit, a failure reopens it with the open time doubled
+        (up to `max_open_seconds`).
+
+    Throttling (429) and client errors (other 4xx) mean the provider is up,
+    so they count as successes here; the limiter and retry policy handle them.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        open_seconds: float = 30.0,
+        max_open_seconds: float = 300.0,
+        half_open_probes: int = 1
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.half_open_probes = half_open_probes
+
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.open_seconds = open_seconds
+        self.opened_at = 0.0
+        self._probes_in_flight = 0
+
+        # Metrics
+        self.times_opened = 0
+        self.rejected_calls = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def retry_after(self) -> float:
+        """Seconds until an open circuit lets a probe through"""
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.opened_at + self.open_seconds - time.monotonic())
+
+    def _before_call(self) -> bool:
+        """Admit or reject a call; returns True if the call is a probe"""
+        if self.state == OPEN:
+            if self.retry_after > 0:
+                self.rejected_calls += 1
+                raise CircuitOpenError(self.name, self.retry_after)
+            self.state = HALF_OPEN
+            logger.info(f"熔断器 {self.name} 进入半开状态，发送探测请求")
+
+        if self.state == HALF_OPEN:
+            if self._probes_in_flight >= self.half_open_probes:
+                self.rejected_calls += 1
+                raise CircuitOpenError(self.name, 1.0)
+            self._probes_in_flight += 1
+            return True
+        return False
+
+    def record_success(self):
+        if self.state != CLOSED:
+            logger.info(f"熔断器 {self.name} 已恢复（关闭）")
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.open_seconds = self.base_open_seconds
+
+    def record_failure(self, error: BaseException, probe: bool = False):
+        self.consecutive_failures += 1
+        self.last_error = f"{type(error).__name__}: {str(error)[:200]}"
+
+        if probe:
+            # Failed probe: stay open, and back off longer each time
+            self.open_seconds = min(self.max_open_seconds, self.open_seconds * 2)
+            self._open()
+        elif self.state == CLOSED and self.consecutive_failures >= self.failure_threshold:
+            self._open()
+
+    def _open(self):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.times_opened += 1
+        logger.error(
+            f"熔断器 {self.name} 打开: 连续失败 {self.consecutive_failures} 次，"
+            f"{self.open_seconds:.0f} 秒内请求将直接失败 ({self.last_error})"
+        )
+
+    @staticmethod
+    def is_provider_failure(error: BaseException) -> bool:
+        """Whether an error says the provider itself is failing"""
+        retryable, _ = classify_error(error)
+        if not retryable:
+            return False
+        status_code = getattr(error, "status_code", None)
+        response = getattr(error, "response", None)
+        if status_code is None and response is not None:
+            status_code = getattr(response, "status_code", None)
+        return status_code != 429
+
+    @asynccontextmanager
+    async def guard(self):
+        """Wrap one provider call"""
+        probe = self._before_call()
+        try:
+            yield self
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if self.is_provider_failure(e):
+                self.record_failure(e, probe)
+            else:
+                self.record_success()
+            raise
+        else:
+            self.record_success()
+        finally:
+            if probe:
+                self._probes_in_flight -= 1
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "retry_after": round(self.retry_after, 1),
+            "times_opened": self.times_opened,
+            "rejected_calls": self.rejected_calls,
+            "last_error": self.last_error,
+        }
+
+
+class CircuitBreakerRegistry:
+    """Circuit breakers keyed by (api_base, model)"""
+
+    def __init__(self):
+        self._breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+
+    def get(self, api_base: str, model: str) -> CircuitBreaker:
+        key = (api_base.rstrip("/"), model)
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                f"{key[0]} [{model}]",
+                failure_threshold=settings.CIRCUIT_FAILURE_THRESHOLD,
+                open_seconds=settings.CIRCUIT_OPEN_SECONDS,
+                max_open_seconds=settings.CIRCUIT_MAX_OPEN_SECONDS,
+                half_open_probes=settings.CIRCUIT_HALF_OPEN_PROBES,
+            )
+            self._breakers[key] = breaker
+        return breaker
+
+    def states(self) -> Dict[str, str]:
+        return {breaker.name: breaker.state for breaker in self._breakers.values()}
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        return {breaker.name: breaker.metrics() for breaker in self._breakers.values()}
+
+
+circuit_breakers = CircuitBreakerRegistry()
+
+
+async def park_while_open(
+    func: Callable[[], Awaitable[Any]],
+    on_park: Optional[Callable[[CircuitOpenError], Any]] = None,
+    max_park_seconds: Optional[float] = None
+) -> Any:
+    """
+    Run one job item, waiting out open circuits instead of failing the item
+
+    Args:
+        func: The item's provider call
+        on_park: Called (or awaited) each time the item starts waiting (e.g. to update progress)
+        max_park_seconds: Give up and raise CircuitOpenError after waiting this long;
+            waiting also stops at the current deadline
+
+    Returns:
+        Result of func
+    """
+    if max_park_seconds is None:
+        max_park_seconds = settings.CIRCUIT_MAX_PARK_SECONDS
+    parked = 0.0
+
+    while True:
+        try:
+            return await func()
+        except CircuitOpenError as e:
+            if parked >= max_park_seconds:
+                raise
+            if on_park is not None:
+                result = on_park(e)
+                if inspect.isawaitable(result):
+                    await result
+            wait = min(max(e.retry_after, 1.0), max_park_seconds - parked)
+            deadline = current_deadline()
+            if deadline is not None:
+                if deadline.remaining() <= 0:
+                    raise DeadlineExceeded(f"{deadline.name} deadline exceeded while {e.name} was unavailable") from e
+                wait = min(wait, deadline.remaining())
+            logger.warning(f"{e.name} 不可用，任务暂停 {wait:.0f} 秒后重试")
+            await asyncio.sleep(wait)
+            parked += wait
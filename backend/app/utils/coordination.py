@@ -0,0 +1,602 @@
+import asyncio
+import inspect
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def gcra_schedule(tat: float, now: float, n: float, interval: float, capacity: int) -> Tuple[float, float]:
+    """
+    One GCRA admission step
+
+    Args:
+        tat: Current theoretical arrival time of the bucket
+        now: Current time (same clock as tat)
+        n: Units requested
+        interval: Seconds per unit
+        capacity: Units admitted back to back
+
+    Returns:
+        (delay before the caller may proceed, new theoretical arrival time)
+    """
+    start = max(tat, now)
+    new_tat = start + n * interval
+    # Oversized requests are admitted once everything before them drained
+    admit_at = min(start, new_tat - capacity * interval)
+    return max(0.0, admit_at - now), new_tat
+
+
+class CoordinationBackend:
+    """
+    Shared state for limiters and job control
+
+    Implementations must make each method atomic across every process that
+    uses the same backend. Times are wall-clock seconds.
+    """
+
+    name = "base"
+
+    def __init__(self):
+        # key -> event set when the state changes (see wait_changed)
+        self._changed: Dict[str, asyncio.Event] = {}
+
+    async def reserve(
+        self, key: str, n: float, interval: float, capacity: int, nowait: bool = False
+    ) -> Tuple[float, float]:
+        """
+        GCRA-reserve n units of a shared bucket
+
+        Returns (delay, seconds until the bucket drains). With nowait the
+        units are only charged if they are admitted at once (delay == 0);
+        otherwise the bucket is left unchanged.
+        """
+        raise NotImplementedError
+
+    async def adjust(self, key: str, seconds: float):
+        """Move a shared bucket's TAT (refunds are negative)"""
+        raise NotImplementedError
+
+    async def acquire_lease(self, key: str, limit: int, ttl: float) -> Optional[str]:
+        """Take one of `limit` shared slots for at most ttl seconds; None if all are taken"""
+        raise NotImplementedError
+
+    async def release_lease(self, key: str, lease_id: str):
+        raise NotImplementedError
+
+    async def update_state(
+        self,
+        key: str,
+        values: Dict[str, Any],
+        ttl: float,
+        only_if_exists: bool = False
+    ) -> bool:
+        """Merge values into a JSON state object and reset its expiry"""
+        raise NotImplementedError
+
+    async def get_state(self, key: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    async def delete_state(self, key: str):
+        raise NotImplementedError
+
+    def _notify(self, key: str):
+        """Wake the waiters of a state in this process"""
+        event = self._changed.pop(key, None)
+        if event is not None:
+            event.set()
+
+    async def wait_changed(self, key: str, known: Dict[str, Any], timeout: float):
+        """
+        Wait until a state differs from `known`, or timeout
+
+        Updates made through this backend object wake waiters at once;
+        subclasses add notification from other processes.
+        """
+        event = self._changed.setdefault(key, asyncio.Event())
+        # Changed before we started waiting
+        if (await self.get_state(key) or {}) != (known or {}):
+            return
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+class LocalBackend(CoordinationBackend):
+    """In-process backend (single worker; the default)"""
+
+    name = "local"
+
+    def __init__(self):
+        super().__init__()
+        self._tats: Dict[str, float] = {}
+        self._leases: Dict[str, Dict[str, float]] = {}
+        self._states: Dict[str, Tuple[Dict[str, Any], float]] = {}
+
+    async def reserve(self, key, n, interval, capacity, nowait=False):
+        now = time.time()
+        delay, new_tat = gcra_schedule(self._tats.get(key, 0.0), now, n, interval, capacity)
+        if not (nowait and delay > 0):
+            self._tats[key] = new_tat
+        return delay, max(0.0, self._tats.get(key, 0.0) - now)
+
+    async def adjust(self, key, seconds):
+        if key in self._tats:
+            self._tats[key] += seconds
+
+    async def acquire_lease(self, key, limit, ttl):
+        now = time.time()
+        leases = self._leases.setdefault(key, {})
+        for lease_id in [l for l, expires in leases.items() if expires < now]:
+            del leases[lease_id]
+        if len(leases) >= limit:
+            return None
+        lease_id = uuid.uuid4().hex
+        leases[lease_id] = now + ttl
+        return lease_id
+
+    async def release_lease(self, key, lease_id):
+        self._leases.get(key, {}).pop(lease_id, None)
+
+    async def update_state(self, key, values, ttl, only_if_exists=False):
+        current = await self.get_state(key)
+        if current is None:
+            if only_if_exists:
+                return False
+            current = {}
+        current.update(values)
+        self._states[key] = (current, time.time() + ttl)
+        if values:
+            self._notify(key)
+        return True
+
+    async def get_state(self, key):
+        entry = self._states.get(key)
+        if entry is None:
+            return None
+        if entry[1] < time.time():
+            del self._states[key]
+            return None
+        return dict(entry[0])
+
+    async def delete_state(self, key):
+        self._states.pop(key, None)
+        self._notify(key)
+
+
+class SQLiteBackend(CoordinationBackend):
+    """
+    Single-host backend on a SQLite file
+
+    Every operation is one short `BEGIN IMMEDIATE` transaction, so the
+    database file lock serializes updates from all worker processes.
+    Calls run in a thread to keep the event loop free while waiting for it.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self._local = threading.local()
+        with self._transaction() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS rate_buckets (key TEXT PRIMARY KEY, tat REAL NOT NULL)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS leases ("
+                "lease_id TEXT PRIMARY KEY, key TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_leases_key ON leases (key, expires_at)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS states ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self):
+        backend = self
+
+        class _Transaction:
+            def __enter__(self):
+                self.conn = backend._connection()
+                self.conn.execute("BEGIN IMMEDIATE")
+                return self.conn
+
+            def __exit__(self, exc_type, exc_val, exc_tb):
+                self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+
+        return _Transaction()
+
+    async def _run(self, func, *args):
+        return await asyncio.to_thread(func, *args)
+
+    def _reserve(self, key, n, interval, capacity, nowait):
+        with self._transaction() as conn:
+            row = conn.execute("SELECT tat FROM rate_buckets WHERE key = ?", (key,)).fetchone()
+            now = time.time()
+            tat = row[0] if row else 0.0
+            delay, new_tat = gcra_schedule(tat, now, n, interval, capacity)
+            if nowait and delay > 0:
+                return delay, max(0.0, tat - now)
+            conn.execute(
+                "INSERT INTO rate_buckets (key, tat) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET tat = excluded.tat",
+                (key, new_tat),
+            )
+        return delay, max(0.0, new_tat - now)
+
+    async def reserve(self, key, n, interval, capacity, nowait=False):
+        return await self._run(self._reserve, key, n, interval, capacity, nowait)
+
+    def _adjust(self, key, seconds):
+        with self._transaction() as conn:
+            conn.execute("UPDATE rate_buckets SET tat = tat + ? WHERE key = ?", (seconds, key))
+
+    async def adjust(self, key, seconds):
+        await self._run(self._adjust, key, seconds)
+
+    def _acquire_lease(self, key, limit, ttl):
+        with self._transaction() as conn:
+            now = time.time()
+            conn.execute("DELETE FROM leases WHERE key = ? AND expires_at < ?", (key, now))
+            (active,) = conn.execute("SELECT COUNT(*) FROM leases WHERE key = ?", (key,)).fetchone()
+            if active >= limit:
+                return None
+            lease_id = uuid.uuid4().hex
+            conn.execute(
+                "INSERT INTO leases (lease_id, key, expires_at) VALUES (?, ?, ?)",
+                (lease_id, key, now + ttl),
+            )
+        return lease_id
+
+    async def acquire_lease(self, key, limit, ttl):
+        return await self._run(self._acquire_lease, key, limit, ttl)
+
+    def _release_lease(self, key, lease_id):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM leases WHERE lease_id = ?", (lease_id,))
+
+    async def release_lease(self, key, lease_id):
+        await self._run(self._release_lease, key, lease_id)
+
+    def _update_state(self, key, values, ttl, only_if_exists):
+        with self._transaction() as conn:
+            now = time.time()
+            row = conn.execute(
+                "SELECT value FROM states WHERE key = ? AND expires_at >= ?", (key, now)
+            ).fetchone()
+            if row is None and only_if_exists:
+                return False
+            current = json.loads(row[0]) if row else {}
+            current.update(values)
+            conn.execute(
+                "INSERT INTO states (key, value, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at",
+                (key, json.dumps(current), now + ttl),
+            )
+        return True
+
+    async def update_state(self, key, values, ttl, only_if_exists=False):
+        updated = await self._run(self._update_state, key, values, ttl, only_if_exists)
+        if updated and values:
+            self._notify(key)
+        return updated
+
+    def _get_state(self, key):
+        row = self._connection().execute(
+            "SELECT value FROM states WHERE key = ? AND expires_at >= ?", (key, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    async def get_state(self, key):
+        return await self._run(self._get_state, key)
+
+    def _delete_state(self, key):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM states WHERE key = ?", (key,))
+
+    async def delete_state(self, key):
+        await self._run(self._delete_state, key)
+        self._notify(key)
+
+    async def wait_changed(self, key, known, timeout):
+        # Other processes cannot wake us: also re-read the row (reads only,
+        # never a write) every JOB_CONTROL_POLL_SECONDS
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            step = min(remaining, settings.JOB_CONTROL_POLL_SECONDS)
+            await super().wait_changed(key, known, step)
+            if (await self.get_state(key) or {}) != (known or {}):
+                return
+
+
+# Redis scripts; server time is used so hosts with skewed clocks agree
+_REDIS_NOW = "local t = redis.call('TIME') local now = tonumber(t[1]) + tonumber(t[2]) / 1000000 "
+
+_REDIS_RESERVE = _REDIS_NOW + """
+local tat = tonumber(redis.call('GET', KEYS[1]) or '0')
+local n, interval, capacity = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local start = math.max(tat, now)
+local new_tat = start + n * interval
+local admit_at = math.min(start, new_tat - capacity * interval)
+if ARGV[4] == '1' and admit_at > now then
+    return {tostring(admit_at - now), tostring(math.max(0, tat - now))}
+end
+redis.call('SET', KEYS[1], tostring(new_tat), 'EX', math.ceil(new_tat - now) + 60)
+return {tostring(math.max(0, admit_at - now)), tostring(new_tat - now)}
+"""
+
+_REDIS_ACQUIRE_LEASE = _REDIS_NOW + """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[1]) then
+    return 0
+end
+redis.call('ZADD', KEYS[1], now + tonumber(ARGV[2]), ARGV[3])
+redis.call('EXPIRE', KEYS[1], math.ceil(tonumber(ARGV[2])) + 60)
+return 1
+"""
+
+_REDIS_UPDATE_STATE = """
+local current = redis.call('GET', KEYS[1])
+if not current and ARGV[3] == '1' then
+    return 0
+end
+local state = current and cjson.decode(current) or {}
+for k, v in pairs(cjson.decode(ARGV[1])) do
+    state[k] = v
+end
+redis.call('SET', KEYS[1], cjson.encode(state), 'EX', math.ceil(tonumber(ARGV[2])))
+return 1
+"""
+
+
+class RedisBackend(CoordinationBackend):
+    """Multi-host backend on Redis (requires the optional `redis` package)"""
+
+    name = "redis"
+
+    def __init__(self, url: str, prefix: str = "ocr-translate:"):
+        try:
+            import redis.asyncio as redis_asyncio
+        except ImportError:
+            raise RuntimeError("redis library not installed. Please run: pip install redis")
+
+        super().__init__()
+        self.client = redis_asyncio.from_url(url, decode_responses=True)
+        self.prefix = prefix
+        self._reserve = self.client.register_script(_REDIS_RESERVE)
+        self._acquire_lease = self.client.register_script(_REDIS_ACQUIRE_LEASE)
+        self._update_state = self.client.register_script(_REDIS_UPDATE_STATE)
+        self._listener: Optional[asyncio.Task] = None
+
+    async def reserve(self, key, n, interval, capacity, nowait=False):
+        delay, drain = await self._reserve(
+            keys=[f"{self.prefix}rate:{key}"], args=[n, interval, capacity, int(nowait)]
+        )
+        return float(delay), max(0.0, float(drain))
+
+    async def adjust(self, key, seconds):
+        await self.client.incrbyfloat(f"{self.prefix}rate:{key}", seconds)
+
+    async def acquire_lease(self, key, limit, ttl):
+        lease_id = uuid.uuid4().hex
+        taken = await self._acquire_lease(keys=[f"{self.prefix}lease:{key}"], args=[limit, ttl, lease_id])
+        return lease_id if int(taken) else None
+
+    async def release_lease(self, key, lease_id):
+        await self.client.zrem(f"{self.prefix}lease:{key}", lease_id)
+
+    async def update_state(self, key, values, ttl, only_if_exists=False):
+        updated = await self._update_state(
+            keys=[f"{self.prefix}state:{key}"],
+            args=[json.dumps(values), ttl, "1" if only_if_exists else "0"],
+        )
+        if int(updated) and values:
+            await self.client.publish(f"{self.prefix}changed:{key}", "1")
+        return bool(int(updated))
+
+    async def get_state(self, key):
+        value = await self.client.get(f"{self.prefix}state:{key}")
+        return json.loads(value) if value else None
+
+    async def delete_state(self, key):
+        await self.client.delete(f"{self.prefix}state:{key}")
+        await self.client.publish(f"{self.prefix}changed:{key}", "1")
+
+    async def _listen(self):
+        """Turn state-change messages from every host into local wake-ups"""
+        channel_prefix = f"{self.prefix}changed:"
+        pubsub = self.client.pubsub()
+        await pubsub.psubscribe(f"{channel_prefix}*")
+        try:
+            async for message in pubsub.listen():
+                if message["type"] == "pmessage":
+                    self._notify(message["channel"][len(channel_prefix):])
+        finally:
+            await pubsub.close()
+
+    async def wait_changed(self, key, known, timeout):
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+        await super().wait_changed(key, known, timeout)
+
+
+def create_backend() -> CoordinationBackend:
+    """Build the backend selected by COORDINATION_BACKEND"""
+    kind = settings.COORDINATION_BACKEND.lower()
+    if kind == "sqlite":
+        return SQLiteBackend(settings.COORDINATION_SQLITE_PATH)
+    if kind == "redis":
+        return RedisBackend(settings.COORDINATION_REDIS_URL)
+    if kind != "local":
+        raise ValueError(f"Unknown COORDINATION_BACKEND: {settings.COORDINATION_BACKEND}")
+    return LocalBackend()
+
+
+coordination_backend = create_backend()
+
+
+def is_shared() -> bool:
+    """Whether state is shared with other worker processes"""
+    return coordination_backend.name != "local"
+
+
+class JobStopped(Exception):
+    """Raised inside a job when a stop was requested"""
+
+
+class JobPaused(JobStopped):
+    """Raised inside a job that gives its worker back while paused (OCR)"""
+
+
+class JobControl:
+    """
+    Control signals (pause/stop) for running background jobs
+
+    A worker registers a job when it starts; pause/stop requests from any
+    process set flags on the registered entry and wake the job through the
+    backend's change notification, so paused jobs wait on an event instead
+    of polling. The registration is renewed at most every third of
+    JOB_CONTROL_TTL_SECONDS; entries of workers that died expire. Shared by
+    translation and OCR jobs.
+    """
+
+    def __init__(self, backend: CoordinationBackend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        # key -> monotonic time of the last renewal by this process
+        self._renewed: Dict[str, float] = {}
+
+    @staticmethod
+    def _key(kind: str, job_id: int) -> str:
+        return f"job:{kind}:{job_id}"
+
+    async def register(self, kind: str, job_id: int, reset: bool = True):
+        """
+        Mark a job as running in this process
+
+        Args:
+            reset: Clear pause/stop flags; False keeps flags set before the
+                job started (several workers on one document)
+        """
+        values = {"owner": self.owner}
+        if reset:
+            values.update(paused=False, stopped=False)
+        await self.backend.update_state(self._key(kind, job_id), values, self.ttl)
+        self._renewed[self._key(kind, job_id)] = time.monotonic()
+
+    async def poll(self, kind: str, job_id: int) -> Dict[str, Any]:
+        """Current signals for a running job; also renews its registration"""
+        key = self._key(kind, job_id)
+        state = await self.backend.get_state(key) or {}
+        await self.backend.update_state(key, {}, self.ttl, only_if_exists=True)
+        self._renewed[key] = time.monotonic()
+        return state
+
+    async def check(self, kind: str, job_id: int) -> Dict[str, Any]:
+        """Current signals; a read, plus a renewal only when one is due"""
+        if time.monotonic() - self._renewed.get(self._key(kind, job_id), 0.0) > self.ttl / 3:
+            return await self.poll(kind, job_id)
+        return await self.backend.get_state(self._key(kind, job_id)) or {}
+
+    async def is_running(self, kind: str, job_id: int) -> bool:
+        return await self.backend.get_state(self._key(kind, job_id)) is not None
+
+    async def signal(self, kind: str, job_id: int, create: bool = False, **flags) -> bool:
+        """
+        Set flags on a running job; False if no process is running it
+
+        Args:
+            create: Store the flags even if no job is registered yet, so a
+                job leased in the meantime sees them
+        """
+        return await self.backend.update_state(
+            self._key(kind, job_id), flags, self.ttl, only_if_exists=not create
+        )
+
+    async def unregister(self, kind: str, job_id: int):
+        self._renewed.pop(self._key(kind, job_id), None)
+        await self.backend.delete_state(self._key(kind, job_id))
+
+    async def wait_while_paused(
+        self,
+        kind: str,
+        job_id: int,
+        on_pause: Optional[Callable[[], Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Checkpoint between two units of work: returns at once unless paused,
+        otherwise waits (without polling) until resumed or stopped
+
+        Args:
+            on_pause: Called (or awaited) once when the pause begins (persist the state)
+
+        Returns:
+            The signals that ended the wait
+        """
+        state = await self.check(kind, job_id)
+        if not state.get("paused") or state.get("stopped"):
+            return state
+
+        if on_pause is not None:
+            result = on_pause()
+            if inspect.isawaitable(result):
+                await result
+        while state.get("paused") and not state.get("stopped"):
+            await self.backend.wait_changed(self._key(kind, job_id), state, self.ttl / 3)
+            state = await self.check(kind, job_id)
+        return state
+
+    async def run_cancellable(self, kind: str, job_id: int, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run one unit of work, cancelling it as soon as a stop is requested
+
+        Raises:
+            JobStopped: The job was stopped while func was running
+        """
+        key = self._key(kind, job_id)
+        task = asyncio.ensure_future(func())
+        watcher: Optional[asyncio.Future] = None
+        try:
+            state = await self.backend.get_state(key) or {}
+            while not state.get("stopped"):
+                watcher = asyncio.ensure_future(self.backend.wait_changed(key, state, self.ttl / 3))
+                await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+                if task.done():
+                    return task.result()
+                state = await self.check(kind, job_id)
+            logger.info(f"任务 {kind}:{job_id} 已停止，取消进行中的请求")
+            raise JobStopped(f"{kind} job {job_id} stopped")
+        finally:
+            for pending in (watcher, task):
+                if pending is not None and not pending.done():
+                    pending.cancel()
+                    await asyncio.gather(pending, return_exceptions=True)
+
+
+# Jobs run in worker processes, so their signals must be shared even when
+# the limiters are not
+job_control = JobControl(
+    coordination_backend if is_shared() else SQLiteBackend(settings.COORDINATION_SQLITE_PATH),
+    settings.JOB_CONTROL_TTL_SECONDS,
+)
@@ -0,0 +1,104 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Optional
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a job, item or request runs out of time"""
+
+
+class Deadline:
+    """
+    Point in time by which a piece of work must finish
+
+    Deadlines nest: a page or sentence deadline entered inside a job
+    deadline never extends past the job's (see `use_deadline`).
+    """
+
+    def __init__(self, seconds: Optional[float], name: str = "deadline"):
+        """
+        Args:
+            seconds: Time budget from now (None or <= 0 = no deadline)
+            name: Used in error messages
+        """
+        self.name = name
+        self.started_at = time.monotonic()
+        self.expires_at = self.started_at + seconds if seconds and seconds > 0 else float("inf")
+
+    @classmethod
+    def for_items(cls, item_count: int, base: float, per_item: float, name: str = "job") -> "Deadline":
+        """Job deadline that grows with the number of pages/sentences (per_item 0 = none)"""
+        if per_item <= 0:
+            return cls(None, name)
+        return cls(base + per_item * item_count, name)
+
+    def grow_for_items(self, item_count: int, base: float, per_item: float):
+        """Move a job deadline out once the job size is known"""
+        if per_item > 0:
+            self.expires_at = max(self.expires_at, self.started_at + base + per_item * item_count)
+
+    def extend(self, seconds: float):
+        """Push the deadline back, e.g. by the time a job spent paused"""
+        self.expires_at += seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def check(self):
+        """Raise DeadlineExceeded if the deadline has passed"""
+        if self.expired:
+            raise DeadlineExceeded(f"{self.name} deadline exceeded")
+
+    def timeout(self, estimate: float) -> float:
+        """Per-request timeout: the size-based estimate, cut to the time left"""
+        self.check()
+        return min(estimate, self.remaining())
+
+
+_current_deadline: ContextVar[Optional[Deadline]] = ContextVar("deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    """Earliest deadline of the work running in this context, if any"""
+    return _current_deadline.get()
+
+
+@contextmanager
+def use_deadline(deadline: Deadline):
+    """Apply deadline (or the enclosing one, if that is earlier) to this context"""
+    outer = _current_deadline.get()
+    effective = deadline if outer is None or deadline.expires_at < outer.expires_at else outer
+    token = _current_deadline.set(effective)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+async def run_with_deadline(
+    func: Callable[[], Awaitable[Any]],
+    seconds: Optional[float],
+    name: str = "item"
+) -> Any:
+    """Run one page/sentence under its own deadline (bounded by the job's)"""
+    with use_deadline(Deadline(seconds, name)):
+        return await func()
+
+
+def request_timeout(base: float, per_unit: float, units: float, maximum: float) -> float:
+    """
+    Timeout for one HTTP request sized to its payload
+
+    base + per_unit x units, capped at maximum and at the time left before
+    the current deadline.
+    """
+    estimate = min(maximum, base + per_unit * units)
+    deadline = _current_deadline.get()
+    if deadline is None:
+        return estimate
+    return deadline.timeout(estimate)
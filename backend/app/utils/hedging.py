@@ -0,0 +1,171 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyTracker:
+    """Latencies of the most recent successful calls"""
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class HedgeBudget:
+    """
+    Caps hedges to a fraction of calls
+
+    Every call earns `ratio` credit (up to `burst`); a hedge spends one.
+    With ratio 0.05 at most ~5% extra requests are sent, even while the
+    provider is slow for everyone.
+    """
+
+    def __init__(self, ratio: float, burst: float = 10.0):
+        self.ratio = ratio
+        self.burst = burst
+        self.credit = burst if ratio > 0 else 0.0
+
+    def earn(self):
+        self.credit = min(self.burst, self.credit + self.ratio)
+
+    def try_spend(self) -> bool:
+        if self.credit < 1.0:
+            return False
+        self.credit -= 1.0
+        return True
+
+
+class Hedger:
+    """
+    Hedged requests for calls with heavy-tailed latency
+
+    A call that has not finished after the `percentile` latency of recent
+    successful calls (at least `min_delay` seconds) gets a duplicate; the
+    first success wins and the other is cancelled. Hedging starts once
+    `min_samples` latencies are known and is limited by a HedgeBudget.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        enabled: bool = True,
+        percentile: float = 0.95,
+        min_delay: float = 5.0,
+        budget_ratio: float = 0.05,
+        min_samples: int = 20
+    ):
+        """
+        Args:
+            name: Name used in logs and metrics
+            enabled: Whether duplicates are sent at all
+            percentile: Latency percentile after which a duplicate is sent
+            min_delay: Never hedge earlier than this many seconds
+            budget_ratio: Hedges allowed per call
+            min_samples: Latencies needed before hedging starts
+        """
+        self.name = name
+        self.enabled = enabled
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.latency = LatencyTracker()
+        self.budget = HedgeBudget(budget_ratio)
+        self.stats = {
+            "calls": 0,
+            "hedged": 0,
+            "hedge_won": 0,
+            "skipped_budget": 0,
+            "skipped_limiter": 0,
+        }
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds after which a call gets a duplicate, or None if not hedging yet"""
+        if not self.enabled or len(self.latency) < self.min_samples:
+            return None
+        return max(self.min_delay, self.latency.percentile(self.percentile))
+
+    async def _timed(self, func: Callable[[], Awaitable[Any]]) -> Any:
+        start = time.monotonic()
+        result = await func()
+        self.latency.record(time.monotonic() - start)
+        return result
+
+    async def run(
+        self,
+        func: Callable[[], Awaitable[Any]],
+        can_hedge: Optional[Callable[[], bool]] = None
+    ) -> Any:
+        """
+        Call func, sending a duplicate if it is slow
+
+        Args:
+            func: Starts one attempt; must be safe to run twice
+            can_hedge: Checked before hedging, e.g. whether the limiter has room
+
+        Returns:
+            Result of the first attempt that succeeds
+        """
+        self.stats["calls"] += 1
+        self.budget.earn()
+        delay = self.hedge_delay()
+
+        primary = asyncio.ensure_future(self._timed(func))
+        if delay is None:
+            return await primary
+
+        hedge = None
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done:
+                return primary.result()
+
+            if can_hedge is not None and not can_hedge():
+                self.stats["skipped_limiter"] += 1
+                return await primary
+            if not self.budget.try_spend():
+                self.stats["skipped_budget"] += 1
+                return await primary
+
+            self.stats["hedged"] += 1
+            logger.info(f"{self.name}: 请求超过 {delay:.1f} 秒未返回，发送对冲请求")
+            hedge = asyncio.ensure_future(self._timed(func))
+            pending = {primary, hedge}
+            first_error = None
+
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.stats["hedge_won"] += 1
+                        return task.result()
+                    if first_error is None or task is primary:
+                        first_error = task.exception()
+            raise first_error
+        finally:
+            for task in (primary, hedge):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    def metrics(self) -> Dict[str, Any]:
+        delay = self.hedge_delay()
+        return {
+            **self.stats,
+            "hedge_delay": round(delay, 2) if delay is not None else None,
+            "budget_credit": round(self.budget.credit, 2),
+        }
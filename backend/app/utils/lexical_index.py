@@ -0,0 +1,107 @@
+import heapq
+import math
+import re
+from collections import Counter
+from typing import Dict, Hashable, List, Tuple
+
+_CJK_RUN = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]+")
+_WORD = re.compile(r"[^\W_]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Tokenize text for lexical matching
+
+    Spaced scripts yield lowercase words; CJK runs yield overlapping
+    character bigrams (a single character yields itself).
+    """
+    text = text.lower()
+    tokens = []
+
+    for run in _CJK_RUN.findall(text):
+        if len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+
+    tokens.extend(_WORD.findall(_CJK_RUN.sub(" ", text)))
+    return tokens
+
+
+class LexicalIndex:
+    """
+    Incremental BM25 inverted index
+
+    Documents can be added and removed individually; scores are computed at
+    query time from the current postings, so no rebuild is ever needed.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[Hashable, int]] = {}
+        self.doc_terms: Dict[Hashable, Counter] = {}
+        self.doc_lengths: Dict[Hashable, int] = {}
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.doc_terms)
+
+    def add(self, doc_id: Hashable, text: str):
+        """Index a document (replaces an existing one with the same id)"""
+        if doc_id in self.doc_terms:
+            self.remove(doc_id)
+        terms = Counter(tokenize(text))
+        self.doc_terms[doc_id] = terms
+        self.doc_lengths[doc_id] = sum(terms.values())
+        self.total_length += self.doc_lengths[doc_id]
+        for term, tf in terms.items():
+            self.postings.setdefault(term, {})[doc_id] = tf
+
+    def remove(self, doc_id: Hashable):
+        """Remove a document from the index"""
+        terms = self.doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        self.total_length -= self.doc_lengths.pop(doc_id)
+        for term in terms:
+            docs = self.postings.get(term)
+            if docs is not None:
+                docs.pop(doc_id, None)
+                if not docs:
+                    del self.postings[term]
+
+    def search(self, text: str, limit: int = 50) -> List[Tuple[Hashable, float]]:
+        """
+        Rank documents sharing at least one token with text
+
+        Returns:
+            Up to `limit` (doc_id, bm25 score) pairs, best first
+        """
+        n_docs = len(self.doc_terms)
+        if not n_docs:
+            return []
+
+        avg_length = self.total_length / n_docs or 1.0
+        scores: Dict[Hashable, float] = {}
+
+        for term in set(tokenize(text)):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            for doc_id, tf in docs.items():
+                length = self.doc_lengths[doc_id]
+                norm = tf + self.k1 * (1 - self.b + self.b * length / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / norm
+
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+    def overlap(self, text: str, doc_id: Hashable) -> float:
+        """Dice coefficient between the token multisets of text and a document"""
+        query_terms = Counter(tokenize(text))
+        doc_terms = self.doc_terms.get(doc_id)
+        if not query_terms or not doc_terms:
+            return 0.0
+        shared = sum((query_terms & doc_terms).values())
+        return 2 * shared / (sum(query_terms.values()) + self.doc_lengths[doc_id])
@@ -1,94 +1,776 @@
 import asyncio
+import hashlib
+import json
 import time
 import logging
-from collections import deque
-from typing import Optional
+import re
+from collections import OrderedDict
+from contextvars import ContextVar
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Mapping, Optional
+
+from ..config import settings
+from .deadline import DeadlineExceeded, current_deadline
+from .coordination import CoordinationBackend, coordination_backend, gcra_schedule, is_shared
 
 logger = logging.getLogger(__name__)
 
+# Set while a call is being retried; such calls enter the limiters with
+# priority instead of queueing behind calls not yet attempted
+retry_priority: ContextVar[bool] = ContextVar("retry_priority", default=False)
+
+_CJK_CHAR = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]")
+
 
 class RateLimiter:
-    """Token bucket rate limiter"""
+    """
+    GCRA (virtual scheduling) rate limiter
+
+    The bucket is a single "theoretical arrival time" (TAT). Admission is
+    O(1) and needs no lock: a caller computes its slot and advances the TAT
+    without awaiting in between, so on the event loop the update is atomic.
+    Callers that must wait then sleep until their own slot, which gives FIFO
+    wake-ups without anyone holding a lock while sleeping. A waiter that is
+    cancelled returns its slot to the bucket. Priority callers are still
+    charged at the tail but swap places with this process's queued waiters,
+    so they wait only for the units admitted ahead of the queue.
 
-    def __init__(self, max_requests: int, time_window: int):
+    Up to `burst` units are admitted back to back; after that one unit is
+    admitted every time_window / max_requests seconds.
+
+    With a coordination backend the TAT lives in the backend under `key`
+    and is shared by every process using it.
+    """
+
+    def __init__(
+        self,
+        max_requests: int,
+        time_window: int,
+        burst: Optional[int] = None,
+        backend: Optional[CoordinationBackend] = None,
+        key: Optional[str] = None
+    ):
         """
         Args:
-            max_requests: Maximum number of requests allowed
+            max_requests: Maximum number of requests per time window (0 = unlimited)
             time_window: Time window in seconds
+            burst: Units admitted back to back (default: 10 seconds' worth for
+                a one-minute window, i.e. a sixth of max_requests)
+            backend: Shared backend holding the bucket (None = in-process)
+            key: Bucket key in the backend
         """
         self.max_requests = max_requests
         self.time_window = time_window
-        self.requests = deque()
-        self._lock = asyncio.Lock()
+        self.burst = burst
+        self.backend = backend
+        self.key = key
+        self._tat = 0.0
+        self._last_warning = 0.0
+        self._pending_tasks = set()
+        # [wake-up time, units] of normal callers waiting in this process
+        self._waiters = []
+
+    @property
+    def interval(self) -> float:
+        """Seconds per unit at the current rate"""
+        return self.time_window / self.max_requests if self.max_requests else 0.0
+
+    @property
+    def capacity(self) -> int:
+        """Burst size at the current rate"""
+        if self.burst:
+            return self.burst
+        return max(1, self.max_requests // 6)
+
+    @property
+    def pending(self) -> float:
+        """Units admitted or reserved that the bucket has not yet drained"""
+        interval = self.interval
+        if not interval:
+            return 0.0
+        # For a shared bucket this is as of the last reservation made here
+        return max(0.0, self._tat - time.monotonic()) / interval
+
+    def _schedule(self, n: int, now: float):
+        """Return (delay, new TAT) for admitting n units now"""
+        return gcra_schedule(self._tat, now, n, self.interval, self.capacity)
+
+    async def try_acquire(self, n: int = 1) -> bool:
+        """Admit n units if possible without waiting; never queues"""
+        if not self.max_requests:
+            return True
+        now = time.monotonic()
+        if self.backend is not None:
+            # Check-and-set in the backend: nothing is charged at the limit
+            delay, drain = await self.backend.reserve(
+                self.key, n, self.interval, self.capacity, nowait=True
+            )
+            self._tat = now + drain
+            return delay <= 0
+        delay, new_tat = self._schedule(n, now)
+        if delay > 0:
+            return False
+        self._tat = new_tat
+        return True
+
+    async def acquire(self, n: int = 1, priority: bool = False):
+        """
+        Wait (FIFO) until n units can be admitted
+
+        With priority the caller goes to the head of the queue: waiters
+        queued here move back by its n units and it takes their place, but
+        it still waits for whatever was admitted before them.
+        """
+        if not self.max_requests:
+            return
+        now = time.monotonic()
+        if self.backend is not None:
+            delay, drain = await self.backend.reserve(self.key, n, self.interval, self.capacity)
+            self._tat = now + drain
+        else:
+            delay, self._tat = self._schedule(n, now)
+        if priority and self._waiters:
+            queued = sum(units for _, units in self._waiters)
+            delay = max(0.0, delay - queued * self.interval)
+            for waiter in self._waiters:
+                waiter[0] += n * self.interval
+        if delay <= 0:
+            return
+
+        if now - self._last_warning > 5:
+            self._last_warning = now
+            logger.warning(f"速率限制：已达到 {self.max_requests}/{self.time_window}秒 的限制，等待 {delay:.1f} 秒后继续...")
+        entry = [now + delay, n]
+        if not priority:
+            self._waiters.append(entry)
+        try:
+            # Priority callers arriving meanwhile may push the wake-up back
+            while entry[0] > time.monotonic():
+                await asyncio.sleep(entry[0] - time.monotonic())
+        except asyncio.CancelledError:
+            self.adjust(-n)
+            raise
+        finally:
+            if not priority:
+                self._waiters.remove(entry)
+
+    def adjust(self, n: float):
+        """Charge (n > 0) or refund (n < 0) units without waiting"""
+        self._tat += n * self.interval
+        if self.backend is not None:
+            task = asyncio.get_running_loop().create_task(
+                self.backend.adjust(self.key, n * self.interval)
+            )
+            self._pending_tasks.add(task)
+            task.add_done_callback(self._pending_tasks.discard)
+
+
+class TokenLimiter(RateLimiter):
+    """
+    Tokens-per-minute limiter
+
+    Requests reserve an estimated token count up front; once the response
+    arrives the reservation is corrected to the actual usage, so estimates
+    that were too high free capacity immediately.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int,
+        time_window: int = 60,
+        backend: Optional[CoordinationBackend] = None,
+        key: Optional[str] = None
+    ):
+        """
+        Args:
+            max_tokens: Maximum tokens per window (0 disables the limit)
+            time_window: Time window in seconds
+            backend: Shared backend holding the bucket (None = in-process)
+            key: Bucket key in the backend
+        """
+        super().__init__(max_tokens, time_window, backend=backend, key=key)
+
+    @property
+    def max_tokens(self) -> int:
+        return self.max_requests
 
-    async def acquire(self):
-        """Wait until a request can be made"""
-        async with self._lock:
-            now = time.time()
+    @max_tokens.setter
+    def max_tokens(self, value: int):
+        self.max_requests = value
 
-            # Remove old requests outside the time window
-            while self.requests and self.requests[0] < now - self.time_window:
-                self.requests.popleft()
+    @property
+    def used(self) -> int:
+        """Tokens charged to the bucket that have not drained yet"""
+        return int(self.pending)
 
-            # If at capacity, wait
-            if len(self.requests) >= self.max_requests:
-                sleep_time = self.requests[0] + self.time_window - now
-                if sleep_time > 0:
-                    logger.warning(f"速率限制：已达到 {self.max_requests} 请求/{self.time_window}秒 的限制")
-                    logger.warning(f"等待 {sleep_time:.1f} 秒后继续...")
-                    await asyncio.sleep(sleep_time)
-                    return await self.acquire()
+    async def acquire(self, tokens: int, priority: bool = False) -> list:
+        """Wait until tokens can be admitted and reserve them"""
+        await super().acquire(tokens, priority)
+        return [tokens]
 
-            # Add current request
-            self.requests.append(now)
+    def reconcile(self, entry: list, actual_tokens: int):
+        """Replace a reservation's estimate with the actual usage"""
+        self.adjust(actual_tokens - entry[0])
+        entry[0] = actual_tokens
 
 
 class ConcurrencyLimiter:
-    """Semaphore-based concurrency limiter"""
+    """
+    Concurrency limiter whose limit can be changed at runtime
 
-    def __init__(self, max_concurrent: int):
+    With a coordination backend each slot is a lease in the backend, so the
+    limit holds across processes; leases of crashed processes expire after
+    lease_ttl seconds.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int,
+        backend: Optional[CoordinationBackend] = None,
+        key: Optional[str] = None,
+        lease_ttl: float = 300.0,
+        poll_interval: float = 0.1
+    ):
         """
         Args:
             max_concurrent: Maximum number of concurrent operations
+            backend: Shared backend holding the leases (None = in-process)
+            key: Lease key in the backend
+            lease_ttl: Seconds after which an unreleased lease expires
+            poll_interval: Seconds between lease attempts while all are taken
         """
-        self.semaphore = asyncio.Semaphore(max_concurrent)
+        self.limit = max_concurrent
+        self.active = 0
+        self.backend = backend
+        self.key = key
+        self.lease_ttl = lease_ttl
+        self.poll_interval = poll_interval
+        self._leases = []
+        self._priority_waiting = 0
+        self._condition = asyncio.Condition()
+
+    async def set_limit(self, limit: int):
+        """Change the limit; waiters are woken if it grew"""
+        async with self._condition:
+            self.limit = limit
+            self._condition.notify_all()
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def acquire(self, priority: bool = False):
+        """Take a slot; priority callers are served before normal waiters"""
+        async with self._condition:
+            if priority:
+                self._priority_waiting += 1
+                try:
+                    await self._condition.wait_for(lambda: self.active < self.limit)
+                finally:
+                    self._priority_waiting -= 1
+                    # Normal waiters skipped while this one was queued re-check
+                    self._condition.notify_all()
+            else:
+                await self._condition.wait_for(
+                    lambda: self.active < self.limit and not self._priority_waiting
+                )
+            self.active += 1
+
+        if self.backend is not None:
+            try:
+                while True:
+                    lease_id = await self.backend.acquire_lease(self.key, self.limit, self.lease_ttl)
+                    if lease_id:
+                        self._leases.append(lease_id)
+                        break
+                    await asyncio.sleep(self.poll_interval)
+            except BaseException:
+                await self._release_local()
+                raise
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self.backend is not None and self._leases:
+            await self.backend.release_lease(self.key, self._leases.pop())
+        await self._release_local()
+
+    async def _release_local(self):
+        async with self._condition:
+            self.active -= 1
+            if self._priority_waiting:
+                self._condition.notify_all()
+            else:
+                self._condition.notify()
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a rate-limit reset/retry value into seconds
+
+    Accepts plain seconds ("12", "1.5"), Go-style durations used by
+    OpenAI-compatible providers ("6m0s", "20ms", "1h2m"), and HTTP dates.
+    """
+    if value is None:
+        return None
+    value = str(value).strip()
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    parts = re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", value)
+    if parts and "".join(n + u for n, u in parts) == value:
+        factors = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+        return sum(float(n) * factors[u] for n, u in parts)
+
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count: one per CJK character, one per 4 other characters"""
+    cjk = len(_CJK_CHAR.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def estimate_image_tokens(width: int, height: int) -> int:
+    """Rough vision token count: one per 28x28 patch"""
+    return max(1, -(-width // 28) * -(-height // 28))
+
+
+def usage_tokens(usage: Optional[Mapping[str, Any]]) -> Optional[int]:
+    """Total tokens from an OpenAI `usage` or Gemini `usageMetadata` object"""
+    if not usage:
+        return None
+    total = usage.get("total_tokens", usage.get("totalTokenCount"))
+    if total is None:
+        prompt = usage.get("prompt_tokens", usage.get("promptTokenCount"))
+        if prompt is None:
+            return None
+        total = prompt + (usage.get("completion_tokens") or usage.get("candidatesTokenCount") or 0)
+    return int(total)
+
+
+class Reservation:
+    """
+    One admitted request, returned by `APILimiter.reserve`
+
+    Call `record_usage` with the response's usage to correct the token
+    reservation; if never called the estimate stands.
+    """
+
+    def __init__(self, limiter: "APILimiter", tokens: int):
+        self.limiter = limiter
+        self.tokens = tokens
+        self._entry = None
 
     async def __aenter__(self):
-        await self.semaphore.acquire()
+        deadline = current_deadline()
+        if deadline is None:
+            self._entry = await self.limiter._enter(self.tokens)
+            return self
+        try:
+            self._entry = await asyncio.wait_for(self.limiter._enter(self.tokens), deadline.remaining())
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded(
+                f"{deadline.name} deadline exceeded while waiting for the {self.limiter.name} limiter"
+            ) from None
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        self.semaphore.release()
+        await self.limiter._exit()
+
+    def record_usage(self, usage: Optional[Mapping[str, Any]]):
+        """Reconcile the reservation with the actual token usage"""
+        actual = usage_tokens(usage)
+        if actual is None or self._entry is None:
+            return
+        self.limiter.estimated_tokens += self.tokens
+        self.limiter.actual_tokens += actual
+        self.limiter.token_limiter.reconcile(self._entry, actual)
 
 
 class APILimiter:
-    """Combined rate and concurrency limiter for API calls"""
+    """
+    Combined rate, token and concurrency limiter for API calls
+
+    Use `async with limiter.reserve(estimated_tokens) as slot:` and call
+    `slot.record_usage(usage)` once the response arrives; plain
+    `async with limiter:` reserves no tokens.
+
+    Limits adapt with AIMD: every window of successful responses raises
+    concurrency by one and the request rate by `rpm_step`, up to the
+    configured maximums; a 429/503 halves both (down to the minimums) and
+    blocks new requests until the provider's Retry-After / reset time.
+    `x-ratelimit-limit-requests` / `-tokens` cap the rate and the TPM budget
+    at what the provider reports.
+    """
 
     def __init__(
         self,
         max_requests_per_minute: int = 20,
-        max_concurrent: int = 3
+        max_concurrent: int = 3,
+        name: str = "api",
+        max_tokens_per_minute: int = 0,
+        max_rpm_ceiling: Optional[int] = None,
+        max_concurrent_ceiling: Optional[int] = None,
+        min_rpm: int = 1,
+        min_concurrent: int = 1,
+        rpm_step: int = 10,
+        parent: Optional["APILimiter"] = None,
+        shared_key: Optional[str] = None
     ):
         """
         Args:
-            max_requests_per_minute: Maximum requests per minute
-            max_concurrent: Maximum concurrent requests
+            max_requests_per_minute: Initial requests per minute
+            max_concurrent: Initial concurrent requests
+            name: Name used in logs and metrics
+            max_tokens_per_minute: Token budget per minute (0 = unlimited)
+            max_rpm_ceiling: Upper bound for adaptive growth of the rate
+            max_concurrent_ceiling: Upper bound for adaptive growth of concurrency
+            min_rpm: Lower bound when backing off
+            min_concurrent: Lower bound when backing off
+            rpm_step: Additive rate increase per successful window
+            parent: Shared limiter every request must also pass (global cap)
+            shared_key: Key for the request, token and concurrency state in the
+                coordination backend; None keeps all state in this process
         """
-        self.rate_limiter = RateLimiter(max_requests_per_minute, 60)
-        self.concurrency_limiter = ConcurrencyLimiter(max_concurrent)
+        self.name = name
+        backend = coordination_backend if shared_key and is_shared() else None
+        self.rate_limiter = RateLimiter(
+            max_requests_per_minute, 60, backend=backend, key=f"{shared_key}:rpm"
+        )
+        self.concurrency_limiter = ConcurrencyLimiter(
+            max_concurrent, backend=backend, key=f"{shared_key}:concurrency",
+            lease_ttl=settings.LIMITER_LEASE_TTL_SECONDS
+        )
+        self.token_limiter = TokenLimiter(
+            max_tokens_per_minute, 60, backend=backend, key=f"{shared_key}:tpm"
+        )
+
+        self.max_rpm = max_rpm_ceiling or max_requests_per_minute
+        self.max_concurrent = max_concurrent_ceiling or max_concurrent
+        self.min_rpm = min_rpm
+        self.min_concurrent = min_concurrent
+        self.rpm_step = rpm_step
+        self.parent = parent
+
+        self.last_used = time.monotonic()
+        self.blocked_until = 0.0
+        self._successes_in_window = 0
+
+        # Metrics
+        self.total_requests = 0
+        self.throttled_responses = 0
+        self.increases = 0
+        self.decreases = 0
+        self.estimated_tokens = 0
+        self.actual_tokens = 0
+        self.provider_limits: Dict[str, Any] = {}
+
+    @property
+    def rpm(self) -> int:
+        return self.rate_limiter.max_requests
+
+    @property
+    def concurrency(self) -> int:
+        return self.concurrency_limiter.limit
+
+    def reserve(self, tokens: int = 0) -> Reservation:
+        """Admit one request expected to consume `tokens` input+output tokens"""
+        return Reservation(self, tokens)
+
+    def has_headroom(self) -> bool:
+        """Whether one more request would be admitted now without queueing"""
+        return (
+            self.blocked_until <= time.time()
+            and self.rate_limiter.pending < self.rate_limiter.capacity
+            and self.concurrency_limiter.active < self.concurrency_limiter.limit
+        )
+
+    async def _enter(self, tokens: int) -> list:
+        self.last_used = time.monotonic()
+        delay = self.blocked_until - time.time()
+        if delay > 0:
+            logger.warning(f"{self.name} 限流器：服务端要求等待 {delay:.1f} 秒")
+            await asyncio.sleep(delay)
+        priority = retry_priority.get()
+        await self.rate_limiter.acquire(priority=priority)
+        entry = await self.token_limiter.acquire(tokens, priority)
+        await self.concurrency_limiter.acquire(priority)
+        if self.parent is not None:
+            try:
+                await self.parent._enter(0)
+            except BaseException:
+                await self.concurrency_limiter.__aexit__(None, None, None)
+                raise
+        self.total_requests += 1
+        return entry
+
+    async def _exit(self):
+        if self.parent is not None:
+            await self.parent._exit()
+        await self.concurrency_limiter.__aexit__(None, None, None)
+        self.last_used = time.monotonic()
 
     async def __aenter__(self):
-        await self.rate_limiter.acquire()
-        await self.concurrency_limiter.__aenter__()
+        await self._enter(0)
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        await self.concurrency_limiter.__aexit__(exc_type, exc_val, exc_tb)
+        await self._exit()
+
+    async def configure(
+        self,
+        max_rpm: Optional[int] = None,
+        max_concurrent: Optional[int] = None,
+        max_tokens_per_minute: Optional[int] = None
+    ):
+        """Apply new ceilings; current limits are lowered to fit them"""
+        if max_rpm:
+            self.max_rpm = max_rpm
+            self.rate_limiter.max_requests = min(self.rate_limiter.max_requests, max_rpm)
+        if max_concurrent:
+            self.max_concurrent = max_concurrent
+            await self.concurrency_limiter.set_limit(min(self.concurrency, max_concurrent))
+        if max_tokens_per_minute is not None:
+            self.token_limiter.max_tokens = max_tokens_per_minute
+
+    async def observe(self, status_code: int, headers: Optional[Mapping[str, str]] = None):
+        """
+        Feed a provider response into the adaptive limits
+
+        Args:
+            status_code: HTTP status code of the response
+            headers: Response headers (Retry-After, x-ratelimit-*)
+        """
+        headers = {k.lower(): v for k, v in (headers or {}).items()}
+        self._read_rate_limit_headers(headers)
+
+        if status_code in (429, 503):
+            self.throttled_responses += 1
+            wait = parse_duration(headers.get("retry-after"))
+            if wait is None:
+                wait = parse_duration(headers.get("x-ratelimit-reset-requests"))
+            if wait is None:
+                wait = parse_duration(headers.get("x-ratelimit-reset-tokens"))
+            if wait:
+                self.blocked_until = max(self.blocked_until, time.time() + wait)
+            await self._decrease()
+        elif 200 <= status_code < 300:
+            self._successes_in_window += 1
+            if self._successes_in_window >= self.concurrency:
+                self._successes_in_window = 0
+                await self._increase()
+
+    def _read_rate_limit_headers(self, headers: Dict[str, str]):
+        """Honour limits advertised by the provider"""
+        limit = headers.get("x-ratelimit-limit-requests")
+        remaining = headers.get("x-ratelimit-remaining-requests")
+
+        if limit and limit.isdigit():
+            self.provider_limits["requests"] = int(limit)
+            # Provider quota is the hard ceiling for the rate
+            self.max_rpm = min(self.max_rpm, int(limit)) if self.max_rpm else int(limit)
+            if self.rate_limiter.max_requests > self.max_rpm:
+                self.rate_limiter.max_requests = self.max_rpm
+
+        if remaining is not None and remaining.strip() == "0":
+            reset = parse_duration(headers.get("x-ratelimit-reset-requests"))
+            if reset:
+                self.blocked_until = max(self.blocked_until, time.time() + reset)
+
+        token_limit = headers.get("x-ratelimit-limit-tokens", "")
+        if token_limit.isdigit():
+            self.provider_limits["tokens"] = int(token_limit)
+            budget = self.token_limiter.max_tokens
+            if not budget or budget > int(token_limit):
+                self.token_limiter.max_tokens = int(token_limit)
+
+        remaining_tokens = headers.get("x-ratelimit-remaining-tokens", "")
+        if remaining_tokens.isdigit():
+            self.provider_limits["remaining_tokens"] = int(remaining_tokens)
+
+    async def _increase(self):
+        """Additive increase"""
+        new_rpm = min(self.max_rpm, self.rpm + self.rpm_step)
+        new_concurrency = min(self.max_concurrent, self.concurrency + 1)
+        if new_rpm == self.rpm and new_concurrency == self.concurrency:
+            return
+        self.rate_limiter.max_requests = new_rpm
+        await self.concurrency_limiter.set_limit(new_concurrency)
+        self.increases += 1
+        logger.info(f"{self.name} 限流器上调: {new_rpm} RPM, 并发 {new_concurrency}")
+
+    async def _decrease(self):
+        """Multiplicative decrease"""
+        self._successes_in_window = 0
+        new_rpm = max(self.min_rpm, self.rpm // 2)
+        new_concurrency = max(self.min_concurrent, self.concurrency // 2)
+        self.rate_limiter.max_requests = new_rpm
+        await self.concurrency_limiter.set_limit(new_concurrency)
+        self.decreases += 1
+        logger.warning(f"{self.name} 限流器下调: {new_rpm} RPM, 并发 {new_concurrency}")
+
+    def metrics(self) -> Dict[str, Any]:
+        """Current limits and counters"""
+        return {
+            "rpm": self.rpm,
+            "concurrency": self.concurrency,
+            "active": self.concurrency_limiter.active,
+            "max_rpm": self.max_rpm,
+            "max_concurrency": self.max_concurrent,
+            "blocked_for_seconds": max(0.0, round(self.blocked_until - time.time(), 1)),
+            "tpm": self.token_limiter.max_tokens,
+            "tokens_in_window": self.token_limiter.used,
+            "estimated_tokens": self.estimated_tokens,
+            "actual_tokens": self.actual_tokens,
+            "total_requests": self.total_requests,
+            "throttled_responses": self.throttled_responses,
+            "increases": self.increases,
+            "decreases": self.decreases,
+            "provider_limits": dict(self.provider_limits),
+        }
+
+
+def key_fingerprint(api_key: str) -> str:
+    """Short, non-reversible identifier for an API key"""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:12]
+
+
+def user_rate_limits(user: Any, kind: str) -> Optional[Dict[str, int]]:
+    """
+    Per-user overrides for one limiter kind from `User.rate_limits`
+
+    The column holds JSON such as {"ocr": {"rpm": 500, "tpm": 40000, "concurrency": 8}}.
+    """
+    raw = getattr(user, "rate_limits", None)
+    if not raw:
+        return None
+    try:
+        limits = json.loads(raw).get(kind)
+    except (ValueError, AttributeError):
+        logger.warning(f"Invalid rate_limits for user {getattr(user, 'id', None)}")
+        return None
+    return limits or None
+
+
+class LimiterRegistry:
+    """
+    Limiters scoped per (API base URL, API key fingerprint)
+
+    Users bringing their own keys get independent throughput; users sharing
+    a key share its limiter. Every scoped limiter also passes through one
+    process-wide limiter (the global safety cap). Limiters idle for
+    LIMITER_IDLE_SECONDS are dropped.
+    """
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        prefix = kind.upper()
+        self.initial_rpm = getattr(settings, f"{prefix}_INITIAL_RPM")
+        self.max_rpm = getattr(settings, f"{prefix}_MAX_RPM")
+        self.initial_concurrency = getattr(settings, f"{prefix}_INITIAL_CONCURRENCY")
+        self.max_concurrency = getattr(settings, f"{prefix}_MAX_CONCURRENCY")
+        self.tpm = getattr(settings, f"{prefix}_TPM")
+        self.idle_seconds = settings.LIMITER_IDLE_SECONDS
+
+        self.global_limiter = APILimiter(
+            max_requests_per_minute=settings.LIMITER_GLOBAL_RPM,
+            max_concurrent=settings.LIMITER_GLOBAL_CONCURRENCY,
+            name=f"{kind}:global",
+            shared_key=f"{kind}:global",
+        )
+        self._limiters: "OrderedDict[tuple, APILimiter]" = OrderedDict()
+        self._overrides: Dict[tuple, tuple] = {}
+        self.evictions = 0
+
+    async def get(
+        self,
+        api_base: str,
+        api_key: str,
+        overrides: Optional[Mapping[str, int]] = None
+    ) -> APILimiter:
+        """
+        Limiter for one provider key
+
+        Args:
+            api_base: Provider base URL
+            api_key: Decrypted API key (only its fingerprint is kept)
+            overrides: Optional {"rpm", "tpm", "concurrency"} ceilings for this key
+        """
+        self._evict_idle()
+        key = (api_base.rstrip("/"), key_fingerprint(api_key))
+        overrides = dict(overrides or {})
+        limiter = self._limiters.get(key)
+
+        if limiter is None:
+            max_rpm = overrides.get("rpm") or self.max_rpm
+            max_concurrency = overrides.get("concurrency") or self.max_concurrency
+            limiter = APILimiter(
+                max_requests_per_minute=min(self.initial_rpm, max_rpm),
+                max_concurrent=min(self.initial_concurrency, max_concurrency),
+                name=f"{self.kind}:{key[1]}",
+                max_tokens_per_minute=overrides.get("tpm", self.tpm),
+                max_rpm_ceiling=max_rpm,
+                max_concurrent_ceiling=max_concurrency,
+                parent=self.global_limiter,
+                shared_key=f"{self.kind}:{key[0]}:{key[1]}",
+            )
+            self._limiters[key] = limiter
+            self._overrides[key] = tuple(sorted(overrides.items()))
+        elif tuple(sorted(overrides.items())) != self._overrides.get(key):
+            await limiter.configure(
+                max_rpm=overrides.get("rpm") or self.max_rpm,
+                max_concurrent=overrides.get("concurrency") or self.max_concurrency,
+                max_tokens_per_minute=overrides.get("tpm", self.tpm),
+            )
+            self._overrides[key] = tuple(sorted(overrides.items()))
+
+        self._limiters.move_to_end(key)
+        limiter.last_used = time.monotonic()
+        return limiter
+
+    def _evict_idle(self):
+        """Drop limiters unused for idle_seconds with nothing in flight"""
+        cutoff = time.monotonic() - self.idle_seconds
+        # Least recently used first; stop at the first recently used one
+        for key, limiter in list(self._limiters.items()):
+            if limiter.last_used > cutoff:
+                break
+            if limiter.concurrency_limiter.active:
+                continue
+            del self._limiters[key]
+            self._overrides.pop(key, None)
+            self.evictions += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        """Global cap plus every live per-key limiter (keys shown as fingerprints)"""
+        return {
+            "global": self.global_limiter.metrics(),
+            "keys": {
+                f"{api_base} {fingerprint}": limiter.metrics()
+                for (api_base, fingerprint), limiter in self._limiters.items()
+            },
+            "evictions": self.evictions,
+        }
+
+
+# Limiter registries; SiliconFlow L0 allows 1,000 RPM / 80k TPM per key.
+# Each key starts at conservative limits and adapts up to its ceiling.
+ocr_limiters = LimiterRegistry("ocr")
+translate_limiters = LimiterRegistry("translate")
+embedding_limiters = LimiterRegistry("embedding")
 
 
-# Global limiters (can be configured per user in production)
-# 根据硅基流动 L0 限制: RPM 1,000, TPM 80,000
-# 保守设置为 60 RPM，避免触发限制
-ocr_limiter = APILimiter(max_requests_per_minute=60, max_concurrent=5)
-translate_limiter = APILimiter(max_requests_per_minute=60, max_concurrent=5)
-embedding_limiter = APILimiter(max_requests_per_minute=100, max_concurrent=10)
+def limiter_metrics() -> Dict[str, Dict[str, Any]]:
+    """Metrics for all limiter registries"""
+    return {
+        "ocr": ocr_limiters.metrics(),
+        "translate": translate_limiters.metrics(),
+        "embedding": embedding_limiters.metrics(),
+    }
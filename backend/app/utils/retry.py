@@ -1,14 +1,239 @@
 import asyncio
 import logging
-from typing import Callable, Any, Optional, List
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Any, Dict, Optional, List, Tuple
 from functools import wraps
 
+import httpx
+
+from .deadline import current_deadline
+from .limiter import parse_duration, retry_priority
+
 logger = logging.getLogger(__name__)
 
+# Statuses worth retrying: throttling, request timeout, and server errors
+RETRYABLE_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
+
 
 class RetryError(Exception):
     """Raised when all retry attempts fail"""
-    pass
+
+    def __init__(self, message: str, last_exception: Optional[BaseException] = None):
+        super().__init__(message)
+        self.last_exception = last_exception
+
+
+class APIError(Exception):
+    """
+    Error from an upstream API
+
+    Keeps the HTTP status (and Retry-After) so retry and circuit-breaker
+    logic can classify it after it has been turned into a readable message.
+    """
+
+    def __init__(
+        self,
+        message: str,
+        status_code: Optional[int] = None,
+        retry_after: Optional[float] = None,
+        retryable: Optional[bool] = None
+    ):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.retryable = retryable
+
+
+def classify_error(exc: BaseException) -> Tuple[bool, Optional[float]]:
+    """
+    Decide whether an error is transient
+
+    Returns:
+        (retryable, seconds the server asked us to wait or None)
+    """
+    if isinstance(exc, RetryError):
+        return False, None
+
+    if isinstance(exc, APIError):
+        if exc.retryable is not None:
+            return exc.retryable, exc.retry_after
+        return exc.status_code in RETRYABLE_STATUS_CODES, exc.retry_after
+
+    if isinstance(exc, httpx.HTTPStatusError):
+        retry_after = parse_duration(exc.response.headers.get("retry-after"))
+        return exc.response.status_code in RETRYABLE_STATUS_CODES, retry_after
+
+    # Timeouts, connection resets, DNS failures, ...
+    if isinstance(exc, (httpx.TransportError, asyncio.TimeoutError, ConnectionError)):
+        return True, None
+
+    return False, None
+
+
+class RetryBudget:
+    """
+    Retries a whole job may spend
+
+    Once spent, failing calls in the job fail immediately instead of each
+    sleeping through its own retries during a provider outage.
+    """
+
+    def __init__(self, max_retries: int):
+        self.max_retries = max_retries
+        self.spent = 0
+
+    @classmethod
+    def for_items(cls, item_count: int, ratio: float, minimum: int) -> "RetryBudget":
+        """Budget proportional to the number of pages/sentences in a job"""
+        return cls(max(minimum, int(item_count * ratio)))
+
+    def grow_for_items(self, item_count: int, ratio: float):
+        """Raise the budget once the job size is known"""
+        self.max_retries = max(self.max_retries, int(item_count * ratio))
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.max_retries - self.spent)
+
+    def try_spend(self) -> bool:
+        if self.spent >= self.max_retries:
+            return False
+        self.spent += 1
+        return True
+
+
+_current_budget: ContextVar[Optional[RetryBudget]] = ContextVar("retry_budget", default=None)
+
+
+def current_retry_budget() -> Optional[RetryBudget]:
+    """Budget of the job running in this context, if any"""
+    return _current_budget.get()
+
+
+@contextmanager
+def use_retry_budget(budget: RetryBudget):
+    """Charge retries made in this context (and tasks started from it) to budget"""
+    token = _current_budget.set(budget)
+    try:
+        yield budget
+    finally:
+        _current_budget.reset(token)
+
+
+_policies: Dict[str, "RetryPolicy"] = {}
+
+
+class RetryPolicy:
+    """
+    Retry policy for calls to one upstream API
+
+    - Only transient errors are retried (429, 5xx, timeouts, connection
+      errors); other 4xx errors and unknown exceptions are raised at once.
+    - Backoff uses decorrelated jitter so clients that failed together do
+      not retry together; a server Retry-After is honoured (up to
+      max_retry_after).
+    - Retries are charged to the job's RetryBudget when one is active.
+    - No retry is started that would sleep past the current Deadline.
+    - Retried calls re-enter the API limiter with priority, ahead of calls
+      that have not been attempted yet.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_retries: int = 3,
+        base_delay: float = 2.0,
+        max_delay: float = 30.0,
+        max_retry_after: float = 120.0
+    ):
+        """
+        Args:
+            name: Name used in logs and metrics
+            max_retries: Retries per call (attempts = max_retries + 1)
+            base_delay: Minimum backoff in seconds
+            max_delay: Maximum backoff in seconds
+            max_retry_after: Longest Retry-After that is honoured
+        """
+        self.name = name
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self.stats = {
+            "calls": 0,
+            "retries": 0,
+            "recovered": 0,
+            "gave_up": 0,
+            "non_retryable": 0,
+            "budget_exhausted": 0,
+            "deadline_exceeded": 0,
+        }
+        _policies[name] = self
+
+    def next_delay(self, previous: float) -> float:
+        """Decorrelated jitter: uniform between base and 3x the previous delay"""
+        return min(self.max_delay, random.uniform(self.base_delay, max(self.base_delay, previous * 3)))
+
+    async def run(self, func: Callable[[], Any]) -> Any:
+        """Call func, retrying transient failures"""
+        self.stats["calls"] += 1
+        delay = self.base_delay
+        attempt = 0
+
+        while True:
+            token = retry_priority.set(attempt > 0)
+            try:
+                result = await func()
+                if attempt:
+                    self.stats["recovered"] += 1
+                return result
+            except Exception as e:
+                retryable, retry_after = classify_error(e)
+                if not retryable:
+                    self.stats["non_retryable"] += 1
+                    raise
+
+                if attempt >= self.max_retries:
+                    self.stats["gave_up"] += 1
+                    logger.error(f"{self.name}: all {attempt + 1} attempts failed")
+                    raise RetryError(f"Failed after {attempt + 1} attempts: {str(e)}", e) from e
+
+                budget = _current_budget.get()
+                if budget is not None and not budget.try_spend():
+                    self.stats["budget_exhausted"] += 1
+                    logger.error(f"{self.name}: job retry budget exhausted ({budget.max_retries})")
+                    raise RetryError(f"Retry budget exhausted: {str(e)}", e) from e
+
+                delay = self.next_delay(delay)
+                if retry_after is not None:
+                    delay = max(delay, min(retry_after, self.max_retry_after))
+
+                deadline = current_deadline()
+                if deadline is not None and deadline.remaining() <= delay:
+                    self.stats["deadline_exceeded"] += 1
+                    logger.error(f"{self.name}: {deadline.name} deadline leaves no time to retry")
+                    raise RetryError(f"{deadline.name} deadline exceeded: {str(e)}", e) from e
+
+                attempt += 1
+                self.stats["retries"] += 1
+                logger.warning(f"{self.name}: attempt {attempt} failed ({str(e)[:200]}), retrying in {delay:.1f} seconds")
+                await asyncio.sleep(delay)
+            finally:
+                retry_priority.reset(token)
+
+    def __call__(self, func):
+        """Use the policy as a decorator"""
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            return await self.run(lambda: func(*args, **kwargs))
+        return wrapper
+
+
+def retry_metrics() -> Dict[str, Dict[str, int]]:
+    """Counters of every retry policy"""
+    return {name: dict(policy.stats) for name, policy in _policies.items()}
 
 
 async def async_retry(
@@ -53,13 +278,15 @@ async def async_retry(
             else:
                 logger.error(f"All {max_retries} attempts failed")
 
-    raise RetryError(f"Failed after {max_retries} attempts: {str(last_exception)}")
+    raise RetryError(f"Failed after {max_retries} attempts: {str(last_exception)}", last_exception)
 
 
 def retry_on_failure(max_retries: int = 3, delays: Optional[List[int]] = None):
     """
     Decorator for automatic retry with exponential backoff
 
+    Retries every exception; API calls should use a RetryPolicy instead.
+
     Usage:
         @retry_on_failure(max_retries=3, delays=[2, 4, 8])
         async def my_function():
@@ -1,5 +1,8 @@
 import re
-from typing import List
+from typing import List, Tuple
+
+# Text ending with a sentence ending (possibly followed by whitespace)
+SENTENCE_END = r"[.!?。！？]\s*$"
 
 
 class SentenceSplitter:
@@ -34,31 +37,85 @@ class SentenceSplitter:
         all_sentences = []
 
         for paragraph in paragraphs:
-            paragraph = paragraph.strip()
-            if not paragraph:
-                continue
+            all_sentences.extend(
+                paragraph[start:end] for start, end in SentenceSplitter.sentence_spans(paragraph, language)
+            )
 
-            # Check if paragraph is a title/heading (short, no sentence ending)
-            # Titles are usually: short (<100 chars), single line, no period at end
-            lines = paragraph.split('\n')
-            if len(lines) == 1 and len(paragraph) < 100 and not re.search(r'[.!?。！？]\s*$', paragraph):
-                # Treat as single sentence (likely a title or heading)
-                all_sentences.append(paragraph)
-                continue
+        return all_sentences
 
-            # Get pattern for language, default to English
-            pattern = SentenceSplitter.SENTENCE_ENDINGS.get(language, SentenceSplitter.SENTENCE_ENDINGS["en"])
+    @staticmethod
+    def sentence_spans(paragraph: str, language: str = "en", allow_title: bool = True) -> List[Tuple[int, int]]:
+        """
+        (start, end) offsets of the sentences of one paragraph
 
-            # Split by sentence pattern
-            sentences = re.split(pattern, paragraph)
+        Args:
+            paragraph: Paragraph text (no blank lines)
+            language: Language code (en, de, ru, zh)
+            allow_title: Keep a short single line without ending as one sentence
+        """
+        stripped = paragraph.strip()
+        if not stripped:
+            return []
+        offset = len(paragraph) - len(paragraph.lstrip())
 
-            # Clean and filter
-            for s in sentences:
-                s = s.strip()
-                if s:
-                    all_sentences.append(s)
+        # Check if paragraph is a title/heading (short, no sentence ending)
+        # Titles are usually: short (<100 chars), single line, no period at end
+        lines = stripped.split('\n')
+        if allow_title and len(lines) == 1 and len(stripped) < 100 and not re.search(SENTENCE_END, stripped):
+            # Treat as single sentence (likely a title or heading)
+            return [(offset, offset + len(stripped))]
 
-        return all_sentences
+        # Get pattern for language, default to English
+        pattern = SentenceSplitter.SENTENCE_ENDINGS.get(language, SentenceSplitter.SENTENCE_ENDINGS["en"])
+
+        # Split by sentence pattern, keeping offsets
+        pieces = []
+        start = 0
+        for match in re.finditer(pattern, stripped):
+            pieces.append((start, match.start()))
+            start = match.end()
+        pieces.append((start, len(stripped)))
+
+        # Clean and filter
+        spans = []
+        for start, end in pieces:
+            piece = stripped[start:end]
+            if piece.strip():
+                start += len(piece) - len(piece.lstrip())
+                spans.append((offset + start, offset + start + len(piece.strip())))
+        return spans
+
+    @staticmethod
+    def continues_previous_page(previous_text: str, text: str) -> bool:
+        """
+        Cross-page rule: previous text stops mid-sentence and the next page
+        does not start a new one (capital, number, heading or reference)
+        """
+        return bool(previous_text) and not re.search(SENTENCE_END, previous_text) \
+            and not re.match(r'^[A-Z0-9#\[]', text)
+
+    @staticmethod
+    def split_pages(pages: List[dict], language: str = "auto") -> List[dict]:
+        """
+        Split OCR pages into sentences, merging sentences that span pages
+
+        Args:
+            pages: List of dicts with 'page_number' and 'text' keys
+            language: Language code, or "auto" to detect it from the text
+
+        Returns:
+            List of dicts with 'text' and 'page_numbers' (list) keys
+        """
+        if language == "auto":
+            texts = [page.get("text", "").strip() for page in pages]
+            language = SentenceSplitter.detect_language("\n\n".join(text for text in texts if text))
+
+        splitter = StreamingSentenceSplitter(language)
+        sentences = []
+        for page in pages:
+            sentences.extend(splitter.add_page(page.get("page_number", 0), page.get("text", "")))
+        sentences.extend(splitter.finish())
+        return sentences
 
     @staticmethod
     def merge_cross_page_sentences(pages: List[dict]) -> List[dict]:
@@ -86,7 +143,7 @@ class SentenceSplitter:
                 continue
 
             # Check if previous text ends with incomplete sentence
-            if current_text and not re.search(r"[.!?。！？]\s*$", current_text):
+            if current_text and not re.search(SENTENCE_END, current_text):
                 # Merge with current text
                 current_text += " " + text
                 current_pages.append(page_num)
@@ -140,3 +197,103 @@ class SentenceSplitter:
             return "de"
         else:
             return "en"
+
+
+class StreamingSentenceSplitter:
+    """
+    Split a document into sentences page by page, as its pages arrive
+
+    Pages are joined with the same cross-page rule as whole documents, and a
+    sentence is returned as soon as no later page can change it; the
+    unfinished tail (usually the last sentence or paragraph) is held until
+    the next page or finish(). Feeding every page gives exactly the
+    sentences of SentenceSplitter.split_pages.
+    """
+
+    def __init__(self, language: str = "en"):
+        self.language = language
+        self._text = ""
+        # (offset in _text, page number) where each held page starts
+        self._pages: List[Tuple[int, int]] = []
+        # _text starts inside a paragraph already known not to be a title
+        self._mid_paragraph = False
+
+    def add_page(self, page_number: int, text: str) -> List[dict]:
+        """
+        Add the next page
+
+        Returns:
+            Sentences completed by this page, as dicts with 'text' and 'page_numbers'
+        """
+        text = (text or "").strip()
+        if not text:
+            return []
+
+        if SentenceSplitter.continues_previous_page(self._text, text):
+            self._text = self._text.rstrip() + " "
+        elif self._text:
+            self._text += "\n\n"
+        self._pages.append((len(self._text), page_number))
+        self._text += text
+
+        # After a sentence ending the next page starts a new paragraph, so nothing is pending
+        return self._take(final=bool(re.search(SENTENCE_END, self._text)))
+
+    def finish(self) -> List[dict]:
+        """Sentences still held after the last page"""
+        return self._take(final=True)
+
+    def _take(self, final: bool) -> List[dict]:
+        paragraphs = []
+        start = 0
+        for match in re.finditer(r'\n\n+', self._text):
+            paragraphs.append((start, match.start()))
+            start = match.end()
+        paragraphs.append((start, len(self._text)))
+
+        spans: List[Tuple[int, int]] = []
+        cut = len(self._text)
+        mid_paragraph = False
+        for index, (start, end) in enumerate(paragraphs):
+            continued = index == 0 and self._mid_paragraph
+            paragraph = self._text[start:end]
+            if final or index < len(paragraphs) - 1:
+                spans.extend(
+                    (start + s, start + e)
+                    for s, e in SentenceSplitter.sentence_spans(paragraph, self.language, not continued)
+                )
+                continue
+
+            # Last paragraph: later pages may still extend it. Once it cannot be
+            # a title (several lines, or too long), all but its last sentence are final
+            cut = start
+            mid_paragraph = continued
+            stripped = paragraph.strip()
+            if continued or '\n' in stripped or len(stripped) >= 100:
+                pieces = SentenceSplitter.sentence_spans(paragraph, self.language, allow_title=False)
+                if len(pieces) > 1:
+                    spans.extend((start + s, start + e) for s, e in pieces[:-1])
+                    cut = start + pieces[-1][0]
+                    mid_paragraph = True
+
+        sentences = [
+            {"text": self._text[start:end], "page_numbers": self._page_numbers(start, end)}
+            for start, end in spans
+        ]
+
+        # Keep the tail, with the page it starts on
+        held = [(offset, page) for offset, page in self._pages if offset <= cut]
+        later = [(offset - cut, page) for offset, page in self._pages if offset > cut]
+        self._pages = ([(0, held[-1][1])] if held else []) + later if cut < len(self._text) else []
+        self._text = self._text[cut:]
+        self._mid_paragraph = mid_paragraph if self._text else False
+        return sentences
+
+    def _page_numbers(self, start: int, end: int) -> List[int]:
+        """Pages overlapping _text[start:end]"""
+        numbers = []
+        for index, (offset, page) in enumerate(self._pages):
+            page_end = self._pages[index + 1][0] if index + 1 < len(self._pages) else len(self._text)
+            if offset < end and page_end > start:
+                numbers.append(page)
+        return numbers
@@ -0,0 +1,74 @@
+import numpy as np
+from typing import List, Optional, Sequence, Tuple
+
+# Supported storage formats for embedding vectors
+SUPPORTED_FORMATS = ("float16", "int8")
+
+
+def quantize(vector: Sequence[float], dtype: str = "int8") -> Tuple[bytes, float]:
+    """
+    Encode an embedding vector in a compact binary form
+
+    Args:
+        vector: Embedding vector
+        dtype: "float16" or "int8" (symmetric scalar quantization)
+
+    Returns:
+        (raw bytes, per-vector scale); scale is 1.0 for float16
+    """
+    array = np.asarray(vector, dtype=np.float32)
+
+    if dtype == "float16":
+        return array.astype("<f2").tobytes(), 1.0
+
+    if dtype == "int8":
+        max_abs = float(np.max(np.abs(array))) if array.size else 0.0
+        scale = max_abs / 127.0 if max_abs > 0 else 1.0
+        quantized = np.clip(np.rint(array / scale), -127, 127).astype(np.int8)
+        return quantized.tobytes(), scale
+
+    raise ValueError(f"Unsupported embedding format: {dtype}")
+
+
+def raw_view(data: bytes, dtype: str) -> np.ndarray:
+    """View stored bytes as their quantized array without rescaling"""
+    if dtype == "float16":
+        return np.frombuffer(data, dtype="<f2")
+    if dtype == "int8":
+        return np.frombuffer(data, dtype=np.int8)
+    raise ValueError(f"Unsupported embedding format: {dtype}")
+
+
+def dequantize(data: bytes, dtype: str, scale: Optional[float] = None) -> np.ndarray:
+    """Decode stored bytes back to a float32 vector"""
+    return raw_view(data, dtype).astype(np.float32) * np.float32(scale or 1.0)
+
+
+def cosine_similarities(query: Sequence[float], rows: List[bytes], dtype: str) -> np.ndarray:
+    """
+    Cosine similarity between a query and many quantized vectors
+
+    The per-vector scale is a positive constant and cancels out of the
+    cosine, so the quantized values are compared directly.
+
+    Args:
+        query: Query embedding (float)
+        rows: Stored vectors, all in the same format and dimension
+        dtype: Storage format of rows
+
+    Returns:
+        Array of similarities, one per row
+    """
+    if not rows:
+        return np.zeros(0, dtype=np.float32)
+
+    q = np.asarray(query, dtype=np.float32)
+    matrix = np.frombuffer(b"".join(rows), dtype=raw_view(rows[0], dtype).dtype)
+    matrix = matrix.reshape(len(rows), -1).astype(np.float32)
+
+    if matrix.shape[1] != q.shape[0]:
+        raise ValueError(f"Dimension mismatch: query {q.shape[0]}, stored {matrix.shape[1]}")
+
+    norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(q)
+    norms[norms == 0] = 1.0
+    return (matrix @ q) / norms
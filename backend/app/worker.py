@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from typing import Dict, List, Optional
+
+from .config import settings
+from .models import Job
+from .services.job_queue import JobQueue, get_handler, job_kinds, job_queue
+from .services.worker_metrics import publish_worker_metrics, withdraw_worker_metrics
+
+# Importing the routers registers their job handlers
+from .routers import correction, ocr, translate  # noqa: F401
+
+logger = logging.getLogger(__name__)
+
+
+class JobWorker:
+    """
+    Runs jobs from the durable queue
+
+    Leases up to `concurrency` jobs at a time and heartbeats each lease while
+    its handler runs. On shutdown it stops leasing, lets running jobs finish
+    for WORKER_SHUTDOWN_GRACE_SECONDS, then cancels the rest and returns them
+    to the queue so another worker can pick them up.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue = job_queue,
+        concurrency: Optional[int] = None,
+        kinds: Optional[List[str]] = None
+    ):
+        self.queue = queue
+        self.concurrency = concurrency or settings.WORKER_CONCURRENCY
+        self.kinds = kinds or job_kinds()
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._stopping: Optional[asyncio.Event] = None
+        self._draining = False
+
+    def stop(self):
+        """Stop leasing new jobs and begin graceful shutdown"""
+        if self._stopping is not None:
+            self._stopping.set()
+
+    async def run(self):
+        self._stopping = asyncio.Event()
+        logger.info(f"Worker {self.worker_id} 启动: 并发 {self.concurrency}, 任务类型 {self.kinds}")
+        publisher = asyncio.create_task(self._publish_metrics())
+
+        while not self._stopping.is_set():
+            job = None
+            if len(self._tasks) < self.concurrency:
+                try:
+                    job = self.queue.lease(self.worker_id, self.kinds)
+                except Exception as e:
+                    logger.error(f"领取任务失败: {str(e)}")
+            if job is not None:
+                self._tasks[job.id] = asyncio.create_task(self._run_job(job))
+                continue
+            try:
+                await asyncio.wait_for(self._stopping.wait(), settings.WORKER_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+        await self._drain()
+        publisher.cancel()
+        try:
+            await withdraw_worker_metrics(self.worker_id)
+        except Exception as e:
+            logger.warning(f"撤回 Worker 状态失败: {str(e)}")
+        logger.info(f"Worker {self.worker_id} 已停止")
+
+    async def _publish_metrics(self):
+        """Share this process's provider-call state with /health and /metrics"""
+        while True:
+            try:
+                await publish_worker_metrics(self.worker_id)
+            except Exception as e:
+                logger.warning(f"发布 Worker 状态失败: {str(e)}")
+            await asyncio.sleep(settings.WORKER_METRICS_PUBLISH_SECONDS)
+
+    async def _run_job(self, job: Job):
+        handler = get_handler(job.kind)
+        heartbeat = asyncio.create_task(self._heartbeat(job.id))
+        logger.info(f"开始执行任务 {job.id} ({job.kind}, 第 {job.attempts}/{job.max_attempts} 次)")
+        try:
+            if handler is None:
+                raise RuntimeError(f"No handler for job kind {job.kind}")
+            await handler(job)
+            self.queue.complete(job.id, self.worker_id)
+            logger.info(f"任务 {job.id} 完成")
+        except asyncio.CancelledError:
+            if self._draining:
+                self.queue.release(job.id, self.worker_id)
+            raise
+        except Exception as e:
+            logger.error(f"任务 {job.id} 执行失败: {str(e)}", exc_info=True)
+            self.queue.fail(job.id, self.worker_id, e)
+        finally:
+            heartbeat.cancel()
+            self._tasks.pop(job.id, None)
+
+    async def _heartbeat(self, job_id: int):
+        """Renew the lease; cancel the job if another worker took it over"""
+        while True:
+            await asyncio.sleep(settings.JOB_HEARTBEAT_SECONDS)
+            try:
+                if not self.queue.heartbeat(job_id, self.worker_id):
+                    logger.error(f"任务 {job_id} 的租约已丢失，停止执行")
+                    task = self._tasks.get(job_id)
+                    if task is not None:
+                        task.cancel()
+                    return
+            except Exception as e:
+                logger.warning(f"任务 {job_id} 心跳失败: {str(e)}")
+
+    async def _drain(self):
+        if not self._tasks:
+            return
+        logger.info(f"等待 {len(self._tasks)} 个运行中的任务完成 (最多 {settings.WORKER_SHUTDOWN_GRACE_SECONDS:.0f} 秒)...")
+        await asyncio.wait(list(self._tasks.values()), timeout=settings.WORKER_SHUTDOWN_GRACE_SECONDS)
+
+        self._draining = True
+        remaining = list(self._tasks.values())
+        for task in remaining:
+            task.cancel()
+        if remaining:
+            logger.info(f"取消 {len(remaining)} 个未完成的任务并归还队列")
+            await asyncio.gather(*remaining, return_exceptions=True)
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+RateLimiter 微基准测试
+
+启动 N 个并发等待者争用同一个限流器，统计:
+  - 总耗时与实际吞吐 (应接近配置速率)
+  - 唤醒延迟 (实际放行时间 - 理论放行时间) 的 p50 / p99
+  - FIFO 违例数 (晚到的等待者先被放行的次数)
+  - 取消一半等待者后，剩余等待者是否仍全部放行、名额是否被归还
+  - try_acquire 的单次开销
+
+用法:
+    python bench_limiter.py                       # 1000 个等待者，60000 次/分钟，突发 10
+    python bench_limiter.py --waiters 5000 --rpm 120000 --burst 50
+"""
+
+import sys
+import time
+import asyncio
+import argparse
+from pathlib import Path
+
+# 添加 app 目录到路径
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.utils.limiter import RateLimiter
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def bench_contention(waiters: int, rpm: int, burst: int):
+    """N 个等待者同时 acquire"""
+    limiter = RateLimiter(rpm, 60, burst=burst)
+    order = []
+    lateness = []
+    start = time.monotonic()
+
+    async def waiter(i):
+        await limiter.acquire()
+        admitted = time.monotonic()
+        order.append(i)
+        # 第 i 个请求的理论放行时间（突发额度之后按固定间隔）
+        expected = start + max(0, i + 1 - limiter.capacity) * limiter.interval
+        lateness.append(admitted - expected)
+
+    tasks = []
+    for i in range(waiters):
+        tasks.append(asyncio.create_task(waiter(i)))
+        # 让任务按编号顺序进入限流器
+        await asyncio.sleep(0)
+    await asyncio.gather(*tasks)
+
+    elapsed = time.monotonic() - start
+    violations = sum(1 for a, b in zip(order, order[1:]) if b < a)
+
+    print(f"并发等待者: {waiters}, 速率: {rpm}/分钟, 突发: {limiter.capacity}")
+    print(f"  - 总耗时: {elapsed:.3f} 秒 (理论 {(waiters - limiter.capacity) * limiter.interval:.3f} 秒)")
+    print(f"  - 实际吞吐: {waiters / elapsed:.1f} 次/秒 (配置 {rpm / 60:.1f} 次/秒)")
+    print(f"  - 唤醒延迟 p50: {percentile(lateness, 0.5) * 1000:.2f} ms, p99: {percentile(lateness, 0.99) * 1000:.2f} ms")
+    print(f"  - FIFO 违例: {violations}")
+
+
+async def bench_cancellation(waiters: int, rpm: int, burst: int):
+    """取消一半等待者，检查名额归还"""
+    limiter = RateLimiter(rpm, 60, burst=burst)
+    admitted = []
+
+    async def waiter(i):
+        await limiter.acquire()
+        admitted.append(i)
+
+    tasks = [asyncio.create_task(waiter(i)) for i in range(waiters)]
+    await asyncio.sleep(0)
+    for task in tasks[1::2]:
+        task.cancel()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    cancelled = sum(1 for r in results if isinstance(r, asyncio.CancelledError))
+    print(f"取消测试: 取消 {cancelled} 个等待者")
+    print(f"  - 放行: {len(admitted)} / {waiters - cancelled}")
+    print(f"  - 剩余积压: {limiter.pending:.1f} 个名额")
+
+
+async def bench_try_acquire(iterations: int):
+    """try_acquire 的单次开销（进程内限流器，不经过协调后端）"""
+    limiter = RateLimiter(10 ** 9, 60)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await limiter.try_acquire()
+    elapsed = time.perf_counter() - start
+    print(f"try_acquire: {iterations} 次, 平均 {elapsed / iterations * 1e9:.0f} ns/次")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='RateLimiter 微基准测试')
+    parser.add_argument('--waiters', type=int, default=1000, help='并发等待者数量')
+    parser.add_argument('--rpm', type=int, default=60000, help='每分钟放行次数')
+    parser.add_argument('--burst', type=int, default=10, help='突发额度')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    asyncio.run(bench_contention(args.waiters, args.rpm, args.burst))
+    print("-" * 60)
+    asyncio.run(bench_cancellation(args.waiters, args.rpm, args.burst))
+    print("-" * 60)
+    asyncio.run(bench_try_acquire(100000))
+    print("=" * 60)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+将纠错记录中的 JSON 向量迁移为量化存储格式 (float16 / int8)
+
+旧版本把向量以 JSON 文本保存在 corrections.embedding 列中，
+每个维度约 10-15 字节。此脚本会把它们转换为 embedding_vector 二进制列，
+并清空原 JSON 列。
+
+用法:
+    python migrate_embeddings.py                      # 预览需要迁移的记录
+    python migrate_embeddings.py --apply              # 执行迁移（格式取自 EMBEDDING_STORAGE_FORMAT）
+    python migrate_embeddings.py --apply --format float16
+    python migrate_embeddings.py --backup             # 执行迁移并备份数据库
+"""
+
+import sys
+import os
+import json
+import shutil
+from datetime import datetime
+from pathlib import Path
+
+# 添加 app 目录到路径
+sys.path.insert(0, str(Path(__file__).parent))
+
+from sqlalchemy import create_engine, func, text
+from sqlalchemy.orm import sessionmaker
+from app.config import settings
+from app.database import add_missing_columns
+from app.models.correction import Correction
+from app.utils.vector_quantization import quantize, SUPPORTED_FORMATS
+
+BATCH_SIZE = 500
+
+
+def backup_database(db_path: str) -> str:
+    """备份数据库"""
+    if not os.path.exists(db_path):
+        print(f"❌ 数据库文件不存在: {db_path}")
+        return None
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    backup_path = f"{db_path}.backup_{timestamp}"
+
+    try:
+        shutil.copy2(db_path, backup_path)
+        print(f"✅ 数据库已备份到: {backup_path}")
+        return backup_path
+    except Exception as e:
+        print(f"❌ 备份失败: {e}")
+        return None
+
+
+def legacy_query(session):
+    """仍使用 JSON 向量的记录"""
+    return session.query(Correction).filter(
+        Correction.embedding.isnot(None),
+        Correction.embedding != ""
+    )
+
+
+def preview_migration(session, dtype: str):
+    """预览需要迁移的记录"""
+    print("\n" + "=" * 60)
+    print("预览模式 - 扫描需要迁移的向量")
+    print("=" * 60 + "\n")
+
+    total_records = legacy_query(session).count()
+    if total_records == 0:
+        print("✅ 未发现需要迁移的记录\n")
+        return False
+
+    json_bytes = session.query(func.sum(func.length(Correction.embedding))).filter(
+        Correction.embedding.isnot(None)
+    ).scalar() or 0
+
+    sample = legacy_query(session).first()
+    dimension = len(json.loads(sample.embedding))
+    bytes_per_vector = dimension * (2 if dtype == "float16" else 1)
+
+    print(f"📊 发现 {total_records} 条 JSON 向量记录 (维度约 {dimension})")
+    print(f"   - 当前 JSON 大小: {json_bytes / 1024:.1f} KB")
+    print(f"   - 迁移后 {dtype} 大小: {total_records * bytes_per_vector / 1024:.1f} KB")
+    print("\n提示: 使用 --apply 参数执行迁移, --backup 参数同时备份数据库\n")
+
+    return True
+
+
+def apply_migration(session, dtype: str, backup: bool = False):
+    """执行迁移"""
+    if backup:
+        db_path = str(settings.DATABASE_URL).replace('sqlite:///', '')
+        if not backup_database(db_path):
+            print("❌ 备份失败，取消迁移操作")
+            return
+
+    print("\n" + "=" * 60)
+    print(f"执行迁移 - 转换为 {dtype} ...")
+    print("=" * 60 + "\n")
+
+    total_records = 0
+    failed_records = 0
+    last_id = 0
+
+    while True:
+        # 按主键分批处理，避免一次性加载全部向量
+        batch = legacy_query(session).filter(
+            Correction.id > last_id
+        ).order_by(Correction.id).limit(BATCH_SIZE).all()
+
+        if not batch:
+            break
+
+        for correction in batch:
+            last_id = correction.id
+            try:
+                vector = json.loads(correction.embedding)
+                data, scale = quantize(vector, dtype)
+            except (json.JSONDecodeError, ValueError) as e:
+                print(f"  ✗ ID {correction.id:6d} | 向量解析错误: {e}")
+                failed_records += 1
+                continue
+
+            correction.embedding_vector = data
+            correction.embedding_dtype = dtype
+            correction.embedding_scale = scale
+            correction.embedding = None
+            total_records += 1
+
+        try:
+            session.commit()
+            print(f"  ✓ 已迁移 {total_records} 条记录 (最后 ID {last_id})")
+        except Exception as e:
+            session.rollback()
+            print(f"\n❌ 提交失败: {e}\n")
+            return
+
+    print(f"\n✅ 迁移完成!")
+    print(f"   - 迁移了 {total_records} 条记录")
+    print(f"   - 失败 {failed_records} 条记录\n")
+
+    # 回收 SQLite 文件空间
+    if total_records and settings.DATABASE_URL.startswith("sqlite"):
+        session.close()
+        with session.get_bind().connect() as conn:
+            conn.execution_options(isolation_level="AUTOCOMMIT").execute(text("VACUUM"))
+        print("🧹 已执行 VACUUM 回收空间\n")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='将纠错记录中的 JSON 向量迁移为量化存储格式',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+示例:
+  python migrate_embeddings.py                        预览需要迁移的记录
+  python migrate_embeddings.py --apply                执行迁移
+  python migrate_embeddings.py --apply --format int8  指定存储格式
+  python migrate_embeddings.py --backup               执行迁移并备份数据库
+        """
+    )
+
+    parser.add_argument('--apply', action='store_true',
+                       help='执行迁移（默认只预览）')
+    parser.add_argument('--backup', action='store_true',
+                       help='迁移前备份数据库')
+    parser.add_argument('--format', choices=SUPPORTED_FORMATS,
+                       default=settings.EMBEDDING_STORAGE_FORMAT,
+                       help='向量存储格式（默认取自 EMBEDDING_STORAGE_FORMAT）')
+
+    args = parser.parse_args()
+
+    # 确保新列已存在
+    add_missing_columns()
+
+    # 创建数据库会话
+    db_url = str(settings.DATABASE_URL)
+    engine = create_engine(db_url)
+    SessionLocal = sessionmaker(bind=engine)
+    session = SessionLocal()
+
+    try:
+        if args.apply or args.backup:
+            apply_migration(session, args.format, backup=args.backup)
+        else:
+            has_records = preview_migration(session, args.format)
+            if not has_records:
+                return 0
+            return 1
+    finally:
+        session.close()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
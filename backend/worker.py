@@ -0,0 +1,62 @@
+"""
+后台任务 Worker 启动脚本
+
+从数据库任务队列领取 OCR / 翻译任务并执行。Web 进程 (run.py) 只负责入队，
+可以启动任意数量的 Worker（同一台或多台共享数据库的机器）。
+
+收到 SIGINT / SIGTERM 后停止领取新任务，等待运行中的任务完成
+(WORKER_SHUTDOWN_GRACE_SECONDS)，超时的任务被取消并归还队列。
+
+用法:
+    python worker.py
+    WORKER_CONCURRENCY=4 python worker.py
+"""
+import asyncio
+import logging
+import signal
+import sys
+
+# 配置根日志
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stdout),
+    ]
+)
+
+# 降低第三方库日志级别
+logging.getLogger('httpx').setLevel(logging.WARNING)
+logging.getLogger('httpcore').setLevel(logging.WARNING)
+
+from app.database import init_db
+from app.worker import JobWorker
+
+
+async def main():
+    init_db()
+    worker = JobWorker()
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, worker.stop)
+        except NotImplementedError:
+            # Windows: Ctrl+C raises KeyboardInterrupt instead
+            pass
+
+    print("=" * 60)
+    print("启动 OCR & Translate 任务 Worker")
+    print("=" * 60)
+    print(f"Worker ID: {worker.worker_id}")
+    print(f"并发任务数: {worker.concurrency}")
+    print("=" * 60)
+
+    await worker.run()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -31,11 +31,15 @@ export const authAPI = {
 // OCR相关
 export const ocrAPI = {
   // 上传文件
-  uploadFile(file, sourceLanguage = 'auto') {
+  // targetLanguage: 识别的同时逐页翻译（OCR + 翻译流水线）
+  uploadFile(file, sourceLanguage = 'auto', targetLanguage = null) {
     const formData = new FormData()
     formData.append('file', file)
     formData.append('source_language', sourceLanguage)
     formData.append('auto_process', 'true')  // 启用后台自动处理
+    if (targetLanguage) {
+      formData.append('target_language', targetLanguage)
+    }
     return request.post('/ocr/upload', formData, {
       headers: {
         'Content-Type': 'multipart/form-data'
@@ -51,6 +55,21 @@ export const ocrAPI = {
   // 获取OCR状态
   getStatus(historyId) {
     return request.get(`/ocr/status/${historyId}`)
+  },
+
+  // 暂停OCR（已完成的页面会保留）
+  pause(historyId) {
+    return request.post(`/ocr/pause/${historyId}`)
+  },
+
+  // 从第一个未完成的页面继续
+  resume(historyId) {
+    return request.post(`/ocr/resume/${historyId}`)
+  },
+
+  // 停止OCR
+  stop(historyId) {
+    return request.post(`/ocr/stop/${historyId}`)
   }
 }
 
@@ -89,9 +108,17 @@ export const correctionAPI = {
     return request.post('/corrections/import', data)
   },
 
-  // 导出纠错
+  // 查询导入任务进度
+  getImportProgress(jobId) {
+    return request.get(`/corrections/import/${jobId}`)
+  },
+
+  // 导出纠错（NDJSON 流，按文件下载）
   export(params) {
-    return request.get('/corrections/export', { params })
+    return request.get('/corrections/export', {
+      params: { format: 'ndjson', ...params },
+      responseType: 'blob'
+    })
   }
 }
 
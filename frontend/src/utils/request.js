@@ -26,7 +26,14 @@ request.interceptors.response.use(
     return response.data
   },
   error => {
-    const message = error.response?.data?.detail || error.message || '请求失败'
+    const detail = error.response?.data?.detail
+    let message = detail || error.message || '请求失败'
+
+    // 429 准入控制：服务繁忙或超出个人配额
+    if (error.response?.status === 429 && typeof detail === 'object') {
+      const retryAfter = error.response.headers['retry-after'] || detail.retry_after
+      message = `服务繁忙 (${detail.message})，队列中第 ${detail.queue_position} 位，请 ${retryAfter} 秒后重试`
+    }
     ElMessage.error(message)
 
     // 401 未授权，清除token并跳转登录
@@ -43,6 +43,9 @@ echo Backend will listen on %BACKEND_HOST%:%BACKEND_PORT%
 REM 在新窗口启动后端
 start "OCR-Backend" cmd /c ".venv\Scripts\activate.bat && uvicorn app.main:app --host %BACKEND_HOST% --port %BACKEND_PORT%"
 
+REM 在新窗口启动任务 Worker（执行排队的 OCR / 翻译任务）
+start "OCR-Worker" cmd /c ".venv\Scripts\activate.bat && python worker.py"
+
 cd ..
 
 REM 等待后端启动
@@ -85,8 +88,9 @@ echo Access URLs:
 echo    Frontend: http://localhost:5173
 echo    Backend:  http://%BACKEND_HOST%:%BACKEND_PORT%/docs
 echo.
-echo Two new windows have been opened:
+echo Three new windows have been opened:
 echo    - OCR-Backend: Backend server
+echo    - OCR-Worker: Background job worker
 echo    - OCR-Frontend: Frontend dev server
 echo.
 echo To stop services, close those windows or run: stop_all.bat
@@ -49,6 +49,12 @@ nohup bash -c "source .venv/bin/activate && python run.py" > ../logs/backend.log
 BACKEND_PID=$!
 echo "Backend started with PID: $BACKEND_PID"
 echo $BACKEND_PID > ../logs/backend.pid
+
+# 启动任务 Worker（执行排队的 OCR / 翻译任务）
+nohup bash -c "source .venv/bin/activate && python worker.py" > ../logs/worker.log 2>&1 &
+WORKER_PID=$!
+echo "Worker started with PID: $WORKER_PID"
+echo $WORKER_PID > ../logs/worker.pid
 cd ..
 
 # 等待后端启动
@@ -102,10 +108,12 @@ echo "   Backend:  http://${BACKEND_HOST}:${BACKEND_PORT}/docs"
 echo ""
 echo "Logs:"
 echo "   tail -f logs/backend.log"
+echo "   tail -f logs/worker.log"
 echo "   tail -f logs/frontend.log"
 echo ""
 echo "Process IDs:"
 echo "   Backend:  $BACKEND_PID"
+echo "   Worker:   $WORKER_PID"
 echo "   Frontend: $FRONTEND_PID"
 echo ""
 echo "To stop services:"
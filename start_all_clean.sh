@@ -22,6 +22,17 @@ if [ -f "logs/backend.pid" ]; then
     rm logs/backend.pid
 fi
 
+# 停止旧的 Worker 进程
+if [ -f "logs/worker.pid" ]; then
+    OLD_PID=$(cat logs/worker.pid)
+    if ps -p $OLD_PID > /dev/null 2>&1; then
+        echo "Stopping old worker process (PID: $OLD_PID)..."
+        kill $OLD_PID 2>/dev/null
+        sleep 1
+    fi
+    rm logs/worker.pid
+fi
+
 # 停止旧的前端进程
 if [ -f "logs/frontend.pid" ]; then
     OLD_PID=$(cat logs/frontend.pid)
@@ -90,6 +101,12 @@ BACKEND_PID=$!
 echo "Backend started with PID: $BACKEND_PID"
 echo $BACKEND_PID > ../logs/backend.pid
 
+# 启动任务 Worker
+nohup python worker.py > ../logs/worker.log 2>&1 &
+WORKER_PID=$!
+echo "Worker started with PID: $WORKER_PID"
+echo $WORKER_PID > ../logs/worker.pid
+
 cd ..
 
 # 等待后端启动
@@ -154,6 +171,7 @@ echo "   Backend (Local):    http://${BACKEND_HOST}:${BACKEND_PORT}/docs"
 echo ""
 echo "📝 Logs:"
 echo "   Backend:  tail -f logs/backend.log"
+echo "   Worker:   tail -f logs/worker.log"
 echo "   Frontend: tail -f logs/frontend.log"
 echo ""
 echo "🔧 Process IDs:"
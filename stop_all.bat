@@ -18,6 +18,10 @@ if exist "logs\backend.pid" (
     taskkill /FI "WINDOWTITLE eq OCR-Backend*" /F > nul 2>&1
 )
 
+REM 停止 Worker
+echo Stopping worker by window title...
+taskkill /FI "WINDOWTITLE eq OCR-Worker*" /F > nul 2>&1
+
 REM 停止前端
 if exist "logs\frontend.pid" (
     set /p FRONTEND_PID=<logs\frontend.pid
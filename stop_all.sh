@@ -19,6 +19,22 @@ else
     pkill -f "uvicorn app.main:app"
 fi
 
+# Worker 收到 SIGTERM 后会等待运行中的任务，未完成的任务归还队列
+if [ -f "logs/worker.pid" ]; then
+    WORKER_PID=$(cat logs/worker.pid)
+    if ps -p $WORKER_PID > /dev/null 2>&1; then
+        echo "Stopping worker (PID: $WORKER_PID)..."
+        kill $WORKER_PID
+        echo "✓ Worker stopped"
+    else
+        echo "Worker process not found"
+    fi
+    rm logs/worker.pid
+else
+    echo "Stopping worker by name..."
+    pkill -f "python worker.py"
+fi
+
 if [ -f "logs/frontend.pid" ]; then
     FRONTEND_PID=$(cat logs/frontend.pid)
     if ps -p $FRONTEND_PID > /dev/null 2>&1; then